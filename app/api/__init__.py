@@ -3,3 +3,7 @@ from .auth import router as auth_router
 from .stocks import router as stocks_router
 from .portfolio import router as portfolio_router
 from .transactions import router as transactions_router
+from .orders import router as orders_router
+from .market import router as market_router
+from .ws import router as ws_router
+from .admin import router as admin_router
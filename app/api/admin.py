@@ -0,0 +1,86 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from typing import List, Literal, Optional
+from datetime import date
+
+from ..schemas.admin import VolumeStatsResponse, ProfileSummaryResponse
+from ..schemas.serializers import volume_stats_serializer, profile_serializer
+from ..core.profiling import profile_store
+from ..core.security import get_current_user_id
+from ..domain.units import day_range
+from ..infrastructure.database import db
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+async def require_admin(user_id: str = Depends(get_current_user_id)) -> str:
+    """Dependency that only lets admin users through."""
+    user = db.get_user_by_id(user_id)
+    if user is None or user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acceso restringido a administradores"
+        )
+    return user_id
+
+
+@router.get("/stats/volume", response_model=List[VolumeStatsResponse])
+async def get_volume_stats(
+    ticker: Optional[str] = None,
+    group_by: Literal["ticker", "user", "bank", "type"] = Query("ticker", alias="groupBy"),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    admin_id: str = Depends(require_admin),
+):
+    """
+    Get trading volume across all users.
+    
+    Groups by ticker (default), user, bank or type, optionally for one
+    ticker and a `from`/`to` date range (both inclusive).
+    """
+    start, end = day_range(date_from, date_to)
+    stats = db.get_volume_stats(
+        group_by=group_by,
+        ticker=ticker.upper() if ticker else None,
+        date_from=start,
+        date_to=end,
+    )
+    return volume_stats_serializer.response(stats)
+
+
+@router.get("/profiles", response_model=List[ProfileSummaryResponse])
+async def get_profiles(admin_id: str = Depends(require_admin)):
+    """
+    Get the captured request profiles, newest first.
+    
+    Profiles come from requests sent with `X-Profile: 1` by an admin,
+    from random sampling (PROFILE_SAMPLE_RATE) and from requests slower
+    than SLOW_REQUEST_MS. Only the most recent PROFILE_STORE_SIZE are kept.
+    """
+    return profile_serializer.response(profile_store.list())
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, admin_id: str = Depends(require_admin)):
+    """
+    Download one profile as collapsed stacks, for flamegraph.pl or speedscope.
+    """
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfil no encontrado"
+        )
+    return Response(
+        content=profile.collapsed(),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.txt"'},
+    )
+
+
+@router.delete("/profiles", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_profiles(admin_id: str = Depends(require_admin)):
+    """
+    Delete all captured profiles.
+    """
+    profile_store.clear()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
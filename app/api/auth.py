@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Response
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
 import uuid
 
 from ..schemas.user import UserCreate, UserLogin, UserResponse, LoginResponse
 from ..core.security import (
-    verify_password, 
-    get_password_hash, 
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
     create_access_token,
     get_current_user_id,
+    verify_token,
+    revoke_token,
+    security,
 )
 from ..core.config import settings
-from ..infrastructure.database import db
+from ..infrastructure.database import db, DuplicateUserError
 from ..domain.models import User
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -23,13 +28,18 @@ async def login(credentials: UserLogin):
     """
     user = db.get_user_by_username(credentials.username)
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales incorrectas",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade the stored hash when BCRYPT_ROUNDS has changed
+    if password_needs_rehash(user.password_hash):
+        user.password_hash = await get_password_hash_async(credentials.password)
+        db.update_user(user)
+    
     # Create access token
     access_token = create_access_token(
         data={"sub": user.id},
@@ -53,32 +63,29 @@ async def register(user_data: UserCreate):
     """
     Register a new user.
     """
-    # Check if username or email already exists
-    existing = db.get_user_by_username(user_data.username)
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El nombre de usuario ya está registrado"
-        )
-    
-    existing_email = db.get_user_by_username(user_data.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El correo electrónico ya está registrado"
-        )
-    
     # Create new user
     new_user = User(
         id=str(uuid.uuid4()),
         name=user_data.name,
         email=user_data.email,
         username=user_data.username,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         role="user"
     )
     
-    db.create_user(new_user)
+    # Uniqueness of username and email is enforced by the store
+    try:
+        db.create_user(new_user)
+    except DuplicateUserError as e:
+        detail = (
+            "El nombre de usuario ya está registrado"
+            if e.field == "username"
+            else "El correo electrónico ya está registrado"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
     
     return UserResponse(
         id=new_user.id,
@@ -89,6 +96,16 @@ async def register(user_data: UserCreate):
     )
 
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Revoke the current access token.
+    """
+    verify_token(credentials.credentials)
+    revoke_token(credentials.credentials)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(user_id: str = Depends(get_current_user_id)):
     """
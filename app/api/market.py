@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Request
+
+from ..schemas.market import MarketStatusResponse
+from ..core.config import settings
+
+router = APIRouter(prefix="/market", tags=["Market"])
+
+
+@router.get("/status", response_model=MarketStatusResponse)
+async def get_market_status(request: Request):
+    """
+    Get market-data engine status, tick rate and apply latency.
+    """
+    engine = getattr(request.app.state, "market_engine", None)
+    if engine is None:
+        return MarketStatusResponse(running=False, source=settings.MARKET_DATA_SOURCE)
+    
+    metrics = engine.metrics()
+    return MarketStatusResponse(
+        running=True,
+        source=settings.MARKET_DATA_SOURCE,
+        leader=metrics["leader"],
+        ticksReceived=metrics["ticks_received"],
+        ticksApplied=metrics["ticks_applied"],
+        batches=metrics["batches"],
+        tickRate=metrics["tick_rate"],
+        applyLatencyMs=metrics["apply_latency_ms"],
+        applyLatencyAvgMs=metrics["apply_latency_avg_ms"],
+        applyLatencyMaxMs=metrics["apply_latency_max_ms"]
+    )
@@ -0,0 +1,153 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from typing import List, Optional
+
+from ..schemas.order import OrderCreate, OrderAmend, OrderResponse, OrderBookResponse
+from ..schemas.serializers import order_serializer
+from ..core.idempotency import idempotency_cache, REPLAYED_HEADER
+from ..core.security import get_current_user_id
+from ..infrastructure.database import db
+from ..infrastructure.matching import matching_engine, OrderError
+from ..domain.units import from_centavos, to_centavos
+
+router = APIRouter(prefix="/orders", tags=["Orders"])
+
+
+def _order_error(e: OrderError) -> HTTPException:
+    """Map an engine rejection to the API error."""
+    if e.reason == "not_found":
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Orden no encontrada")
+    if e.reason == "inactive":
+        detail = "La orden ya no está activa"
+    elif e.reason == "balance":
+        detail = (
+            f"Saldo insuficiente. Disponible: C$ {from_centavos(e.available):.2f}, "
+            f"Requerido: C$ {from_centavos(e.required):.2f}"
+        )
+    elif e.reason == "shares":
+        detail = f"Solo tienes {e.available} acciones disponibles"
+    else:
+        detail = f"La cantidad debe ser mayor que las {e.available} acciones ya ejecutadas"
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _get_stock(ticker: str):
+    stock = db.get_stock(ticker.upper())
+    if not stock:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Stock {ticker} no encontrado"
+        )
+    return stock
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+def place_order(
+    data: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Place a limit order.
+    
+    The order matches right away against resting orders at the same or a
+    better price; whatever is left rests in the book until it fills, is
+    amended or is cancelled. A retry with the same `Idempotency-Key`
+    header returns the order placed the first time.
+    """
+    def place():
+        stock = _get_stock(data.ticker)
+        try:
+            return matching_engine.place(
+                user_id,
+                stock,
+                side=data.side,
+                price=to_centavos(data.price),
+                quantity=data.quantity,
+                bank=data.bank
+            )
+        except OrderError as e:
+            raise _order_error(e)
+    
+    order, replayed = idempotency_cache.run(user_id, idempotency_key, "order", data, place)
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return OrderResponse(**order_serializer.row(order))
+
+
+@router.get("", response_model=List[OrderResponse])
+def get_orders(
+    active: Optional[bool] = None,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get orders for the current user, newest first.
+    """
+    return order_serializer.response(matching_engine.user_orders(user_id, active))
+
+
+@router.get("/book/{ticker}", response_model=OrderBookResponse)
+def get_order_book(
+    ticker: str,
+    depth: int = Query(10, ge=1, le=100),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Get the best price levels of a stock's order book.
+    """
+    stock = _get_stock(ticker)
+    bids, asks = matching_engine.depth(stock.ticker, depth)
+    
+    def levels(side):
+        return [
+            {"price": from_centavos(price), "quantity": quantity, "orders": orders}
+            for price, quantity, orders in side
+        ]
+    
+    return OrderBookResponse(ticker=stock.ticker, bids=levels(bids), asks=levels(asks))
+
+
+@router.get("/{order_id}", response_model=OrderResponse)
+def get_order(order_id: str, user_id: str = Depends(get_current_user_id)):
+    """
+    Get one order of the current user.
+    """
+    try:
+        order = matching_engine.snapshot(user_id, order_id)
+    except OrderError as e:
+        raise _order_error(e)
+    return OrderResponse(**order_serializer.row(order))
+
+
+@router.patch("/{order_id}", response_model=OrderResponse)
+def amend_order(order_id: str, data: OrderAmend, user_id: str = Depends(get_current_user_id)):
+    """
+    Amend the limit price and/or total quantity of an open order.
+    
+    Lowering the quantity keeps the order's place in the queue; changing
+    the price or raising the quantity moves it to the back.
+    """
+    try:
+        order = matching_engine.get(user_id, order_id)
+        order = matching_engine.amend(
+            user_id,
+            order_id,
+            company=_get_stock(order.ticker).company,
+            price=to_centavos(data.price) if data.price is not None else None,
+            quantity=data.quantity
+        )
+    except OrderError as e:
+        raise _order_error(e)
+    return OrderResponse(**order_serializer.row(order))
+
+
+@router.delete("/{order_id}", response_model=OrderResponse)
+def cancel_order(order_id: str, user_id: str = Depends(get_current_user_id)):
+    """
+    Cancel an open order, releasing its reserved balance or shares.
+    """
+    try:
+        order = matching_engine.cancel(user_id, order_id)
+    except OrderError as e:
+        raise _order_error(e)
+    return OrderResponse(**order_serializer.row(order))
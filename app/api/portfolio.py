@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Response
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from typing import AsyncIterator, Dict, List, Tuple
+import asyncio
 
 from ..schemas.portfolio import HoldingResponse, BalanceResponse, PortfolioSummary
+from ..schemas.serializers import holding_serializer
+from ..core.config import settings
 from ..core.security import get_current_user_id
+from ..infrastructure.broadcast import PortfolioWatcher, portfolio_notifier
 from ..infrastructure.database import db
+from ..domain.units import from_centavos
 
 router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
 
@@ -13,49 +20,28 @@ async def get_portfolio(user_id: str = Depends(get_current_user_id)):
     """
     Get user's complete portfolio summary.
     """
-    portfolio = db.get_portfolio(user_id)
+    # A copy: trades on worker threads mutate the stored portfolio
+    portfolio = db.get_portfolio_snapshot(user_id)
     if not portfolio:
         # Auto-create portfolio for demo resilience
         from ..domain.models import Portfolio
-        portfolio = Portfolio(user_id=user_id, balance=1000.0)
+        portfolio = Portfolio(user_id=user_id, balance=100_000)
         db.update_portfolio(portfolio)
     
-    # Calculate totals
-    holdings_response = []
-    total_invested = 0
-    total_value = 0
-    
-    for h in portfolio.holdings:
-        # Update current price from stocks
-        stock = db.get_stock(h.ticker)
-        if stock:
-            h.current_price = stock.price
-        
-        cost = h.shares * h.avg_price
-        value = h.shares * h.current_price
-        total_invested += cost
-        total_value += value
-        
-        holdings_response.append(HoldingResponse(
-            ticker=h.ticker,
-            company=h.company,
-            shares=h.shares,
-            avgPrice=h.avg_price,
-            currentPrice=h.current_price,
-            purchaseDate=h.purchase_date
-        ))
-    
-    total_gain_loss = total_value - total_invested
+    # Totals are maintained incrementally by trades and price updates
+    total_invested = portfolio.cost_basis
+    total_gain_loss = portfolio.unrealized_pnl
     total_gain_loss_percent = (total_gain_loss / total_invested * 100) if total_invested > 0 else 0
     
-    return PortfolioSummary(
-        totalValue=total_value,
-        totalInvested=total_invested,
-        totalGainLoss=total_gain_loss,
-        totalGainLossPercent=total_gain_loss_percent,
-        balance=portfolio.balance,
-        holdings=holdings_response
-    )
+    summary = {
+        "totalValue": from_centavos(portfolio.market_value),
+        "totalInvested": from_centavos(total_invested),
+        "totalGainLoss": from_centavos(total_gain_loss),
+        "totalGainLossPercent": float(total_gain_loss_percent),
+        "balance": from_centavos(portfolio.balance),
+        "holdings": holding_serializer.rows(portfolio.holdings.values()),
+    }
+    return Response(content=to_json(summary), media_type="application/json")
 
 
 @router.get("/holdings", response_model=List[HoldingResponse])
@@ -63,30 +49,16 @@ async def get_holdings(user_id: str = Depends(get_current_user_id)):
     """
     Get user's current holdings.
     """
-    portfolio = db.get_portfolio(user_id)
+    # A copy: trades on worker threads mutate the stored portfolio
+    portfolio = db.get_portfolio_snapshot(user_id)
     if not portfolio:
         # Auto-create portfolio for demo resilience
         from ..domain.models import Portfolio
-        portfolio = Portfolio(user_id=user_id, balance=1000.0)
+        portfolio = Portfolio(user_id=user_id, balance=100_000)
         db.update_portfolio(portfolio)
     
-    holdings_response = []
-    for h in portfolio.holdings:
-        # Update current price from stocks
-        stock = db.get_stock(h.ticker)
-        if stock:
-            h.current_price = stock.price
-        
-        holdings_response.append(HoldingResponse(
-            ticker=h.ticker,
-            company=h.company,
-            shares=h.shares,
-            avgPrice=h.avg_price,
-            currentPrice=h.current_price,
-            purchaseDate=h.purchase_date
-        ))
-    
-    return holdings_response
+    # Current prices are kept up to date by the store
+    return holding_serializer.response(portfolio.holdings.values())
 
 
 @router.get("/balance", response_model=BalanceResponse)
@@ -94,11 +66,84 @@ async def get_balance(user_id: str = Depends(get_current_user_id)):
     """
     Get user's available cash balance.
     """
-    portfolio = db.get_portfolio(user_id)
+    # A copy: trades on worker threads mutate the stored portfolio
+    portfolio = db.get_portfolio_snapshot(user_id)
     if not portfolio:
         # Auto-create portfolio for demo resilience
         from ..domain.models import Portfolio
-        portfolio = Portfolio(user_id=user_id, balance=1000.0)
+        portfolio = Portfolio(user_id=user_id, balance=100_000)
         db.update_portfolio(portfolio)
     
-    return BalanceResponse(balance=portfolio.balance)
+    return BalanceResponse(balance=from_centavos(portfolio.balance))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {to_json(data).decode()}\n\n"
+
+
+async def _portfolio_events(user_id: str) -> AsyncIterator[str]:
+    """
+    Yield a snapshot, then one delta per wake-up that actually changed
+    something, at most PORTFOLIO_STREAM_MAX_RATE per second.
+    """
+    watcher = PortfolioWatcher(user_id)
+    portfolio_notifier.watch(watcher)
+    rate = settings.PORTFOLIO_STREAM_MAX_RATE
+    min_interval = 1 / rate if rate > 0 else 0  # 0: no throttling
+    sent_totals: Tuple[int, int, int] = ()
+    sent_holdings: Dict[str, tuple] = {}
+    event = "snapshot"
+    try:
+        while True:
+            portfolio = db.get_portfolio_snapshot(user_id)
+            holdings = portfolio.holdings if portfolio else {}
+            portfolio_notifier.set_tickers(user_id, holdings)
+            
+            totals = (
+                (portfolio.market_value, portfolio.unrealized_pnl, portfolio.balance)
+                if portfolio else (0, 0, 0)
+            )
+            state = {
+                t: (h.shares, h.cost, h.current_price)
+                for t, h in holdings.items()
+            }
+            changed = [holdings[t] for t, v in state.items() if sent_holdings.get(t) != v]
+            removed = [t for t in sent_holdings if t not in state]
+            
+            if event == "snapshot" or totals != sent_totals or changed or removed:
+                payload = {
+                    "totalValue": from_centavos(totals[0]),
+                    "totalGainLoss": from_centavos(totals[1]),
+                    "balance": from_centavos(totals[2]),
+                    "holdings": holding_serializer.rows(changed),
+                }
+                if removed:
+                    payload["removed"] = removed
+                yield _sse(event, payload)
+                event = "delta"
+                sent_totals, sent_holdings = totals, state
+                # Throttle: changes during the pause coalesce into one delta
+                if min_interval:
+                    await asyncio.sleep(min_interval)
+            
+            # Wait for the next change, with a comment line as keepalive
+            while not await watcher.wait(settings.PORTFOLIO_STREAM_KEEPALIVE_SECONDS):
+                yield ": keepalive\n\n"
+    finally:
+        portfolio_notifier.unwatch(watcher)
+
+
+@router.get("/stream")
+async def stream_portfolio(user_id: str = Depends(get_current_user_id)):
+    """
+    Stream portfolio valuation as Server-Sent Events.
+    
+    The first `snapshot` event carries the totals and every holding; each
+    `delta` event carries the totals and only the holdings that changed
+    (plus `removed` tickers) after a trade or price update.
+    """
+    return StreamingResponse(
+        _portfolio_events(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
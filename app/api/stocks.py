@@ -1,35 +1,41 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
-import random
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
+import time
 
 from ..schemas.stock import StockResponse, StockHistoryResponse, StockHistoryPoint
+from ..schemas.serializers import stock_serializer
+from ..core.response_cache import cached_response, response_cache
 from ..infrastructure.database import db
+from ..infrastructure.history import downsample, price_history
+from ..domain.units import from_centavos
+
+MONTH_NAMES = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
 
 router = APIRouter(prefix="/stocks", tags=["Stocks"])
 
 
 @router.get("", response_model=List[StockResponse])
-async def get_all_stocks():
+async def get_all_stocks(request: Request):
     """
     Get all available stocks.
+    
+    Served from a per-version cache with ETag / If-None-Match support.
     """
-    stocks = db.get_all_stocks()
-    return [
-        StockResponse(
-            ticker=s.ticker,
-            company=s.company,
-            price=s.price,
-            change=s.change
-        )
-        for s in stocks
-    ]
+    cached = response_cache.get(
+        "stocks",
+        db.stocks_version,
+        lambda: stock_serializer.dump_json_many(db.get_all_stocks()),
+    )
+    return cached_response(request, cached)
 
 
 @router.get("/{ticker}", response_model=StockResponse)
-async def get_stock(ticker: str):
+async def get_stock(ticker: str, request: Request):
     """
     Get a specific stock by ticker.
     """
+    version = db.stocks_version
     stock = db.get_stock(ticker.upper())
     if not stock:
         raise HTTPException(
@@ -37,18 +43,41 @@ async def get_stock(ticker: str):
             detail=f"Stock {ticker} no encontrado"
         )
     
-    return StockResponse(
-        ticker=stock.ticker,
-        company=stock.company,
-        price=stock.price,
-        change=stock.change
-    )
+    cached = response_cache.get(f"stocks/{stock.ticker}", version, lambda: stock_serializer.dump_json(stock))
+    return cached_response(request, cached)
+
+
+def _months_ago(months: int) -> datetime:
+    """First day of the month `months - 1` months before the current one."""
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - (months - 1)
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _bucket_label(ts: float, interval: str) -> str:
+    d = datetime.fromtimestamp(ts)
+    if interval == "monthly":
+        return MONTH_NAMES[d.month - 1]
+    if interval == "raw":
+        return d.strftime("%Y-%m-%d %H:%M")
+    return d.strftime("%Y-%m-%d")
 
 
 @router.get("/{ticker}/history", response_model=StockHistoryResponse)
-async def get_stock_history(ticker: str, months: int = 6):
+async def get_stock_history(
+    ticker: str,
+    months: int = Query(6, ge=1, le=120),
+    interval: Literal["raw", "daily", "weekly", "monthly"] = "monthly",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
     """
     Get price history for a stock.
+    
+    Covers the last `months` months unless `from`/`to` (inclusive) are
+    given, downsampled to `interval` buckets. Daily, weekly and monthly
+    buckets come from the stored day bars; raw bars only reach back
+    HISTORY_CAPACITY bars.
     """
     stock = db.get_stock(ticker.upper())
     if not stock:
@@ -57,26 +86,33 @@ async def get_stock_history(ticker: str, months: int = 6):
             detail=f"Stock {ticker} no encontrado"
         )
     
-    # Generate mock historical data
-    months_names = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
-    current_month = 11  # December
-    history = []
+    if date_from:
+        start = datetime.combine(date_from, datetime.min.time()).timestamp()
+    else:
+        start = _months_ago(months).timestamp()
+    end = None
+    if date_to:
+        end = datetime.combine(date_to + timedelta(days=1), datetime.min.time()).timestamp()
     
-    price = stock.price * 0.85  # Start at 85% of current price
-    for i in range(months):
-        month_idx = (current_month - months + i + 1) % 12
-        # Random walk
-        price = price * (1 + random.uniform(-0.05, 0.08))
-        history.append(StockHistoryPoint(
-            date=months_names[month_idx],
-            value=round(price, 2)
-        ))
+    if interval == "raw":
+        bars = price_history.bars(stock.ticker, start, end)
+    else:
+        bars = downsample(db.get_price_days(stock.ticker, start, end), interval)
+    if not bars and date_to is None:
+        # No recorded prices yet: the current price is the only known point
+        bars = [(time.time(), stock.price, stock.price, stock.price, stock.price, 0)]
     
-    # Add current price as last point
-    history.append(StockHistoryPoint(
-        date=months_names[current_month],
-        value=stock.price
-    ))
+    history = [
+        StockHistoryPoint(
+            date=_bucket_label(ts, interval),
+            value=from_centavos(close),
+            open=from_centavos(open_),
+            high=from_centavos(high),
+            low=from_centavos(low),
+            volume=volume
+        )
+        for ts, open_, high, low, close, volume in bars
+    ]
     
     return StockHistoryResponse(
         ticker=stock.ticker,
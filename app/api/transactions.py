@@ -1,43 +1,148 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Literal, Optional
+from datetime import date
 import uuid
 
-from ..schemas.transaction import TransactionCreate, TransactionResponse
+from ..schemas.transaction import TransactionBatch, TransactionCreate, TransactionResponse
+from ..schemas.serializers import transaction_serializer, transaction_export_serializer
+from ..core import metrics
+from ..core.config import settings
+from ..core.idempotency import idempotency_cache, REPLAYED_HEADER
 from ..core.security import get_current_user_id
+from ..infrastructure.broadcast import portfolio_notifier
 from ..infrastructure.database import db
-from ..domain.models import Transaction, Holding
+from ..infrastructure.ledger import encode_cursor, decode_cursor
+from ..domain.models import Transaction
+from ..domain.units import day_range, from_centavos, now_epoch
 
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
 @router.get("", response_model=List[TransactionResponse])
-async def get_transactions(user_id: str = Depends(get_current_user_id)):
+async def get_transactions(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    ticker: Optional[str] = None,
+    type: Optional[Literal["compra", "venta"]] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    user_id: str = Depends(get_current_user_id),
+):
     """
-    Get all transactions for the current user.
+    Get transactions for the current user, newest first.
+    
+    When `limit` is given and more results exist, the `X-Next-Cursor`
+    response header carries the cursor for the next page.
     """
-    transactions = db.get_transactions(user_id)
-    return [
-        TransactionResponse(
-            id=t.id,
-            type=t.type,
-            ticker=t.ticker,
-            company=t.company,
-            shares=t.shares,
-            price=t.price,
-            total=t.total,
-            date=t.date,
-            bank=t.bank
-        )
-        for t in transactions
-    ]
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+    
+    start, end = day_range(date_from, date_to)
+    transactions, next_position = db.get_transactions_page(
+        user_id,
+        limit=limit,
+        before=before,
+        ticker=ticker.upper() if ticker else None,
+        type=type,
+        date_from=start,
+        date_to=end,
+    )
+    headers = {}
+    if next_position is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_position)
+    
+    return transaction_serializer.response(transactions, headers)
+
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _export_chunks(batches: Iterator[List[Transaction]], format: str) -> Iterator[bytes]:
+    """Encode each batch as one chunk, so only one batch is held at a time."""
+    if format == "csv":
+        yield transaction_export_serializer.csv_header()
+        for batch in batches:
+            yield transaction_export_serializer.dump_csv(batch)
+    else:
+        for batch in batches:
+            yield transaction_export_serializer.dump_ndjson(batch)
+
+
+@router.get("/export")
+async def export_transactions(
+    format: Literal["csv", "ndjson"] = "csv",
+    ticker: Optional[str] = None,
+    type: Optional[Literal["compra", "venta"]] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    all_users: bool = Query(False, alias="allUsers"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Export transactions oldest first as CSV or NDJSON.
+    
+    The file is streamed in chunks as it is read, so exports of any size
+    run in constant memory. Admins may pass `allUsers=true` to export
+    every user's transactions.
+    """
+    if all_users:
+        user = db.get_user_by_id(user_id)
+        if user is None or user.role != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Acceso restringido a administradores"
+            )
+    
+    start, end = day_range(date_from, date_to)
+    batches = db.iter_transactions(
+        None if all_users else user_id,
+        ticker=ticker.upper() if ticker else None,
+        type=type,
+        date_from=start,
+        date_to=end,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+    )
+    return StreamingResponse(
+        _export_chunks(batches, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
 
 
 @router.post("/buy", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-async def buy_stock(data: TransactionCreate, user_id: str = Depends(get_current_user_id)):
+def buy_stock(
+    data: TransactionCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: str = Depends(get_current_user_id),
+):
     """
     Buy shares of a stock.
+    
+    A retry with the same `Idempotency-Key` header replays the first
+    result instead of trading again.
     """
+    transaction, replayed = idempotency_cache.run(
+        user_id, idempotency_key, "buy", data, lambda: _buy_stock(data, user_id)
+    )
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return TransactionResponse(**transaction_serializer.row(transaction))
+
+
+def _buy_stock(data: TransactionCreate, user_id: str) -> Transaction:
+    """Execute a buy at the current price."""
     # Get stock
     stock = db.get_stock(data.ticker.upper())
     if not stock:
@@ -46,93 +151,91 @@ async def buy_stock(data: TransactionCreate, user_id: str = Depends(get_current_
             detail=f"Stock {data.ticker} no encontrado"
         )
     
-    # Get portfolio
-    portfolio = db.get_portfolio(user_id)
-    if not portfolio:
-        # Auto-create portfolio for demo resilience
-        from ..domain.models import Portfolio
-        portfolio = Portfolio(user_id=user_id, balance=1000.0)
-        db.update_portfolio(portfolio)
-    
-    # Calculate total cost
-    total = stock.price * data.shares
-    
-    # Check balance
-    if total > portfolio.balance:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Saldo insuficiente. Disponible: C$ {portfolio.balance:.2f}, Requerido: C$ {total:.2f}"
+    # Read, check and write atomically with other trades on this account
+    with db.account_transaction(user_id):
+        # Get portfolio
+        portfolio = db.get_portfolio(user_id)
+        if not portfolio:
+            # Auto-create portfolio for demo resilience
+            from ..domain.models import Portfolio
+            portfolio = Portfolio(user_id=user_id, balance=100_000)
+            db.update_portfolio(portfolio)
+        
+        # Calculate total cost at one price read; ticks can land mid-request
+        price = stock.price
+        total = price * data.shares
+        
+        # Check balance not reserved by open buy orders. They are stored
+        # with the account, so this sees orders taken by any worker.
+        reserved_cash, _ = db.get_reservations(user_id)
+        available = portfolio.balance - reserved_cash
+        if total > available:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Saldo insuficiente. Disponible: C$ {from_centavos(available):.2f}, "
+                    f"Requerido: C$ {from_centavos(total):.2f}"
+                )
+            )
+        
+        # Update balance
+        portfolio.balance -= total
+        
+        # Update or create holding (averages into an existing position)
+        portfolio.buy(
+            ticker=stock.ticker,
+            company=stock.company,
+            shares=data.shares,
+            price=price,
+            purchase_date=now_epoch()
         )
-    
-    # Update balance
-    portfolio.balance -= total
-    
-    # Update or create holding
-    existing_holding = None
-    for h in portfolio.holdings:
-        if h.ticker == stock.ticker:
-            existing_holding = h
-            break
-    
-    if existing_holding:
-        # Calculate new average price
-        new_total_shares = existing_holding.shares + data.shares
-        new_avg_price = (
-            (existing_holding.shares * existing_holding.avg_price) + 
-            (data.shares * stock.price)
-        ) / new_total_shares
-        
-        existing_holding.shares = new_total_shares
-        existing_holding.avg_price = new_avg_price
-        existing_holding.current_price = stock.price
-    else:
-        # Create new holding
-        new_holding = Holding(
+        
+        # Create transaction
+        transaction = Transaction(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            type="compra",
             ticker=stock.ticker,
             company=stock.company,
             shares=data.shares,
-            avg_price=stock.price,
-            current_price=stock.price,
-            purchase_date=datetime.now().strftime("%Y-%m-%d")
+            price=price,
+            total=total,
+            date=now_epoch(),
+            bank=data.bank
         )
-        portfolio.holdings.append(new_holding)
-    
-    # Save portfolio
-    db.update_portfolio(portfolio)
-    
-    # Create transaction
-    transaction = Transaction(
-        id=str(uuid.uuid4()),
-        user_id=user_id,
-        type="compra",
-        ticker=stock.ticker,
-        company=stock.company,
-        shares=data.shares,
-        price=stock.price,
-        total=total,
-        date=datetime.now().strftime("%Y-%m-%d %H:%M"),
-        bank=data.bank
-    )
-    db.add_transaction(transaction)
-    
-    return TransactionResponse(
-        id=transaction.id,
-        type=transaction.type,
-        ticker=transaction.ticker,
-        company=transaction.company,
-        shares=transaction.shares,
-        price=transaction.price,
-        total=transaction.total,
-        date=transaction.date,
-        bank=transaction.bank
-    )
+        
+        # Save portfolio and transaction together
+        db.record_trades(portfolio, [transaction])
+        db.record_prices([(stock.ticker, price, data.shares)])
+    metrics.trades.inc("compra", "instant")
+    portfolio_notifier.notify(user_id)
+    
+    return transaction
 
 
 @router.post("/sell", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-async def sell_stock(data: TransactionCreate, user_id: str = Depends(get_current_user_id)):
+def sell_stock(
+    data: TransactionCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: str = Depends(get_current_user_id),
+):
     """
     Sell shares of a stock.
+    
+    A retry with the same `Idempotency-Key` header replays the first
+    result instead of trading again.
     """
+    transaction, replayed = idempotency_cache.run(
+        user_id, idempotency_key, "sell", data, lambda: _sell_stock(data, user_id)
+    )
+    if replayed:
+        response.headers[REPLAYED_HEADER] = "true"
+    return TransactionResponse(**transaction_serializer.row(transaction))
+
+
+def _sell_stock(data: TransactionCreate, user_id: str) -> Transaction:
+    """Execute a sale at the current price."""
     # Get stock
     stock = db.get_stock(data.ticker.upper())
     if not stock:
@@ -141,74 +244,192 @@ async def sell_stock(data: TransactionCreate, user_id: str = Depends(get_current
             detail=f"Stock {data.ticker} no encontrado"
         )
     
-    # Get portfolio
-    portfolio = db.get_portfolio(user_id)
-    if not portfolio:
-        # Auto-create portfolio for demo resilience
-        from ..domain.models import Portfolio
-        portfolio = Portfolio(user_id=user_id, balance=1000.0)
-        db.update_portfolio(portfolio)
-    
-    # Find holding
-    holding = None
-    holding_idx = -1
-    for i, h in enumerate(portfolio.holdings):
-        if h.ticker == stock.ticker:
-            holding = h
-            holding_idx = i
-            break
-    
-    if not holding:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"No posees acciones de {stock.ticker}"
-        )
-    
-    if data.shares > holding.shares:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Solo tienes {holding.shares} acciones disponibles"
+    # Read, check and write atomically with other trades on this account
+    with db.account_transaction(user_id):
+        # Get portfolio
+        portfolio = db.get_portfolio(user_id)
+        if not portfolio:
+            # Auto-create portfolio for demo resilience
+            from ..domain.models import Portfolio
+            portfolio = Portfolio(user_id=user_id, balance=100_000)
+            db.update_portfolio(portfolio)
+        
+        # Find holding
+        holding = portfolio.get_holding(stock.ticker)
+        
+        if not holding:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No posees acciones de {stock.ticker}"
+            )
+        
+        # Shares reserved by open sell orders, taken by any worker, cannot be sold
+        _, reserved_shares = db.get_reservations(user_id)
+        available = holding.shares - reserved_shares.get(stock.ticker, 0)
+        if data.shares > available:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Solo tienes {available} acciones disponibles"
+            )
+        
+        # Calculate sale value at one price read; ticks can land mid-request
+        price = stock.price
+        total = price * data.shares
+        
+        # Update balance
+        portfolio.balance += total
+        
+        # Update holding, removing it completely when all shares are sold
+        portfolio.sell(stock.ticker, data.shares)
+        
+        # Create transaction
+        transaction = Transaction(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            type="venta",
+            ticker=stock.ticker,
+            company=stock.company,
+            shares=data.shares,
+            price=price,
+            total=total,
+            date=now_epoch(),
+            bank=data.bank
         )
+        
+        # Save portfolio and transaction together
+        db.record_trades(portfolio, [transaction])
+        db.record_prices([(stock.ticker, price, data.shares)])
+    metrics.trades.inc("venta", "instant")
+    portfolio_notifier.notify(user_id)
     
-    # Calculate sale value
-    total = stock.price * data.shares
+    return transaction
+
+
+@router.post("/batch", response_model=List[TransactionResponse], status_code=status.HTTP_201_CREATED)
+def batch_transactions(
+    data: TransactionBatch,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Buy and sell several stocks in one request.
     
-    # Update balance
-    portfolio.balance += total
+    Legs run in order at current prices, so a sale can fund a later buy.
+    Every leg is validated before any is applied: if one fails, nothing
+    changes and the error names the failing leg.
     
-    # Update holding
-    if data.shares == holding.shares:
-        # Remove holding completely
-        portfolio.holdings.pop(holding_idx)
-    else:
-        holding.shares -= data.shares
-    
-    # Save portfolio
-    db.update_portfolio(portfolio)
-    
-    # Create transaction
-    transaction = Transaction(
-        id=str(uuid.uuid4()),
-        user_id=user_id,
-        type="venta",
-        ticker=stock.ticker,
-        company=stock.company,
-        shares=data.shares,
-        price=stock.price,
-        total=total,
-        date=datetime.now().strftime("%Y-%m-%d %H:%M"),
-        bank=data.bank
-    )
-    db.add_transaction(transaction)
-    
-    return TransactionResponse(
-        id=transaction.id,
-        type=transaction.type,
-        ticker=transaction.ticker,
-        company=transaction.company,
-        shares=transaction.shares,
-        price=transaction.price,
-        total=transaction.total,
-        date=transaction.date,
-        bank=transaction.bank
+    A retry with the same `Idempotency-Key` header replays the first
+    result instead of trading again.
+    """
+    transactions, replayed = idempotency_cache.run(
+        user_id, idempotency_key, "batch", data, lambda: _batch_transactions(data, user_id)
     )
+    headers = {REPLAYED_HEADER: "true"} if replayed else None
+    return transaction_serializer.response(transactions, headers, status_code=status.HTTP_201_CREATED)
+
+
+def _batch_transactions(data: TransactionBatch, user_id: str) -> List[Transaction]:
+    """Validate and apply every leg of a batch, or none."""
+    # Look each stock up once
+    stocks = {}
+    for leg in data.legs:
+        ticker = leg.ticker.upper()
+        if ticker not in stocks:
+            stock = db.get_stock(ticker)
+            if not stock:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Stock {leg.ticker} no encontrado"
+                )
+            stocks[ticker] = stock
+    
+    # Price every leg from one read per stock, for validation and execution alike
+    prices = {ticker: stock.price for ticker, stock in stocks.items()}
+    
+    # Read, check and write atomically with other trades on this account
+    with db.account_transaction(user_id):
+        # Get portfolio
+        portfolio = db.get_portfolio(user_id)
+        if not portfolio:
+            # Auto-create portfolio for demo resilience
+            from ..domain.models import Portfolio
+            portfolio = Portfolio(user_id=user_id, balance=100_000)
+            db.update_portfolio(portfolio)
+        
+        # Validate the whole batch against running cash and share counts,
+        # net of what open orders have reserved
+        reserved_cash, reserved_shares = db.get_reservations(user_id)
+        cash = portfolio.balance - reserved_cash
+        shares = {}
+        for ticker in stocks:
+            holding = portfolio.get_holding(ticker)
+            shares[ticker] = (holding.shares if holding else 0) - reserved_shares.get(ticker, 0)
+        for number, leg in enumerate(data.legs, start=1):
+            stock = stocks[leg.ticker.upper()]
+            total = prices[stock.ticker] * leg.shares
+            if leg.type == "compra":
+                if total > cash:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=(
+                            f"Operación {number}: Saldo insuficiente. "
+                            f"Disponible: C$ {from_centavos(cash):.2f}, "
+                            f"Requerido: C$ {from_centavos(total):.2f}"
+                        )
+                    )
+                cash -= total
+                shares[stock.ticker] += leg.shares
+            else:
+                available = shares[stock.ticker]
+                if available <= 0:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Operación {number}: No posees acciones de {stock.ticker}"
+                    )
+                if leg.shares > available:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Operación {number}: Solo tienes {available} acciones disponibles"
+                    )
+                cash += total
+                shares[stock.ticker] -= leg.shares
+        
+        # Apply every leg, then save the portfolio and transactions together
+        now = now_epoch()
+        transactions = []
+        for leg in data.legs:
+            stock = stocks[leg.ticker.upper()]
+            total = prices[stock.ticker] * leg.shares
+            if leg.type == "compra":
+                portfolio.balance -= total
+                portfolio.buy(
+                    ticker=stock.ticker,
+                    company=stock.company,
+                    shares=leg.shares,
+                    price=prices[stock.ticker],
+                    purchase_date=now
+                )
+            else:
+                portfolio.balance += total
+                portfolio.sell(stock.ticker, leg.shares)
+            transactions.append(Transaction(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                type=leg.type,
+                ticker=stock.ticker,
+                company=stock.company,
+                shares=leg.shares,
+                price=prices[stock.ticker],
+                total=total,
+                date=now,
+                bank=leg.bank
+            ))
+        db.record_trades(portfolio, transactions)
+        db.record_prices((t.ticker, t.price, t.shares) for t in transactions)
+    
+    for transaction in transactions:
+        metrics.trades.inc(transaction.type, "batch")
+    portfolio_notifier.notify(user_id)
+    
+    return transactions
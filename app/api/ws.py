@@ -0,0 +1,100 @@
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, WebSocket
+
+from ..core.config import settings
+from ..infrastructure.broadcast import QuoteSubscriber, build_quote, quote_broadcaster
+from ..infrastructure.database import db
+
+router = APIRouter(tags=["Streaming"])
+
+
+def _parse_tickers(raw: Optional[List[str]]) -> Optional[List[str]]:
+    """Normalize requested tickers; "*" means every ticker (None)."""
+    if raw is None:
+        return []
+    tickers = [t.strip().upper() for t in raw if t and t.strip()]
+    if "*" in tickers:
+        return None
+    return [t for t in tickers if db.get_stock(t)]
+
+
+def _snapshot(subscriber: QuoteSubscriber, tickers: Optional[List[str]]):
+    """Queue current quotes so a new subscription starts with data."""
+    stocks = db.get_all_stocks() if tickers is None else filter(None, map(db.get_stock, tickers))
+    for s in stocks:
+        subscriber.offer(s.ticker, build_quote(s.ticker, s.price, s.change))
+
+
+async def _send_loop(websocket: WebSocket, subscriber: QuoteSubscriber):
+    while True:
+        quotes = await subscriber.next_batch()
+        # A client that cannot take a message within the timeout is dropped;
+        # meanwhile its mailbox keeps coalescing to the latest quotes
+        await asyncio.wait_for(
+            websocket.send_text(json.dumps({"type": "quotes", "data": quotes})),
+            timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+        )
+
+
+async def _receive_loop(websocket: WebSocket, subscriber: QuoteSubscriber):
+    while True:
+        try:
+            message = json.loads(await websocket.receive_text())
+            action = message.get("action")
+            tickers = message.get("tickers")
+            if not isinstance(tickers, list):
+                raise ValueError
+        except (ValueError, AttributeError):
+            await websocket.send_text(json.dumps({"type": "error", "detail": "Mensaje inválido"}))
+            continue
+        
+        if action == "subscribe":
+            parsed = _parse_tickers(tickers)
+            quote_broadcaster.subscribe(subscriber, parsed)
+            _snapshot(subscriber, parsed)
+        elif action == "unsubscribe":
+            parsed = _parse_tickers(tickers)
+            if parsed is not None and quote_broadcaster.subscribed_to_all(subscriber):
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "detail": 'No se puede cancelar parte de una suscripción a "*"; cancela "*" y suscríbete a los tickers que quieras',
+                }))
+                continue
+            quote_broadcaster.unsubscribe(subscriber, parsed)
+        else:
+            await websocket.send_text(json.dumps({"type": "error", "detail": "Acción desconocida"}))
+
+
+@router.websocket("/ws/stocks")
+async def stream_stocks(websocket: WebSocket, tickers: Optional[str] = None):
+    """
+    Stream stock quotes.
+    
+    Subscribe with `?tickers=LAFISE,AGRI` (or `*` for all) and/or messages
+    like `{"action": "subscribe", "tickers": ["LAFISE"]}`. Updates arrive
+    as `{"type": "quotes", "data": [...]}` with the latest quote per ticker.
+    """
+    await websocket.accept()
+    subscriber = QuoteSubscriber()
+    if tickers:
+        initial = _parse_tickers(tickers.split(","))
+        quote_broadcaster.subscribe(subscriber, initial)
+        _snapshot(subscriber, initial)
+    
+    sender = asyncio.create_task(_send_loop(websocket, subscriber))
+    receiver = asyncio.create_task(_receive_loop(websocket, subscriber))
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and isinstance(task.exception(), asyncio.TimeoutError):
+                try:
+                    await websocket.close(code=1013)  # Try again later: client too slow
+                except RuntimeError:
+                    pass  # Connection already gone
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        quote_broadcaster.unsubscribe(subscriber)
@@ -3,7 +3,12 @@ from .config import settings
 from .security import (
     verify_password,
     get_password_hash,
+    password_needs_rehash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     verify_token,
+    revoke_token,
+    token_cache,
     get_current_user_id,
 )
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -14,6 +14,69 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64  # Jobs waiting beyond the busy workers
+    
+    # Storage
+    DATABASE_BACKEND: Literal["memory", "sqlite"] = "memory"
+    SQLITE_PATH: str = "bolsa.db"
+    # Snapshot + WAL for the memory backend (disabled when unset)
+    PERSISTENCE_DIR: Optional[str] = None
+    WAL_FLUSH_INTERVAL_MS: int = 10
+    SNAPSHOT_INTERVAL_SECONDS: int = 300
+    # Columnar copy of the transaction log for admin volume analytics (memory
+    # backend). Costs memory on every write; enable where /admin/stats/volume is used
+    COLUMNAR_LEDGER: bool = False
+    
+    # Initial data for an empty database
+    SEED_SOURCE: str = "demo"  # demo, synthetic, none, or a directory of CSV/NDJSON files
+    SEED_USERS: int = 1_000  # Synthetic dataset size
+    SEED_HOLDINGS: int = 5
+    SEED_TRANSACTIONS: int = 100_000
+    SEED_RANDOM_SEED: int = 1
+    SEED_PASSWORD_HASH: Optional[str] = None  # bcrypt hash shared by synthetic users; usuario123 when unset
+    SEED_BATCH_SIZE: int = 10_000  # Rows per bulk insert
+    
+    # Trade execution
+    ACCOUNT_LOCK_SHARDS: int = 64  # Striped per-account locks
+    IDEMPOTENCY_CACHE_SIZE: int = 100_000  # Stored outcomes; 0 disables Idempotency-Key
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # How long a retry waits for the first attempt
+    
+    # Price history
+    HISTORY_BAR_SECONDS: int = 300
+    HISTORY_CAPACITY: int = 50_000  # Bars kept per ticker (about 174 days)
+    HISTORY_DAY_CAPACITY: int = 3_700  # Day bars kept per ticker (about 10 years)
+    
+    # Market data
+    MARKET_DATA_SOURCE: Literal["off", "simulator", "replay"] = "off"
+    MARKET_TICK_INTERVAL_MS: int = 1000
+    MARKET_SIMULATOR_SEED: int = 42
+    MARKET_SIMULATOR_VOLATILITY: float = 0.002  # Std-dev of each step, as a fraction
+    MARKET_REPLAY_PATH: Optional[str] = None
+    MARKET_REPLAY_LOOP: bool = False
+    
+    # Streaming
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0  # Drop clients that stall a send this long
+    PORTFOLIO_STREAM_MAX_RATE: float = 2.0  # Pushes per second per connection; 0 disables throttling
+    PORTFOLIO_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    EXPORT_BATCH_SIZE: int = 5_000  # Transactions read and sent per chunk of an export
+    
+    # Response cache
+    RESPONSE_GZIP_MIN_SIZE: int = 500  # Bytes; smaller bodies are not compressed
+    
+    # Observability
+    METRICS_ENABLED: bool = True  # Request metrics and GET /metrics
+    PROFILE_SAMPLE_RATE: float = 0.0  # Share of requests profiled at random
+    PROFILE_SAMPLE_INTERVAL_MS: float = 1.0
+    SLOW_REQUEST_MS: int = 1000  # Capture stacks of slower requests; 0 disables
+    PROFILE_STORE_SIZE: int = 100  # Profiles kept for /admin/profiles
     
     # CORS
     CORS_ORIGINS: list[str] = []
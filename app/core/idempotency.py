@@ -0,0 +1,135 @@
+"""
+Idempotency keys for trade requests.
+A client that times out and retries sends the same `Idempotency-Key`
+header; the outcome of the first execution is stored per (user, key)
+and replayed to every retry until it expires, so a retry never trades
+twice. A retry that arrives while the first request is still running
+waits for it instead of executing again. Entries live in a bounded LRU
+with a TTL, like the token cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from .config import settings
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    done: threading.Event = field(default_factory=threading.Event)
+    stored: bool = False  # False until an outcome worth replaying is recorded
+    result: Any = None
+    error: Optional[HTTPException] = None
+    expires_at: float = float("inf")
+
+
+class IdempotencyCache:
+    """Bounded LRU of (user, key) -> outcome, with in-flight deduplication."""
+    
+    def __init__(self, max_size: int, ttl_seconds: int, wait_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.wait_seconds = wait_seconds
+        self.executions = 0
+        self.replays = 0
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def run(
+        self,
+        user_id: str,
+        key: Optional[str],
+        operation: str,
+        payload: BaseModel,
+        execute: Callable[[], Any],
+    ) -> Tuple[Any, bool]:
+        """
+        Call `execute()` once per (user, key) and return (result, replayed).
+        Without a key the call always executes. HTTP errors are stored and
+        replayed like results; any other failure is forgotten, so the
+        next retry executes again.
+        """
+        if key is None or self.max_size <= 0:
+            return execute(), False
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Idempotency-Key inválida"
+            )
+        
+        cache_key = (user_id, key)
+        fingerprint = operation + ":" + payload.model_dump_json()
+        while True:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry is not None and entry.expires_at <= time.time():
+                    del self._entries[cache_key]
+                    entry = None
+                owner = entry is None
+                if owner:
+                    entry = self._entries[cache_key] = _Entry(fingerprint)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+                else:
+                    self._entries.move_to_end(cache_key)
+            
+            if entry.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="La Idempotency-Key ya se usó con otra solicitud"
+                )
+            if owner:
+                break
+            if not entry.done.wait(self.wait_seconds):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Una solicitud con esta Idempotency-Key sigue en proceso"
+                )
+            if entry.stored:
+                self.replays += 1
+                if entry.error is not None:
+                    raise entry.error
+                return entry.result, True
+            # The first attempt failed unexpectedly and was dropped: run again
+        
+        self.executions += 1
+        try:
+            entry.result = execute()
+        except HTTPException as e:
+            # Rejections such as insufficient balance are answers too
+            entry.error = e
+            self._store(entry)
+            raise
+        except BaseException:
+            with self._lock:
+                if self._entries.get(cache_key) is entry:
+                    del self._entries[cache_key]
+            entry.done.set()
+            raise
+        self._store(entry)
+        return entry.result, False
+    
+    def _store(self, entry: _Entry):
+        entry.expires_at = time.time() + self.ttl_seconds
+        entry.stored = True
+        entry.done.set()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+idempotency_cache = IdempotencyCache(
+    max_size=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    wait_seconds=settings.IDEMPOTENCY_WAIT_SECONDS,
+)
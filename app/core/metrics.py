@@ -0,0 +1,275 @@
+"""
+In-process metrics in the Prometheus text format.
+Counters and histograms keep one shard per thread, so the request path
+and the trade threadpool update plain dicts without taking a lock; a
+scrape sums the shards. Every worker process has its own registry, and
+Prometheus aggregates across workers. Callback metrics read values that
+other components already track (cache hits, subscribers) at scrape time.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from .config import settings
+
+Labels = Tuple[str, ...]
+
+# Seconds; covers cached reads (~100us) up to slow bcrypt and SQLite work
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str]) -> str:
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Base for metrics whose values live in per-thread dicts."""
+    
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()  # Only taken when a thread first writes
+    
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+    
+    def _snapshot(self) -> List[dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        # Copy each shard; a writer may add a key while we read
+        return [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    """Monotonic counter with optional labels."""
+    
+    kind = "counter"
+    
+    def inc(self, *labels: str, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+    
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+    
+    def render(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in sorted(self.values().items())
+        ]
+
+
+class Histogram(_Sharded):
+    """Cumulative-bucket histogram with optional labels."""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+    
+    def observe(self, value: float, *labels: str):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # One count per bucket plus +Inf, then sum
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+    
+    def time(self, *labels: str) -> "_Timer":
+        return _Timer(self, labels)
+    
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshot():
+            for labels, cell in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(cell)
+                else:
+                    for i, value in enumerate(cell):
+                        total[i] += value
+        return totals
+    
+    def render(self) -> List[str]:
+        lines = []
+        names = self.labelnames + ("le",)
+        for labels, cell in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), cell):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(cell[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class _Timer:
+    """Context manager observing elapsed seconds into a histogram."""
+    
+    __slots__ = ("histogram", "labels", "start")
+    
+    def __init__(self, histogram: Histogram, labels: Labels):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge:
+    """Point-in-time value, updated from the event loop thread only."""
+    
+    kind = "gauge"
+    
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+    
+    def render(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.value)}"]
+
+
+class CallbackMetric:
+    """Metric read from another component at scrape time."""
+    
+    def __init__(self, name: str, help: str, kind: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.read = read
+    
+    def render(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.read())}"]
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+    
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+    
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+    
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self.register(Gauge(name, help))
+    
+    def callback(self, name: str, help: str, kind: str, read: Callable[[], float]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, kind, read))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP, recorded by MetricsMiddleware
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status.", ("route", "method", "status"),
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response is complete.", ("route", "method"),
+)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size.", ("route", "method"), buckets=SIZE_BUCKETS,
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+# Domain
+trades = registry.counter("trades_total", "Executed trades by side and source.", ("type", "source"))
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds",
+    "bcrypt hash and verify time, including the wait for a password pool worker.",
+    ("operation",),
+)
+token_verify_duration = registry.histogram(
+    "token_verify_duration_seconds", "JWT verification time by verified-token cache outcome.", ("cache",),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and body size per route.
+    Routes are labelled with their path template (`/stocks/{ticker}`),
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+        
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        http_in_flight.value += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.value -= 1
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - start, path, method)
+            http_requests.inc(path, method, str(status_code))
+            http_response_size.observe(size, path, method)
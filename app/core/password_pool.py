@@ -0,0 +1,62 @@
+"""
+Bounded worker pool for bcrypt work.
+bcrypt is CPU bound for hundreds of milliseconds per call; running it on
+the event loop stalls every other request on the worker. Jobs run on a
+thread or process pool and are rejected with 503 once the pool is full.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+
+class PasswordPool:
+    """Run blocking password functions off the event loop with a bounded backlog."""
+    
+    def __init__(self, workers: int, queue_size: int, kind: str = "thread"):
+        self.workers = workers
+        self.limit = workers + queue_size
+        self.kind = kind
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+    
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password"
+                )
+        return self._executor
+    
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio ocupado, intente de nuevo",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+)
@@ -0,0 +1,278 @@
+"""
+On-demand request profiling and slow-request capture.
+Profiles come from a sampling profiler: while a profiled request runs, a
+background thread records the stacks of every thread executing app code
+every PROFILE_SAMPLE_INTERVAL_MS. That covers async handlers on the
+event loop and sync handlers on the threadpool alike, at no cost to
+requests that are not profiled. Concurrent requests share threads, so
+their frames can appear in each other's profiles.
+
+A request is profiled when an admin sends `X-Profile: 1`, or at random
+with probability PROFILE_SAMPLE_RATE. Independently, a watchdog samples
+the stacks of any request whose first body chunk takes longer than
+SLOW_REQUEST_MS, so slow requests are captured with a stack summary even
+when nobody asked. Only the wait for the first chunk counts: streams and
+exports stay open by design and are slow only if they start late.
+Profiles are kept in a bounded ring and exported as collapsed stacks
+(`frame;frame;frame count`), which flamegraph.pl and speedscope read.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+MAX_STACK_DEPTH = 64
+MAX_SLOW_SNAPSHOTS = 100
+TOP_FRAMES = 5
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{code.co_name}"
+
+
+def collect_stacks(skip: Tuple[int, ...] = ()) -> List[str]:
+    """
+    Collapsed stacks (root first) of threads currently in app code.
+    Threads parked outside the app, such as idle pool workers, are left
+    out, and so is the profiler's own bookkeeping.
+    """
+    stacks = []
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id in skip:
+            continue
+        labels = []
+        innermost_app_file = None
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            filename = frame.f_code.co_filename
+            if innermost_app_file is None and filename.startswith(_APP_DIR):
+                innermost_app_file = filename
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        if innermost_app_file is not None and innermost_app_file != __file__:
+            stacks.append(";".join(reversed(labels)))
+    return stacks
+
+
+@dataclass
+class Profile:
+    """One captured request: who, what, how long, and its sampled stacks."""
+    id: str
+    reason: str  # header, sample or slow
+    method: str
+    path: str
+    date: int  # Epoch seconds
+    route: str = "unmatched"
+    user_id: Optional[str] = None
+    status: int = 0
+    duration_ms: float = 0.0
+    stacks: Counter = field(default_factory=Counter)
+    
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+    
+    @property
+    def top_frames(self) -> List[str]:
+        """Innermost frames that appear in the most samples."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [frame for frame, _ in leaves.most_common(TOP_FRAMES)]
+    
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Bounded ring of the most recent profiles."""
+    
+    def __init__(self, capacity: int):
+        self._profiles: Deque[Profile] = deque(maxlen=max(1, capacity))
+        self._lock = threading.Lock()
+    
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles.append(profile)
+    
+    def list(self) -> List[Profile]:
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+    
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+    
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(settings.PROFILE_STORE_SIZE)
+
+
+class _Sampler(threading.Thread):
+    """Samples app stacks until stopped."""
+    
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        skip = (threading.get_ident(),)
+        while not self._stop_event.wait(self.interval):
+            self.stacks.update(collect_stacks(skip))
+    
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+class _SlowWatchdog(threading.Thread):
+    """Samples stacks of requests that have run past the slow threshold."""
+    
+    def __init__(self, threshold: float):
+        super().__init__(name="slow-request-watchdog", daemon=True)
+        self.threshold = threshold
+        self.interval = min(threshold / 4, 0.1)
+        # Request key -> (start, stacks sampled so far)
+        self.active: Dict[int, Tuple[float, Counter]] = {}
+    
+    def run(self):
+        skip = (threading.get_ident(),)
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            overdue = [
+                stacks for start, stacks in list(self.active.values())
+                if now - start >= self.threshold and sum(stacks.values()) < MAX_SLOW_SNAPSHOTS
+            ]
+            if overdue:
+                snapshot = collect_stacks(skip)
+                for stacks in overdue:
+                    stacks.update(snapshot)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests and captures slow ones.
+    `identify(authorization)` returns (user id, is admin) for a request's
+    Authorization header, or None; it runs only for requests that asked
+    to be profiled and for requests that are being captured.
+    """
+    
+    def __init__(self, app, identify: Callable[[str], Optional[Tuple[str, bool]]]):
+        self.app = app
+        self.identify = identify
+        self._keys = itertools.count()
+        self._watchdog: Optional[_SlowWatchdog] = None
+    
+    def _authorization(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                return value.decode("latin-1")
+        return ""
+    
+    def _requested(self, scope) -> bool:
+        """X-Profile header from an admin."""
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER and value.strip() in (b"1", b"true"):
+                identity = self.identify(self._authorization(scope))
+                return identity is not None and identity[1]
+        return False
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        reason = None
+        if self._requested(scope):
+            reason = "header"
+        elif settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            reason = "sample"
+        slow_threshold = settings.SLOW_REQUEST_MS / 1000
+        if reason is None and slow_threshold <= 0:
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = uuid.uuid4().hex if reason else None
+        sampler = None
+        if reason is not None:
+            sampler = _Sampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            sampler.start()
+        key = None
+        if slow_threshold > 0:
+            key = next(self._keys)
+            self._watchdog_for(slow_threshold).active[key] = (time.perf_counter(), Counter())
+        status_code = 500
+        first_body: Optional[float] = None
+        slow_stacks: Optional[Counter] = None
+        
+        async def send_wrapper(message):
+            nonlocal status_code, first_body, slow_stacks
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile_id is not None:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (PROFILE_ID_HEADER, profile_id.encode())
+                    ]
+            elif first_body is None:
+                # The response has started; stop the slow clock
+                first_body = time.perf_counter()
+                if key is not None:
+                    slow_stacks = self._watchdog.active.pop(key)[1]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            duration = end - start
+            stacks = sampler.stop() if sampler is not None else None
+            if key is not None:
+                if slow_stacks is None:
+                    slow_stacks = self._watchdog.active.pop(key)[1]
+                waited = (first_body or end) - start
+                if stacks is None and waited >= slow_threshold:
+                    reason, stacks = "slow", slow_stacks
+            if stacks is not None:
+                route = scope.get("route")
+                identity = self.identify(self._authorization(scope))
+                profile_store.add(Profile(
+                    id=profile_id or uuid.uuid4().hex,
+                    reason=reason,
+                    method=scope["method"],
+                    path=scope["path"],
+                    date=int(time.time()) - int(duration),
+                    route=getattr(route, "path", None) or "unmatched",
+                    user_id=identity[0] if identity else None,
+                    status=status_code,
+                    duration_ms=duration * 1000,
+                    stacks=stacks,
+                ))
+    
+    def _watchdog_for(self, threshold: float) -> _SlowWatchdog:
+        # Started on first use; the threshold is read once
+        if self._watchdog is None:
+            self._watchdog = _SlowWatchdog(threshold)
+            self._watchdog.start()
+        return self._watchdog
@@ -0,0 +1,101 @@
+"""
+Pre-serialized JSON responses, cached per data version.
+Read-heavy endpoints whose data changes far less often than it is read
+serialize once per version and then serve the same bytes. Each body
+carries a content-hash ETag, so clients revalidating with If-None-Match
+get a 304 when nothing they can see changed, and large bodies keep a
+gzip-compressed copy built once alongside the plain one.
+"""
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+from .config import settings
+
+
+@dataclass
+class CachedBody:
+    """A serialized response body with its ETag and optional gzip variant."""
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes] = None
+
+
+class ResponseCache:
+    """Latest serialized body per key, rebuilt when the data version moves."""
+    
+    def __init__(self, gzip_min_size: int):
+        self.gzip_min_size = gzip_min_size
+        self._entries: Dict[str, Tuple[int, CachedBody]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str, version: int, build: Callable[[], bytes]) -> CachedBody:
+        """Return the body for `key` at `version`, calling `build()` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        
+        self.misses += 1
+        body = build()
+        cached = CachedBody(
+            body=body,
+            etag='"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"',
+            gzipped=gzip.compress(body, compresslevel=6) if len(body) >= self.gzip_min_size else None,
+        )
+        with self._lock:
+            current = self._entries.get(key)
+            # Never replace an entry built for a newer version
+            if current is None or current[0] <= version:
+                self._entries[key] = (version, cached)
+        return cached
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _accepts_gzip(header: str) -> bool:
+    for coding in header.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip().removeprefix("q=")
+            try:
+                return not params or float(q) > 0
+            except ValueError:
+                return True
+    return False
+
+
+def cached_response(request: Request, cached: CachedBody) -> Response:
+    """Build a 200 (gzip when accepted) or 304 response for a cached body."""
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.gzipped is not None:
+        headers["Vary"] = "Accept-Encoding"
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    if cached.gzipped is not None and _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=cached.gzipped, media_type="application/json", headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(gzip_min_size=settings.RESPONSE_GZIP_MIN_SIZE)
@@ -1,11 +1,17 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
+import hashlib
+import threading
+import time
 import bcrypt
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from .config import settings
+from .metrics import password_hash_duration, token_verify_duration
+from .password_pool import password_pool
 
 # Bearer token security
 security = HTTPBearer()
@@ -16,12 +22,34 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Hash a password."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check whether a hash was made with a different cost than BCRYPT_ROUNDS."""
+    # Hash layout: $2b$<cost>$<salt+digest>
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool."""
+    with password_hash_duration.time("verify"):
+        return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password worker pool."""
+    with password_hash_duration.time("hash"):
+        return await password_pool.run(get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -35,17 +63,117 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of already-verified JWT payloads.
+    Entries are keyed by a SHA-256 digest of the token and expire after
+    the configured TTL or at the token's `exp`, whichever comes first.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode('utf-8')).digest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, token: str, payload: dict):
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def revoke(self, token: str, exp: Optional[float] = None):
+        """Drop a token from the cache and reject it until it expires."""
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            # Forget revocations for tokens that have expired on their own
+            self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+            self._revoked[key] = exp if exp is not None else now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    
+    def is_revoked(self, token: str) -> bool:
+        if not self._revoked:
+            return False
+        expires_at = self._revoked.get(self._key(token))
+        return expires_at is not None and expires_at > time.time()
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_SIZE,
+    ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
 def verify_token(token: str) -> dict:
-    """Verify and decode a JWT token."""
+    """Verify and decode a JWT token, using the verified-token cache."""
+    start = time.perf_counter()
+    payload = token_cache.get(token)
+    if payload is not None:
+        token_verify_duration.observe(time.perf_counter() - start, "hit")
+        return payload
+    if token_cache.is_revoked(token):
+        raise _credentials_exception()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception()
+    token_cache.put(token, payload)
+    token_verify_duration.observe(time.perf_counter() - start, "miss")
+    return payload
+
+
+def revoke_token(token: str):
+    """Revoke a token so it is rejected even while its signature is valid."""
+    exp = None
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        pass
+    token_cache.revoke(token, exp)
 
 
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
@@ -1,2 +1,3 @@
 # Domain exports
-from .models import User, Stock, Holding, Transaction, Portfolio
+from .models import User, Stock, Holding, Transaction, Portfolio, Order, VolumeStats
+from .units import to_centavos, from_centavos, to_epoch, now_epoch, format_date, format_datetime, day_range
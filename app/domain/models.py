@@ -1,9 +1,14 @@
-from dataclasses import dataclass, field
-from typing import List, Literal
+import sys
+from dataclasses import dataclass, field, replace
+from typing import Dict, Literal, Optional, Set
 from datetime import datetime
 
+# Money is integer centavos and dates are epoch seconds; see units.py.
+# Models are slotted, and repeated strings are interned, because the
+# transaction log holds millions of rows.
 
-@dataclass
+
+@dataclass(slots=True)
 class User:
     """User domain model."""
     id: str
@@ -14,27 +19,40 @@ class User:
     role: Literal["admin", "user"] = "user"
 
 
-@dataclass
+@dataclass(slots=True)
 class Stock:
     """Stock domain model."""
     ticker: str
     company: str
-    price: float
+    price: int  # Centavos
     change: float  # Percentage change
+    
+    def __post_init__(self):
+        self.ticker = sys.intern(self.ticker)
+        self.company = sys.intern(self.company)
 
 
-@dataclass
+@dataclass(slots=True)
 class Holding:
     """Portfolio holding domain model."""
     ticker: str
     company: str
     shares: int
-    avg_price: float
-    current_price: float
-    purchase_date: str
+    cost: int  # Centavos paid for the shares still held
+    current_price: int  # Centavos
+    purchase_date: int  # Epoch seconds
+    
+    def __post_init__(self):
+        self.ticker = sys.intern(self.ticker)
+        self.company = sys.intern(self.company)
+    
+    @property
+    def avg_price(self) -> float:
+        """Average cost per share, in (fractional) centavos."""
+        return self.cost / self.shares if self.shares else 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     """Transaction domain model."""
     id: str
@@ -43,15 +61,164 @@ class Transaction:
     ticker: str
     company: str
     shares: int
-    price: float
-    total: float
-    date: str
+    price: int  # Centavos
+    total: int  # Centavos
+    date: int  # Epoch seconds
     bank: str
+    
+    def __post_init__(self):
+        intern = sys.intern
+        self.user_id = intern(self.user_id)
+        self.type = intern(self.type)
+        self.ticker = intern(self.ticker)
+        self.company = intern(self.company)
+        self.bank = intern(self.bank)
+
+
+@dataclass(slots=True)
+class Order:
+    """Limit order domain model."""
+    id: str
+    user_id: str
+    ticker: str
+    side: Literal["compra", "venta"]
+    price: int  # Limit, centavos
+    quantity: int
+    bank: str
+    date: int  # Epoch seconds
+    filled: int = 0
+    filled_amount: int = 0  # Centavos paid or received so far
+    status: Literal["abierta", "parcial", "ejecutada", "cancelada"] = "abierta"
+    sequence: int = 0  # Queue position; later orders rest behind earlier ones at a price
+    
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled
+    
+    @property
+    def active(self) -> bool:
+        return self.status in ("abierta", "parcial")
+    
+    @property
+    def avg_price(self) -> float:
+        """Average execution price, in (fractional) centavos."""
+        return self.filled_amount / self.filled if self.filled else 0.0
+
+
+@dataclass(slots=True)
+class VolumeStats:
+    """Aggregated trading volume for one group. Amounts are centavos."""
+    key: str
+    trades: int = 0
+    shares: int = 0
+    amount: int = 0
+    buy_shares: int = 0
+    sell_shares: int = 0
+    buy_amount: int = 0
+    sell_amount: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Portfolio:
-    """User portfolio domain model."""
+    """
+    User portfolio domain model.
+    
+    `cost_basis` and `market_value` are running totals over the holdings,
+    kept up to date by buy/sell/reprice so summaries never walk holdings.
+    All amounts are centavos, so the totals are exact.
+    """
     user_id: str
-    balance: float = 1000.0
-    holdings: List[Holding] = field(default_factory=list)
+    balance: int = 100_000  # C$ 1000.00
+    # Keyed by ticker; dict order keeps holdings in insertion order
+    holdings: Dict[str, Holding] = field(default_factory=dict)
+    cost_basis: int = field(init=False, default=0)
+    market_value: int = field(init=False, default=0)
+    # Tickers added or removed since the store last indexed this portfolio
+    _changed_tickers: Set[str] = field(init=False, default_factory=set, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.recompute()
+    
+    @property
+    def unrealized_pnl(self) -> int:
+        return self.market_value - self.cost_basis
+    
+    def recompute(self):
+        """Rebuild the running totals from the holdings."""
+        self.cost_basis = sum(h.cost for h in self.holdings.values())
+        self.market_value = sum(h.shares * h.current_price for h in self.holdings.values())
+    
+    def copy(self) -> "Portfolio":
+        """Independent copy of the balance and holdings, totals included."""
+        return Portfolio(
+            user_id=self.user_id,
+            balance=self.balance,
+            holdings={ticker: replace(h) for ticker, h in self.holdings.items()},
+        )
+    
+    def get_holding(self, ticker: str) -> Optional[Holding]:
+        return self.holdings.get(ticker)
+    
+    def add_holding(self, holding: Holding):
+        self.remove_holding(holding.ticker)
+        self.holdings[holding.ticker] = holding
+        self.cost_basis += holding.cost
+        self.market_value += holding.shares * holding.current_price
+        self._changed_tickers.add(holding.ticker)
+    
+    def remove_holding(self, ticker: str) -> Optional[Holding]:
+        holding = self.holdings.pop(ticker, None)
+        if holding is None:
+            return None
+        self.cost_basis -= holding.cost
+        self.market_value -= holding.shares * holding.current_price
+        self._changed_tickers.add(ticker)
+        return holding
+    
+    def buy(self, ticker: str, company: str, shares: int, price: int, purchase_date: int) -> Holding:
+        """Add shares bought at `price`, averaging into an existing position."""
+        holding = self.holdings.get(ticker)
+        if holding is None:
+            holding = Holding(
+                ticker=ticker,
+                company=company,
+                shares=shares,
+                cost=shares * price,
+                current_price=price,
+                purchase_date=purchase_date
+            )
+            self.add_holding(holding)
+            return holding
+        
+        new_total_shares = holding.shares + shares
+        self.cost_basis += shares * price
+        self.market_value += new_total_shares * price - holding.shares * holding.current_price
+        holding.cost += shares * price
+        holding.shares = new_total_shares
+        holding.current_price = price
+        return holding
+    
+    def sell(self, ticker: str, shares: int):
+        """Remove sold shares, dropping the position when it reaches zero."""
+        holding = self.holdings[ticker]
+        if shares >= holding.shares:
+            self.remove_holding(ticker)
+            return
+        # Average cost: the sold shares take their share of the cost
+        sold_cost = holding.cost * shares // holding.shares
+        self.cost_basis -= sold_cost
+        self.market_value -= shares * holding.current_price
+        holding.cost -= sold_cost
+        holding.shares -= shares
+    
+    def reprice(self, ticker: str, price: int):
+        """Apply a new market price to a holding."""
+        holding = self.holdings.get(ticker)
+        if holding is None:
+            return
+        self.market_value += holding.shares * (price - holding.current_price)
+        holding.current_price = price
+    
+    def take_changed_tickers(self) -> Set[str]:
+        changed, self._changed_tickers = self._changed_tickers, set()
+        return changed
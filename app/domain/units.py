@@ -0,0 +1,48 @@
+"""
+Fixed-point money and epoch timestamps.
+Amounts are stored as integer centavos and dates as integer epoch
+seconds (local time); routers convert to córdobas and date strings only
+when building a response.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+def to_centavos(amount: float) -> int:
+    """Córdobas -> integer centavos, rounded half to even."""
+    return round(amount * 100)
+
+
+def from_centavos(centavos: float) -> float:
+    """Centavos -> córdobas for API output."""
+    return round(centavos) / 100
+
+
+def to_epoch(value: str) -> int:
+    """Parse "YYYY-MM-DD" or "YYYY-MM-DD HH:MM" (local time) to epoch seconds."""
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def now_epoch() -> int:
+    return int(datetime.now().timestamp())
+
+
+@lru_cache(maxsize=65536)
+def format_date(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d")
+
+
+@lru_cache(maxsize=65536)
+def format_datetime(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M")
+
+
+def day_range(date_from: Optional[date], date_to: Optional[date]) -> Tuple[Optional[int], Optional[int]]:
+    """Inclusive calendar days -> half-open [start, end) epoch range."""
+    start = int(datetime.combine(date_from, datetime.min.time()).timestamp()) if date_from else None
+    end = (
+        int(datetime.combine(date_to + timedelta(days=1), datetime.min.time()).timestamp())
+        if date_to else None
+    )
+    return start, end
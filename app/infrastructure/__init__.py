@@ -1,2 +1,2 @@
 # Infrastructure exports
-from .database import db
+from .database import db, DuplicateUserError
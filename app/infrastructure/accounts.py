@@ -0,0 +1,46 @@
+"""
+Per-account serialization of portfolio mutations.
+Trades are read-modify-write sequences over a portfolio's balance and
+holdings, so two of them on the same account must not interleave once
+they run on worker threads. Accounts hash onto a fixed set of lock
+stripes: trades for the same user always share a stripe, while trades
+for different users almost always run in parallel. Several accounts
+are locked in stripe order, so multi-account callers cannot deadlock.
+"""
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from ..core.config import settings
+
+
+class AccountLocks:
+    """Striped re-entrant locks keyed by user id."""
+    
+    def __init__(self, shards: int):
+        self._locks = [threading.RLock() for _ in range(max(1, shards))]
+    
+    def _shard(self, user_id: str) -> int:
+        return hash(user_id) % len(self._locks)
+    
+    @contextmanager
+    def hold(self, *user_ids: str) -> Iterator[None]:
+        """Lock every given account for the duration of the block."""
+        locks = [self._locks[i] for i in sorted({self._shard(u) for u in user_ids})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+    
+    def partition(self, user_ids: Iterable[str]) -> List[Tuple[threading.RLock, List[str]]]:
+        """Group accounts by stripe, so bulk updates take each lock once."""
+        groups: Dict[int, List[str]] = {}
+        for user_id in user_ids:
+            groups.setdefault(self._shard(user_id), []).append(user_id)
+        return [(self._locks[shard], users) for shard, users in sorted(groups.items())]
+
+
+account_locks = AccountLocks(settings.ACCOUNT_LOCK_SHARDS)
@@ -0,0 +1,192 @@
+"""
+Fan-out for streaming clients.
+The market-data engine publishes each applied batch once; the quote
+broadcaster hands every update to the subscribers of that ticker. Each
+subscriber holds only the latest quote per ticker, so a slow consumer
+skips intermediate prices instead of building a backlog. The portfolio
+notifier wakes the streams of users whose holdings a batch or trade
+touched; the stream then reads the portfolio once, however many
+changes arrived.
+"""
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..domain.units import from_centavos
+
+
+def build_quote(ticker: str, price: int, change: float) -> dict:
+    """The quote sent to streaming clients, for snapshots and updates alike."""
+    return {"ticker": ticker, "price": from_centavos(price), "change": change}
+
+
+class QuoteSubscriber:
+    """Latest-value mailbox for one streaming connection."""
+    
+    def __init__(self):
+        self.pending: Dict[str, dict] = {}
+        self.coalesced = 0  # Updates overwritten before they were sent
+        self._ready = asyncio.Event()
+    
+    def offer(self, ticker: str, quote: dict):
+        if ticker in self.pending:
+            self.coalesced += 1
+        self.pending[ticker] = quote
+        self._ready.set()
+    
+    def offer_many(self, quotes: Dict[str, dict]):
+        before = len(self.pending)
+        self.pending.update(quotes)
+        self.coalesced += before + len(quotes) - len(self.pending)
+        self._ready.set()
+    
+    async def next_batch(self) -> List[dict]:
+        """Wait for updates and take everything pending."""
+        await self._ready.wait()
+        self._ready.clear()
+        batch, self.pending = self.pending, {}
+        return list(batch.values())
+
+
+class QuoteBroadcaster:
+    """Routes price updates to the subscribers of each ticker."""
+    
+    def __init__(self):
+        self._by_ticker: Dict[str, Set[QuoteSubscriber]] = {}
+        self._all: Set[QuoteSubscriber] = set()  # Subscribed to every ticker
+        self._tickers: Dict[QuoteSubscriber, Optional[Set[str]]] = {}
+        self.published = 0
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._tickers)
+    
+    def subscribed_to_all(self, subscriber: QuoteSubscriber) -> bool:
+        return subscriber in self._all
+    
+    def subscribe(self, subscriber: QuoteSubscriber, tickers: Optional[Iterable[str]]):
+        """Add tickers to a subscription; None subscribes to every ticker."""
+        if tickers is None:
+            self.unsubscribe(subscriber)
+            self._all.add(subscriber)
+            self._tickers[subscriber] = None
+            return
+        current = self._tickers.setdefault(subscriber, set())
+        if current is None:
+            return  # Already receives everything
+        for ticker in tickers:
+            current.add(ticker)
+            self._by_ticker.setdefault(ticker, set()).add(subscriber)
+    
+    def unsubscribe(self, subscriber: QuoteSubscriber, tickers: Optional[Iterable[str]] = None):
+        """
+        Remove tickers from a subscription, or drop it entirely. A "*"
+        subscription has no tickers to remove; only dropping it works.
+        """
+        current = self._tickers.get(subscriber)
+        if tickers is None:
+            self._tickers.pop(subscriber, None)
+            self._all.discard(subscriber)
+            tickers = current or ()
+        for ticker in list(tickers):
+            subscribers = self._by_ticker.get(ticker)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._by_ticker[ticker]
+            if current:
+                current.discard(ticker)
+    
+    def publish(self, updates: List[Tuple[str, int, float]]):
+        """Fan a batch of (ticker, price, change) updates out to subscribers."""
+        # One quote object per update, shared by every subscriber
+        quotes = {ticker: build_quote(ticker, price, change) for ticker, price, change in updates}
+        for ticker, quote in quotes.items():
+            for subscriber in self._by_ticker.get(ticker, ()):
+                subscriber.offer(ticker, quote)
+        for subscriber in self._all:
+            subscriber.offer_many(quotes)
+        self.published += len(quotes)
+
+
+quote_broadcaster = QuoteBroadcaster()
+
+
+class PortfolioWatcher:
+    """Wake-up flag for one portfolio stream."""
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._changed = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+    
+    def notify(self):
+        # Trades may run on worker threads; the event belongs to the loop
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._changed.set()
+        else:
+            self._loop.call_soon_threadsafe(self._changed.set)
+    
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a change; False if `timeout` passed without one."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._changed.clear()
+        return True
+
+
+class PortfolioNotifier:
+    """Wakes the portfolio streams of users affected by a trade or price change."""
+    
+    def __init__(self):
+        self._watchers: Dict[str, Set[PortfolioWatcher]] = {}
+        self._held: Dict[str, Set[str]] = {}  # user -> tickers held
+        self._by_ticker: Dict[str, Set[str]] = {}  # ticker -> watched users
+    
+    def watch(self, watcher: PortfolioWatcher):
+        self._watchers.setdefault(watcher.user_id, set()).add(watcher)
+    
+    def unwatch(self, watcher: PortfolioWatcher):
+        watchers = self._watchers.get(watcher.user_id)
+        if watchers is None:
+            return
+        watchers.discard(watcher)
+        if not watchers:
+            del self._watchers[watcher.user_id]
+            self.set_tickers(watcher.user_id, ())
+    
+    def set_tickers(self, user_id: str, tickers: Iterable[str]):
+        """Record which tickers a watched user holds, so price updates find them."""
+        new = set(tickers) if user_id in self._watchers else set()
+        old = self._held.pop(user_id, set())
+        for ticker in old - new:
+            users = self._by_ticker.get(ticker)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._by_ticker[ticker]
+        for ticker in new - old:
+            self._by_ticker.setdefault(ticker, set()).add(user_id)
+        if new:
+            self._held[user_id] = new
+    
+    def notify(self, user_id: str):
+        """The user's portfolio changed, e.g. after a trade."""
+        for watcher in tuple(self._watchers.get(user_id, ())):
+            watcher.notify()
+    
+    def publish(self, updates: List[Tuple[str, int, float]]):
+        """Wake every watched user holding a ticker in the batch."""
+        affected: Set[str] = set()
+        for ticker, _, _ in updates:
+            affected.update(self._by_ticker.get(ticker, ()))
+        for user_id in affected:
+            self.notify(user_id)
+
+
+portfolio_notifier = PortfolioNotifier()
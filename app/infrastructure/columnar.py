@@ -0,0 +1,226 @@
+"""
+Columnar copy of the transaction log for analytics scans.
+Numeric fields live in typed arrays; ticker, user, bank and type are
+dictionary-encoded into small integer codes. Aggregates then scan a few
+contiguous columns instead of millions of objects. With NumPy installed
+the columns are viewed without copying and reduced with vectorized
+kernels; without it the same queries run as plain loops over the arrays.
+"""
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from ..domain.models import Transaction, VolumeStats
+
+try:
+    import numpy as np
+except ImportError:  # Optional accelerator
+    np = None
+
+
+GROUP_BY = ("ticker", "user", "bank", "type")
+TYPE_CODES = {"compra": 0, "venta": 1}
+
+
+class Dictionary:
+    """Bidirectional value <-> code mapping for an encoded column."""
+    
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+    
+    def encode_many(self, values: List[str]) -> List[int]:
+        """Codes for `values`, adding new ones; one dict lookup per known value."""
+        codes = self._codes
+        encode = self.encode
+        return [codes[v] if v in codes else encode(v) for v in values]
+    
+    def lookup(self, value: str) -> Optional[int]:
+        return self._codes.get(value)
+
+
+class ColumnarLedger:
+    """Append-only columnar transaction store with aggregate queries."""
+    
+    def __init__(self):
+        self.shares = array("q")
+        self.price = array("q")
+        self.total = array("q")
+        self.timestamp = array("q")
+        self.type = array("b")
+        self.ticker = array("i")
+        self.user = array("i")
+        self.bank = array("i")
+        self.tickers = Dictionary()
+        self.users = Dictionary()
+        self.banks = Dictionary()
+        # True while timestamps are non-decreasing, which lets date ranges
+        # be found by binary search instead of a full mask
+        self.sorted_by_time = True
+        # Appends cannot resize an array while a NumPy view exports its
+        # buffer, so queries and appends are serialized
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.shares)
+    
+    def append(self, t: Transaction):
+        with self._lock:
+            self.shares.append(t.shares)
+            self.price.append(t.price)
+            self.total.append(t.total)
+            if self.timestamp and t.date < self.timestamp[-1]:
+                self.sorted_by_time = False
+            self.timestamp.append(t.date)
+            self.type.append(TYPE_CODES[t.type])
+            self.ticker.append(self.tickers.encode(t.ticker))
+            self.user.append(self.users.encode(t.user_id))
+            self.bank.append(self.banks.encode(t.bank))
+    
+    def extend(self, transactions: List[Transaction]):
+        """Append many transactions column by column."""
+        if not transactions:
+            return
+        with self._lock:
+            dates = [t.date for t in transactions]
+            if self.sorted_by_time:
+                previous = self.timestamp[-1] if self.timestamp else dates[0]
+                for date in dates:
+                    if date < previous:
+                        self.sorted_by_time = False
+                        break
+                    previous = date
+            self.shares.extend([t.shares for t in transactions])
+            self.price.extend([t.price for t in transactions])
+            self.total.extend([t.total for t in transactions])
+            self.timestamp.extend(dates)
+            self.type.extend([TYPE_CODES[t.type] for t in transactions])
+            self.ticker.extend(self.tickers.encode_many([t.ticker for t in transactions]))
+            self.user.extend(self.users.encode_many([t.user_id for t in transactions]))
+            self.bank.extend(self.banks.encode_many([t.bank for t in transactions]))
+    
+    def _dictionary(self, group_by: str) -> List[str]:
+        if group_by == "type":
+            return list(TYPE_CODES)
+        return {"ticker": self.tickers, "user": self.users, "bank": self.banks}[group_by].values
+    
+    def volume(
+        self,
+        group_by: str = "ticker",
+        ticker: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> List[VolumeStats]:
+        """
+        Trades, shares and amounts per `group_by` value for transactions
+        with date_from <= date < date_to (epoch seconds), optionally for
+        one ticker. Groups without trades are omitted.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"unknown group_by: {group_by}")
+        with self._lock:
+            ticker_code = None
+            if ticker is not None:
+                ticker_code = self.tickers.lookup(ticker)
+                if ticker_code is None:
+                    return []
+            keys = list(self._dictionary(group_by))
+            scan = self._scan_numpy if np is not None else self._scan_python
+            sums = scan(group_by, len(keys), ticker_code, date_from, date_to)
+        
+        rows = []
+        for code, key in enumerate(keys):
+            trades = sums[0][code]
+            if trades:
+                rows.append(VolumeStats(key, *(int(column[code]) for column in sums)))
+        return rows
+    
+    def _time_slice(self, date_from: Optional[int], date_to: Optional[int]) -> slice:
+        """Rows inside [date_from, date_to) when timestamps are sorted."""
+        ts = self.timestamp
+        lo = bisect_left(ts, date_from) if date_from is not None else 0
+        hi = bisect_left(ts, date_to) if date_to is not None else len(ts)
+        return slice(lo, hi)
+    
+    def _scan_numpy(self, group_by, groups, ticker_code, date_from, date_to) -> list:
+        rows = slice(None)
+        mask = None
+        if date_from is not None or date_to is not None:
+            if self.sorted_by_time:
+                rows = self._time_slice(date_from, date_to)
+            else:
+                ts = np.frombuffer(self.timestamp, dtype=np.int64)
+                mask = np.ones(len(ts), dtype=bool)
+                if date_from is not None:
+                    mask &= ts >= date_from
+                if date_to is not None:
+                    mask &= ts < date_to
+        
+        def column(name, dtype):
+            values = np.frombuffer(getattr(self, name), dtype=dtype)[rows]
+            return values if mask is None else values[mask]
+        
+        codes = column(group_by, np.int8 if group_by == "type" else np.int32)
+        is_sell = column("type", np.int8)
+        shares = column("shares", np.int64)
+        total = column("total", np.int64)
+        if ticker_code is not None:
+            match = column("ticker", np.int32) == ticker_code
+            codes, is_sell, shares, total = codes[match], is_sell[match], shares[match], total[match]
+        
+        # One pass per measure: bucket = group * 2 + (1 if sell else 0)
+        buckets = codes.astype(np.intp) * 2 + is_sell
+        size = groups * 2
+        trades = np.bincount(buckets, minlength=size).reshape(groups, 2)
+        # float64 sums are exact below 2**53 centavos
+        by_shares = np.bincount(buckets, weights=shares, minlength=size).astype(np.int64).reshape(groups, 2)
+        by_total = np.bincount(buckets, weights=total, minlength=size).astype(np.int64).reshape(groups, 2)
+        return [
+            trades.sum(axis=1),
+            by_shares.sum(axis=1),
+            by_total.sum(axis=1),
+            by_shares[:, 0],
+            by_shares[:, 1],
+            by_total[:, 0],
+            by_total[:, 1],
+        ]
+    
+    def _scan_python(self, group_by, groups, ticker_code, date_from, date_to) -> list:
+        sums = [[0] * groups for _ in range(7)]
+        trades, shares_sum, amount, buy_shares, sell_shares, buy_amount, sell_amount = sums
+        rows = slice(None)
+        if self.sorted_by_time and (date_from is not None or date_to is not None):
+            rows = self._time_slice(date_from, date_to)
+            date_from = date_to = None
+        columns = zip(
+            getattr(self, group_by)[rows], self.ticker[rows], self.timestamp[rows],
+            self.type[rows], self.shares[rows], self.total[rows],
+        )
+        for code, ticker, ts, sell, shares, total in columns:
+            if ticker_code is not None and ticker != ticker_code:
+                continue
+            if date_from is not None and ts < date_from:
+                continue
+            if date_to is not None and ts >= date_to:
+                continue
+            trades[code] += 1
+            shares_sum[code] += shares
+            amount[code] += total
+            if sell:
+                sell_shares[code] += shares
+                sell_amount[code] += total
+            else:
+                buy_shares[code] += shares
+                buy_amount[code] += total
+        return sums
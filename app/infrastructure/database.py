@@ -1,98 +1,175 @@
 """
 In-memory database for demo purposes.
-In production, this would be replaced with SQLAlchemy + PostgreSQL/MySQL.
+Set DATABASE_BACKEND=sqlite for the durable backend in sqlite_database.py.
 """
-from typing import Dict, List, Optional
-from ..domain.models import User, Stock, Holding, Transaction, Portfolio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from ..core.config import settings
+from ..domain.models import User, Stock, Transaction, Portfolio, Order, VolumeStats
+from .accounts import account_locks
+from .columnar import ColumnarLedger, GROUP_BY
+from .history import price_history
+from .ledger import UserLedger
+from .persistence import Journal
+from .seeding import seed_initial_data
+from .repository import (
+    Repository,
+    DuplicateUserError,
+    normalize_identity,
+)
 
 
-# Pre-computed bcrypt hashes for demo passwords to avoid slow initialization
-# admin123 hash
-ADMIN_HASH = "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.J2LTMYq8GX6K9G"
-# usuario123 hash  
-USER_HASH = "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.J2LTMYq8GX6K9G"
-
-
-class InMemoryDatabase:
+class InMemoryDatabase(Repository):
     """Simple in-memory database for demo."""
     
-    def __init__(self):
+    def __init__(self, persistence_dir: Optional[str] = None, columnar: bool = False):
         self.users: Dict[str, User] = {}
+        # Secondary indexes: normalized username/email -> user id
+        self._users_by_username: Dict[str, str] = {}
+        self._users_by_email: Dict[str, str] = {}
+        # Keys each user is indexed under. Callers may edit a stored User in
+        # place before update_user, so its fields can't say what to unindex.
+        self._user_keys: Dict[str, Tuple[str, str]] = {}
         self.stocks: Dict[str, Stock] = {}
         self.portfolios: Dict[str, Portfolio] = {}
+        # Reverse index: ticker -> ids of users holding it
+        self._holders: Dict[str, Set[str]] = {}
+        # Global append-only log (oldest first) plus one ledger per user
         self.transactions: List[Transaction] = []
+        self.ledgers: Dict[str, UserLedger] = {}
+        # Same log in typed columns, for analytics scans
+        self.columns: Optional[ColumnarLedger] = ColumnarLedger() if columnar else None
+        # Limit orders by id, per user (oldest first) and each user's open ones.
+        # They are not journaled: a restart clears the books.
+        self.orders: Dict[str, Order] = {}
+        self._orders_by_user: Dict[str, Dict[str, Order]] = {}
+        self._open_orders: Dict[str, Dict[str, Order]] = {}
+        self.journal: Optional[Journal] = None
+        self._log_lock = threading.Lock()
         
-        # Initialize with demo data
-        self._init_demo_data()
-    
-    def _init_demo_data(self):
-        """Initialize demo data."""
-        # Demo users - using pre-computed hashes
-        self.users["1"] = User(
-            id="1",
-            name="Administrador Demo",
-            email="admin@bolsa.ni",
-            username="admin",
-            password_hash=ADMIN_HASH,
-            role="admin"
-        )
-        self.users["2"] = User(
-            id="2",
-            name="Usuario Demo",
-            email="usuario@bolsa.ni",
-            username="usuario",
-            password_hash=USER_HASH,
-            role="user"
-        )
-        
-        # Demo stocks - Nicaraguan companies
-        self.stocks = {
-            "LAFISE": Stock(ticker="LAFISE", company="LAFISE Nicaragua", price=148.2, change=5.1),
-            "BANCEN": Stock(ticker="BANCEN", company="Banco Central", price=96.8, change=-3.5),
-            "AGRI": Stock(ticker="AGRI", company="Agrícola Nicaragua", price=54.8, change=5.2),
-            "ENITEL": Stock(ticker="ENITEL", company="ENITEL Telecom", price=80.5, change=2.0),
-            "CEMEX": Stock(ticker="CEMEX", company="CEMEX Nicaragua", price=122.3, change=-2.8),
-        }
+        if persistence_dir is None:
+            seed_initial_data(self)
+            return
         
-        # Demo portfolios for each user
-        for user_id in self.users:
-            self.portfolios[user_id] = Portfolio(
-                user_id=user_id,
-                balance=1000.0,
-                holdings=[
-                    Holding(ticker="LAFISE", company="LAFISE Nicaragua", shares=50, 
-                           avg_price=140.5, current_price=148.2, purchase_date="2024-01-10"),
-                    Holding(ticker="BANCEN", company="Banco Central", shares=35,
-                           avg_price=100.2, current_price=96.8, purchase_date="2023-12-15"),
-                ]
-            )
-        
-        # Demo transactions
-        self.transactions = [
-            Transaction(id="1", user_id="1", type="compra", ticker="LAFISE", company="LAFISE Nicaragua",
-                       shares=500, price=140.5, total=70250, date="2024-01-10 09:30", bank="BAC Nicaragua"),
-            Transaction(id="2", user_id="1", type="compra", ticker="BANCEN", company="Banco Central",
-                       shares=350, price=100.2, total=35070, date="2023-12-15 14:20", bank="Banpro"),
-            Transaction(id="3", user_id="1", type="compra", ticker="AGRI", company="Agrícola Nicaragua",
-                       shares=800, price=52.0, total=41600, date="2024-01-05 10:15", bank="BAC Nicaragua"),
-        ]
+        # Restore from snapshot + WAL; seed only on first start
+        journal = Journal(
+            persistence_dir,
+            flush_interval_ms=settings.WAL_FLUSH_INTERVAL_MS,
+            snapshot_interval_seconds=settings.SNAPSHOT_INTERVAL_SECONDS,
+        )
+        loaded = journal.load(self)
+        if not loaded:
+            # Seeded rows go straight into a snapshot instead of the WAL
+            seed_initial_data(self)
+        self.journal = journal
+        if not loaded:
+            journal.snapshot(self)
+        journal.start(self)
     
     # User methods
     def get_user_by_id(self, user_id: str) -> Optional[User]:
         return self.users.get(user_id)
     
     def get_user_by_username(self, username: str) -> Optional[User]:
-        for user in self.users.values():
-            if user.username == username or user.email == username:
-                return user
-        return None
+        """Look up a user by username, falling back to email."""
+        key = normalize_identity(username)
+        user_id = self._users_by_username.get(key) or self._users_by_email.get(key)
+        return self.users.get(user_id) if user_id else None
+    
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        user_id = self._users_by_email.get(normalize_identity(email))
+        return self.users.get(user_id) if user_id else None
     
     def create_user(self, user: User) -> User:
-        self.users[user.id] = user
+        """Insert a user, enforcing unique username and email."""
+        self._index_user(user)
         # Create empty portfolio for new user
         self.portfolios[user.id] = Portfolio(user_id=user.id)
+        if self.journal:
+            self.journal.log_user(user)
         return user
     
+    def update_user(self, user: User) -> User:
+        """Replace a stored user, re-indexing username/email if they changed."""
+        current = self.users.get(user.id)
+        if current is None:
+            raise KeyError(user.id)
+        keys = self._unindex_user(user.id)
+        try:
+            self._index_user(user)
+        except DuplicateUserError:
+            self._store_user(current, keys)
+            raise
+        if self.journal:
+            self.journal.log_user(user)
+        return user
+    
+    def delete_user(self, user_id: str) -> Optional[User]:
+        user = self.users.get(user_id)
+        if user is None:
+            return None
+        self._unindex_user(user_id)
+        portfolio = self.portfolios.pop(user_id, None)
+        if portfolio:
+            for ticker in portfolio.holdings:
+                self._holders.get(ticker, set()).discard(user_id)
+        if self.journal:
+            self.journal.log_user_deleted(user_id)
+        return user
+    
+    def _index_holdings(self, portfolio: Portfolio):
+        """Keep the ticker -> holders index in step with a saved portfolio."""
+        user_id = portfolio.user_id
+        previous = self.portfolios.get(user_id)
+        if previous is portfolio:
+            # Same object: only tickers added or removed since the last save
+            for ticker in portfolio.take_changed_tickers():
+                holders = self._holders.setdefault(ticker, set())
+                if ticker in portfolio.holdings:
+                    holders.add(user_id)
+                else:
+                    holders.discard(user_id)
+            return
+        
+        # A new object replaces the stored one: reindex it fully and bring
+        # its holdings to current prices
+        if previous is not None:
+            for ticker in previous.holdings:
+                self._holders.get(ticker, set()).discard(user_id)
+        portfolio.take_changed_tickers()
+        for ticker in portfolio.holdings:
+            self._holders.setdefault(ticker, set()).add(user_id)
+            stock = self.stocks.get(ticker)
+            if stock is not None:
+                portfolio.reprice(ticker, stock.price)
+    
+    def _index_user(self, user: User):
+        username_key = normalize_identity(user.username)
+        email_key = normalize_identity(user.email)
+        # Login accepts either, so usernames and emails share one namespace
+        for field, key in (("username", username_key), ("email", email_key)):
+            for index in (self._users_by_username, self._users_by_email):
+                owner = index.get(key)
+                if owner is not None and owner != user.id:
+                    raise DuplicateUserError(field, getattr(user, field))
+        self._store_user(user, (username_key, email_key))
+    
+    def _store_user(self, user: User, keys: Tuple[str, str]):
+        username_key, email_key = keys
+        self.users[user.id] = user
+        self._user_keys[user.id] = keys
+        self._users_by_username[username_key] = user.id
+        self._users_by_email[email_key] = user.id
+    
+    def _unindex_user(self, user_id: str) -> Tuple[str, str]:
+        """Drop a user and the keys it was indexed under; returns those keys."""
+        username_key, email_key = keys = self._user_keys.pop(user_id)
+        self._users_by_username.pop(username_key, None)
+        self._users_by_email.pop(email_key, None)
+        self.users.pop(user_id, None)
+        return keys
+    
     # Stock methods
     def get_all_stocks(self) -> List[Stock]:
         return list(self.stocks.values())
@@ -100,20 +177,248 @@ class InMemoryDatabase:
     def get_stock(self, ticker: str) -> Optional[Stock]:
         return self.stocks.get(ticker)
     
+    def upsert_stocks(self, stocks: Iterable[Stock], record_history: bool = True):
+        stocks = list(stocks)
+        for stock in stocks:
+            self.stocks[stock.ticker] = stock
+            self._reprice_holders(stock.ticker, stock.price)
+            if record_history:
+                price_history.record(stock.ticker, stock.price)
+        self.stocks_version += 1
+        if self.journal:
+            self.journal.log_stocks(stocks)
+    
+    def update_stock_prices(self, updates: Iterable[Tuple[str, int, float]]):
+        changed = []
+        for ticker, price, change in updates:
+            stock = self.stocks.get(ticker)
+            if stock is None:
+                continue
+            stock.price = price
+            stock.change = change
+            self._reprice_holders(ticker, price)
+            price_history.record(ticker, price)
+            changed.append(stock)
+        if changed:
+            self.stocks_version += 1
+        if self.journal and changed:
+            self.journal.log_stocks(changed)
+    
+    def _reprice_holders(self, ticker: str, price: int):
+        """Push a price to every portfolio holding `ticker`."""
+        # Trades on worker threads mutate the same running totals
+        for lock, user_ids in account_locks.partition(tuple(self._holders.get(ticker, ()))):
+            with lock:
+                for user_id in user_ids:
+                    portfolio = self.portfolios.get(user_id)
+                    if portfolio is not None:
+                        portfolio.reprice(ticker, price)
+    
     # Portfolio methods
     def get_portfolio(self, user_id: str) -> Optional[Portfolio]:
         return self.portfolios.get(user_id)
     
+    def get_portfolio_snapshot(self, user_id: str) -> Optional[Portfolio]:
+        # Trades and repricing mutate the live object under its stripe
+        with account_locks.hold(user_id):
+            portfolio = self.portfolios.get(user_id)
+            return portfolio.copy() if portfolio else None
+    
+    @contextmanager
+    def account_transaction(self, *user_ids: str) -> Iterator[None]:
+        # One process owns the data, so the account stripes are enough
+        with account_locks.hold(*user_ids):
+            yield
+    
     def update_portfolio(self, portfolio: Portfolio):
+        self._index_holdings(portfolio)
         self.portfolios[portfolio.user_id] = portfolio
+        if self.journal:
+            self.journal.log_portfolio(portfolio)
+    
+    def update_portfolios(self, portfolios: Iterable[Portfolio]):
+        for portfolio in portfolios:
+            self._index_holdings(portfolio)
+            self.portfolios[portfolio.user_id] = portfolio
+            if self.journal:
+                self.journal.log_portfolio(portfolio)
+    
+    # Order methods
+    def save_orders(self, orders: Iterable[Order]):
+        # The engine mutates the stored objects; this keeps the indexes current
+        for order in orders:
+            self.orders[order.id] = order
+            self._orders_by_user.setdefault(order.user_id, {})[order.id] = order
+            open_orders = self._open_orders.setdefault(order.user_id, {})
+            if order.active:
+                open_orders[order.id] = order
+            else:
+                open_orders.pop(order.id, None)
+        self.orders_version += 1
+    
+    def get_order(self, order_id: str) -> Optional[Order]:
+        return self.orders.get(order_id)
+    
+    def get_user_orders(self, user_id: str, active: Optional[bool] = None) -> List[Order]:
+        orders = reversed(list(self._orders_by_user.get(user_id, {}).values()))
+        return [o for o in orders if active is None or o.active == active]
+    
+    def get_active_orders(self) -> List[Order]:
+        orders = [o for open_orders in self._open_orders.values() for o in open_orders.values() if o.active]
+        orders.sort(key=lambda o: o.sequence)
+        return orders
+    
+    def get_reservations(self, user_id: str) -> Tuple[int, Dict[str, int]]:
+        cash = 0
+        shares: Dict[str, int] = {}
+        for order in list(self._open_orders.get(user_id, {}).values()):
+            if not order.active:
+                continue
+            if order.side == "compra":
+                cash += order.price * order.remaining
+            else:
+                shares[order.ticker] = shares.get(order.ticker, 0) + order.remaining
+        return cash, shares
     
     # Transaction methods
     def get_transactions(self, user_id: str) -> List[Transaction]:
-        return [t for t in self.transactions if t.user_id == user_id]
+        """Get all transactions for a user, newest first."""
+        ledger = self.ledgers.get(user_id)
+        return ledger.newest_first() if ledger else []
+    
+    def get_transactions_page(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> Tuple[List[Transaction], Optional[int]]:
+        ledger = self.ledgers.get(user_id)
+        if ledger is None:
+            return [], None
+        return ledger.page(limit, before, ticker, type, date_from, date_to)
+    
+    def iter_transactions(
+        self,
+        user_id: Optional[str] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        batch_size: int = 1_000,
+    ) -> Iterator[List[Transaction]]:
+        if user_id is None:
+            entries = lambda start, stop: self.transactions[start:stop]
+            end = len(self.transactions)
+        else:
+            ledger = self.ledgers.get(user_id)
+            if ledger is None:
+                return
+            entries = ledger.slice
+            end = len(ledger)
+        # Both logs are append-only, so positions below `end` never move
+        for start in range(0, end, batch_size):
+            batch = [
+                t for t in entries(start, min(start + batch_size, end))
+                if (ticker is None or t.ticker == ticker)
+                and (type is None or t.type == type)
+                and (date_from is None or t.date >= date_from)
+                and (date_to is None or t.date < date_to)
+            ]
+            if batch:
+                yield batch
     
     def add_transaction(self, transaction: Transaction):
-        self.transactions.insert(0, transaction)
+        # The global log position doubles as the WAL sequence number
+        with self._log_lock:
+            seq = len(self.transactions)
+            self.transactions.append(transaction)
+            ledger = self.ledgers.get(transaction.user_id)
+            if ledger is None:
+                ledger = self.ledgers[transaction.user_id] = UserLedger()
+            ledger.append(transaction)
+            if self.columns is not None:
+                self.columns.append(transaction)
+            if self.journal:
+                self.journal.log_transaction(seq, transaction)
+    
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        """Append a batch under one lock; the per-row work is the same as add_transaction."""
+        transactions = list(transactions)
+        with self._log_lock:
+            seq = len(self.transactions)
+            self.transactions.extend(transactions)
+            by_user: Dict[str, List[Transaction]] = {}
+            for transaction in transactions:
+                rows = by_user.get(transaction.user_id)
+                if rows is None:
+                    rows = by_user[transaction.user_id] = []
+                rows.append(transaction)
+            for user_id, rows in by_user.items():
+                ledger = self.ledgers.get(user_id)
+                if ledger is None:
+                    ledger = self.ledgers[user_id] = UserLedger()
+                ledger.extend(rows)
+            if self.columns is not None:
+                self.columns.extend(transactions)
+            if self.journal:
+                for offset, transaction in enumerate(transactions):
+                    self.journal.log_transaction(seq + offset, transaction)
+    
+    # Analytics
+    def get_volume_stats(
+        self,
+        group_by: str = "ticker",
+        ticker: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> List[VolumeStats]:
+        if self.columns is not None:
+            return self.columns.volume(group_by, ticker, date_from, date_to)
+        
+        # No columnar copy: walk the transaction objects
+        if group_by not in GROUP_BY:
+            raise ValueError(f"unknown group_by: {group_by}")
+        attribute = {"ticker": "ticker", "user": "user_id", "bank": "bank", "type": "type"}[group_by]
+        groups: Dict[str, VolumeStats] = {}
+        for t in self.transactions:
+            if ticker is not None and t.ticker != ticker:
+                continue
+            if date_from is not None and t.date < date_from:
+                continue
+            if date_to is not None and t.date >= date_to:
+                continue
+            key = getattr(t, attribute)
+            row = groups.get(key)
+            if row is None:
+                row = groups[key] = VolumeStats(key)
+            row.trades += 1
+            row.shares += t.shares
+            row.amount += t.total
+            if t.type == "venta":
+                row.sell_shares += t.shares
+                row.sell_amount += t.total
+            else:
+                row.buy_shares += t.shares
+                row.buy_amount += t.total
+        return list(groups.values())
+    
+    def close(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+
+def create_database() -> Repository:
+    """Build the backend selected by Settings.DATABASE_BACKEND."""
+    if settings.DATABASE_BACKEND == "sqlite":
+        from .sqlite_database import SQLiteDatabase
+        return SQLiteDatabase(settings.SQLITE_PATH)
+    return InMemoryDatabase(settings.PERSISTENCE_DIR, columnar=settings.COLUMNAR_LEDGER)
 
 
 # Singleton database instance
-db = InMemoryDatabase()
+db = create_database()
@@ -0,0 +1,213 @@
+"""
+Per-ticker price history.
+Each ticker keeps OHLCV bars of HISTORY_BAR_SECONDS in typed array
+columns. Once HISTORY_CAPACITY bars exist the oldest bar is overwritten,
+so memory per ticker is bounded. Bars are appended in time order, which
+lets range queries binary-search the timestamp column. Prices are
+centavos.
+
+Alongside the fine bars every ticker keeps one bar per local day for
+HISTORY_DAY_CAPACITY days, which is what daily, weekly and monthly
+charts are built from. Backends persist those day bars (see
+`Repository.get_price_days`); the fine bars are per process.
+"""
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..core.config import settings
+
+
+# (timestamp, open, high, low, close, volume)
+Bar = Tuple[float, int, int, int, int, int]
+
+
+class PriceSeries:
+    """Ring buffer of OHLCV bars for a single ticker."""
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array("d")
+        self.open = array("q")
+        self.high = array("q")
+        self.low = array("q")
+        self.close = array("q")
+        self.volume = array("q")
+        self._start = 0  # Physical index of the oldest bar
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def _physical(self, i: int) -> int:
+        return (self._start + i) % len(self.timestamps)
+    
+    def record(self, bar_start: float, price: int, volume: int = 0):
+        n = len(self.timestamps)
+        if n:
+            last = self._physical(n - 1)
+            # Same bar, or a late update: fold it into the newest bar
+            if bar_start <= self.timestamps[last]:
+                self.high[last] = max(self.high[last], price)
+                self.low[last] = min(self.low[last], price)
+                self.close[last] = price
+                self.volume[last] += volume
+                return
+        
+        if n < self.capacity:
+            self.timestamps.append(bar_start)
+            self.open.append(price)
+            self.high.append(price)
+            self.low.append(price)
+            self.close.append(price)
+            self.volume.append(volume)
+            return
+        
+        # Full: overwrite the oldest bar
+        i = self._start
+        self.timestamps[i] = bar_start
+        self.open[i] = self.high[i] = self.low[i] = self.close[i] = price
+        self.volume[i] = volume
+        self._start = (self._start + 1) % n
+    
+    def append(self, bar: Bar):
+        """Add a complete bar to a series that is not yet full."""
+        ts, o, h, l, c, v = bar
+        self.timestamps.append(ts)
+        self.open.append(o)
+        self.high.append(h)
+        self.low.append(l)
+        self.close.append(c)
+        self.volume.append(v)
+    
+    def bisect(self, ts: float) -> int:
+        """Logical index of the first bar starting at or after `ts`."""
+        lo, hi = 0, len(self.timestamps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamps[self._physical(mid)] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def bars(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Bar]:
+        """Yield bars with start <= timestamp < end, oldest first."""
+        lo = self.bisect(start) if start is not None else 0
+        hi = self.bisect(end) if end is not None else len(self.timestamps)
+        for i in range(lo, hi):
+            p = self._physical(i)
+            yield (
+                self.timestamps[p], self.open[p], self.high[p],
+                self.low[p], self.close[p], self.volume[p],
+            )
+
+
+def day_start(ts: float) -> float:
+    """Epoch seconds of local midnight on the day containing `ts`."""
+    d = datetime.fromtimestamp(ts)
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+def _day_key(ts: float) -> Tuple[int, ...]:
+    d = datetime.fromtimestamp(ts)
+    return (d.year, d.month, d.day)
+
+
+def _week_key(ts: float) -> Tuple[int, ...]:
+    year, week, _ = datetime.fromtimestamp(ts).isocalendar()
+    return (year, week)
+
+
+def _month_key(ts: float) -> Tuple[int, ...]:
+    d = datetime.fromtimestamp(ts)
+    return (d.year, d.month)
+
+
+BUCKETS: Dict[str, Callable[[float], Tuple[int, ...]]] = {
+    "raw": lambda ts: (ts,),
+    "daily": _day_key,
+    "weekly": _week_key,
+    "monthly": _month_key,
+}
+
+
+def downsample(bars: Iterable[Bar], interval: str) -> List[Bar]:
+    """
+    Merge time-ordered bars into `interval` buckets (raw, daily, weekly
+    or monthly). Each bucket is stamped with the timestamp of its first bar.
+    """
+    bucket_key = BUCKETS[interval]
+    result: List[list] = []
+    current = None
+    for ts, o, h, l, c, v in bars:
+        key = bucket_key(ts)
+        if key != current:
+            current = key
+            result.append([ts, o, h, l, c, v])
+            continue
+        bucket = result[-1]
+        bucket[2] = max(bucket[2], h)
+        bucket[3] = min(bucket[3], l)
+        bucket[4] = c
+        bucket[5] += v
+    return [tuple(b) for b in result]
+
+
+class PriceHistory:
+    """Price history for every ticker."""
+    
+    def __init__(self, bar_seconds: int, capacity: int, day_capacity: int):
+        self.bar_seconds = bar_seconds
+        self.capacity = capacity
+        self.day_capacity = day_capacity
+        self._series: Dict[str, PriceSeries] = {}
+        self._days: Dict[str, PriceSeries] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, ticker: str, price: int, volume: int = 0, ts: Optional[float] = None):
+        """Record a price (and optionally traded volume) for a ticker."""
+        if ts is None:
+            ts = time.time()
+        bar_start = ts - ts % self.bar_seconds
+        with self._lock:
+            series = self._series.get(ticker)
+            if series is None:
+                series = self._series[ticker] = PriceSeries(self.capacity)
+            series.record(bar_start, price, volume)
+            days = self._days.get(ticker)
+            if days is None:
+                days = self._days[ticker] = PriceSeries(self.day_capacity)
+            days.record(day_start(ts), price, volume)
+    
+    def bars(self, ticker: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Bar]:
+        """Fine bars in [start, end); only the newest `capacity` are kept."""
+        with self._lock:
+            series = self._series.get(ticker)
+            return list(series.bars(start, end)) if series is not None else []
+    
+    def days(self, ticker: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Bar]:
+        """Day bars in [start, end), stamped with local midnight."""
+        with self._lock:
+            series = self._days.get(ticker)
+            return list(series.bars(start, end)) if series is not None else []
+    
+    def all_days(self) -> Dict[str, List[Bar]]:
+        """Every day bar by ticker, for snapshots."""
+        with self._lock:
+            return {ticker: list(series.bars()) for ticker, series in self._days.items()}
+    
+    def restore_days(self, ticker: str, bars: Iterable[Bar]):
+        """Load saved day bars for a ticker, oldest first, ahead of new ones."""
+        with self._lock:
+            days = self._days[ticker] = PriceSeries(self.day_capacity)
+            for bar in list(bars)[-self.day_capacity:]:
+                days.append(bar)
+
+
+price_history = PriceHistory(
+    bar_seconds=settings.HISTORY_BAR_SECONDS,
+    capacity=settings.HISTORY_CAPACITY,
+    day_capacity=settings.HISTORY_DAY_CAPACITY,
+)
@@ -0,0 +1,99 @@
+"""
+Per-user append-only transaction ledger.
+Entries are only ever appended, so a position in the log is a stable
+cursor: pages are read newest-first starting just before that position.
+"""
+import base64
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..domain.models import Transaction
+
+
+def encode_cursor(position: int) -> str:
+    """Encode a ledger position as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"v1:{position}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode an opaque cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, _, position = base64.urlsafe_b64decode(padded).decode().partition(":")
+        value = int(position)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    if version != "v1" or value < 0:
+        raise ValueError("invalid cursor")
+    return value
+
+
+class UserLedger:
+    """Append-only transaction log for a single user."""
+    
+    def __init__(self):
+        self._entries: List[Transaction] = []
+        # ticker -> positions in _entries, ascending
+        self._by_ticker: Dict[str, List[int]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def append(self, transaction: Transaction):
+        self._by_ticker.setdefault(transaction.ticker, []).append(len(self._entries))
+        self._entries.append(transaction)
+    
+    def extend(self, transactions: List[Transaction]):
+        by_ticker = self._by_ticker
+        for position, transaction in enumerate(transactions, len(self._entries)):
+            positions = by_ticker.get(transaction.ticker)
+            if positions is None:
+                positions = by_ticker[transaction.ticker] = []
+            positions.append(position)
+        self._entries.extend(transactions)
+    
+    def slice(self, start: int, stop: int) -> List[Transaction]:
+        """Entries in [start, stop), oldest first."""
+        return self._entries[start:stop]
+    
+    def newest_first(self) -> List[Transaction]:
+        return self._entries[::-1]
+    
+    def _positions(self, before: int, ticker: Optional[str]) -> Iterator[int]:
+        """Yield positions strictly below `before`, newest first."""
+        if ticker is None:
+            return iter(range(min(before, len(self._entries)) - 1, -1, -1))
+        positions = self._by_ticker.get(ticker, [])
+        end = bisect_left(positions, before)
+        return (positions[i] for i in range(end - 1, -1, -1))
+    
+    def page(
+        self,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> Tuple[List[Transaction], Optional[int]]:
+        """
+        Return up to `limit` matching transactions newest-first and the
+        position to pass as `before` for the next page (None when exhausted).
+        Dates are epoch seconds, `date_from` <= date < `date_to`.
+        """
+        if before is None:
+            before = len(self._entries)
+        
+        items: List[Transaction] = []
+        for pos in self._positions(before, ticker):
+            t = self._entries[pos]
+            if type is not None and t.type != type:
+                continue
+            if date_from is not None and t.date < date_from:
+                continue
+            if date_to is not None and t.date >= date_to:
+                continue
+            if limit is not None and len(items) == limit:
+                return items, pos + 1
+            items.append(t)
+        return items, None
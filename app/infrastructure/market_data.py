@@ -0,0 +1,258 @@
+"""
+Market-data engine.
+A background task polls a tick source once per interval, keeps only the
+latest price per ticker, and applies the whole batch with a single
+`db.update_stock_prices` call. Change% is measured against the session
+open, which rolls over at local midnight.
+
+When workers share a database, only the holder of the `market_data`
+lease runs the source; the others follow, picking up the prices it
+writes so their own streaming clients still get every update. Database
+work runs on a worker thread, since a SQLite write can wait for the lock.
+"""
+import asyncio
+import csv
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import date
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+from ..core.config import settings
+from ..domain.units import to_centavos
+
+logger = logging.getLogger(__name__)
+
+# (ticker, price in centavos)
+Tick = Tuple[str, int]
+
+
+class TickSource(Protocol):
+    def poll(self, elapsed: float) -> List[Tick]:
+        """Return the ticks due `elapsed` seconds after the engine started."""
+
+
+class SimulatedTickSource:
+    """Deterministic random walk over a fixed set of tickers."""
+    
+    def __init__(self, prices: Dict[str, int], seed: int, volatility: float):
+        self.prices = dict(prices)
+        self.volatility = volatility
+        self._random = random.Random(seed)
+    
+    def poll(self, elapsed: float) -> List[Tick]:
+        ticks = []
+        for ticker, price in self.prices.items():
+            price = max(1, round(price * (1 + self._random.gauss(0, self.volatility))))
+            self.prices[ticker] = price
+            ticks.append((ticker, price))
+        return ticks
+
+
+class ReplayTickSource:
+    """
+    Replays a CSV file of `seconds,ticker,price` rows (header optional),
+    where `seconds` is the offset from the start of the replay and
+    `price` is in córdobas.
+    """
+    
+    def __init__(self, path: str, loop: bool = False):
+        self.ticks: List[Tuple[float, str, int]] = []
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if not row or row[0].startswith("#"):
+                    continue
+                try:
+                    self.ticks.append((float(row[0]), row[1].strip().upper(), to_centavos(float(row[2]))))
+                except ValueError:
+                    continue  # Header line
+        self.ticks.sort(key=lambda t: t[0])
+        self.loop = loop
+        self._position = 0
+        self._offset = 0.0
+    
+    def poll(self, elapsed: float) -> List[Tick]:
+        due = []
+        while self.ticks:
+            if self._position == len(self.ticks):
+                if not self.loop:
+                    break
+                self._position = 0
+                self._offset += max(self.ticks[-1][0], 1.0)
+            seconds, ticker, price = self.ticks[self._position]
+            if seconds + self._offset > elapsed:
+                break
+            due.append((ticker, price))
+            self._position += 1
+        return due
+
+
+LEASE = "market_data"
+
+
+class MarketDataEngine:
+    """Applies ticks from a source to the stock table in per-interval batches."""
+    
+    def __init__(
+        self,
+        db,
+        source_factory: Callable[[], TickSource],
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.db = db
+        # Built on taking the lease, so a new leader starts from the
+        # prices the previous one left in the database
+        self.source_factory = source_factory
+        self.source: Optional[TickSource] = None
+        self.interval = interval
+        self.clock = clock
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # A leader renews every interval; a stalled one is replaced after this
+        self.lease_ttl = max(5.0, 3 * interval)
+        self.leader = False
+        self.session_date = date.today()
+        stocks = db.get_all_stocks()
+        # Derive the open from the seeded change% so it continues smoothly
+        self.session_open: Dict[str, float] = {
+            s.ticker: s.price / (1 + s.change / 100) if s.change > -100 else s.price
+            for s in stocks
+        }
+        # Last (price, change) seen per ticker, for following the leader
+        self._seen: Dict[str, Tuple[int, float]] = {s.ticker: (s.price, s.change) for s in stocks}
+        self._seen_version = db.stocks_version
+        self._started: Optional[float] = None
+        # Called with each applied batch, e.g. the quote broadcaster
+        self.listeners: List[Callable[[List[Tuple[str, int, float]]], None]] = []
+        
+        # Metrics
+        self.ticks_received = 0
+        self.ticks_applied = 0
+        self.batches = 0
+        self.tick_rate = 0.0  # Ticks/s received over the last interval
+        self.apply_latency_ms = 0.0
+        self.apply_latency_max_ms = 0.0
+        self.apply_seconds_total = 0.0
+    
+    def _roll_session(self):
+        today = date.today()
+        if today != self.session_date:
+            self.session_date = today
+            self.session_open = {s.ticker: s.price for s in self.db.get_all_stocks()}
+    
+    def tick(self) -> List[Tuple[str, int, float]]:
+        """Run one interval as leader, or follow. Returns the new prices."""
+        leader = self.db.acquire_lease(LEASE, self.owner, self.lease_ttl)
+        if leader and (not self.leader or self.source is None):
+            logger.info("Market data: %s is now the leader", self.owner)
+            self.source = self.source_factory()
+            self._started = None
+        self.leader = leader
+        return self.step() if leader else self.follow()
+    
+    def follow(self) -> List[Tuple[str, int, float]]:
+        """Prices another worker applied since the last call."""
+        version = self.db.stocks_version
+        if version == self._seen_version:
+            return []
+        self._seen_version = version
+        updates = []
+        for stock in self.db.get_all_stocks():
+            quote = (stock.price, stock.change)
+            if self._seen.get(stock.ticker) != quote:
+                self._seen[stock.ticker] = quote
+                updates.append((stock.ticker, stock.price, stock.change))
+        return updates
+    
+    def step(self) -> List[Tuple[str, int, float]]:
+        """Poll the source once and apply the batch. Returns the applied updates."""
+        if self.source is None:
+            self.source = self.source_factory()
+        now = self.clock()
+        if self._started is None:
+            self._started = now
+        ticks = self.source.poll(now - self._started)
+        self.ticks_received += len(ticks)
+        self.tick_rate = len(ticks) / self.interval
+        if not ticks:
+            return []
+        
+        self._roll_session()
+        # Coalesce to the latest price per ticker
+        latest: Dict[str, int] = {}
+        for ticker, price in ticks:
+            latest[ticker] = price
+        
+        updates = []
+        for ticker, price in latest.items():
+            open_price = self.session_open.setdefault(ticker, price)
+            change = round((price - open_price) / open_price * 100, 2) if open_price else 0.0
+            updates.append((ticker, price, change))
+        
+        start = time.perf_counter()
+        self.db.update_stock_prices(updates)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        self.batches += 1
+        self.ticks_applied += len(updates)
+        self.apply_latency_ms = elapsed_ms
+        self.apply_latency_max_ms = max(self.apply_latency_max_ms, elapsed_ms)
+        self.apply_seconds_total += elapsed_ms / 1000
+        for ticker, price, change in updates:
+            self._seen[ticker] = (price, change)
+        return updates
+    
+    async def run(self):
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    updates = await asyncio.to_thread(self.tick)
+                except Exception:
+                    # Keep the feed alive; the next interval retries with fresh ticks
+                    logger.exception("Failed to apply market data batch")
+                    continue
+                # Listeners wake asyncio streams, so they run on the loop
+                if updates:
+                    for listener in self.listeners:
+                        listener(updates)
+        finally:
+            if self.leader:
+                # Let another worker take over without waiting for expiry
+                self.leader = False
+                self.db.release_lease(LEASE, self.owner)
+    
+    def metrics(self) -> dict:
+        return {
+            "leader": self.leader,
+            "ticks_received": self.ticks_received,
+            "ticks_applied": self.ticks_applied,
+            "batches": self.batches,
+            "tick_rate": self.tick_rate,
+            "apply_latency_ms": self.apply_latency_ms,
+            "apply_latency_avg_ms": self.apply_seconds_total * 1000 / self.batches if self.batches else 0.0,
+            "apply_latency_max_ms": self.apply_latency_max_ms,
+        }
+
+
+def create_market_data_engine(db) -> Optional[MarketDataEngine]:
+    """Build the engine selected by Settings.MARKET_DATA_SOURCE."""
+    if settings.MARKET_DATA_SOURCE == "simulator":
+        def source_factory() -> TickSource:
+            return SimulatedTickSource(
+                {s.ticker: s.price for s in db.get_all_stocks()},
+                seed=settings.MARKET_SIMULATOR_SEED,
+                volatility=settings.MARKET_SIMULATOR_VOLATILITY,
+            )
+    elif settings.MARKET_DATA_SOURCE == "replay":
+        if not settings.MARKET_REPLAY_PATH:
+            raise ValueError("MARKET_REPLAY_PATH is required when MARKET_DATA_SOURCE=replay")
+        
+        def source_factory() -> TickSource:
+            return ReplayTickSource(settings.MARKET_REPLAY_PATH, loop=settings.MARKET_REPLAY_LOOP)
+    else:
+        return None
+    return MarketDataEngine(db, source_factory, interval=settings.MARKET_TICK_INTERVAL_MS / 1000)
@@ -0,0 +1,339 @@
+"""
+Limit order matching engine.
+Incoming orders match against the opposite side of their ticker's book
+with price-time priority and execute at the resting order's price; any
+remainder rests in the book. A resting buy reserves its limit value in
+cash and a resting sell reserves its shares, so instant trades and new
+orders only see what is not already promised. Each fill settles both
+portfolios and writes a compra and a venta transaction.
+
+Orders are stored in the repository, saved inside the account
+transaction that changes them, so reservations are read back from the
+open orders by any worker. The books here index the open orders in
+memory; when another worker has saved orders since (`orders_version`
+moved), they are rebuilt from the repository before the next match.
+The in-memory store does not journal orders, so there a restart clears
+the books.
+"""
+import threading
+import uuid
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..core import metrics
+from ..domain.models import Order, Portfolio, Stock, Transaction
+from ..domain.units import now_epoch
+from .broadcast import portfolio_notifier
+from .database import db
+from .order_book import OrderBook
+
+
+class OrderError(ValueError):
+    """Raised when an order cannot be placed, amended or cancelled."""
+    
+    def __init__(self, reason: str, available: int = 0, required: int = 0):
+        super().__init__(reason)
+        self.reason = reason  # not_found, inactive, balance, shares, quantity
+        self.available = available
+        self.required = required
+
+
+class MatchingEngine:
+    """Order books for every ticker, kept in step with the stored orders."""
+    
+    def __init__(self, db):
+        self.db = db
+        self.books: Dict[str, OrderBook] = {}
+        self._resting: Dict[str, Order] = {}  # Orders in the books, by id
+        self._version: Optional[int] = None  # orders_version the books reflect
+        self._sequence = 0  # Last queue position handed out
+        self._lock = threading.RLock()
+        
+        # Metrics
+        self.orders_placed = 0
+        self.fills = 0
+    
+    def book(self, ticker: str) -> OrderBook:
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = OrderBook(ticker)
+        return book
+    
+    def _sync(self):
+        """Rebuild the books if orders were saved elsewhere. Call under the engine lock."""
+        version = self.db.orders_version
+        if version == self._version:
+            return
+        self.books = {}
+        self._resting = {}
+        for order in self.db.get_active_orders():
+            self.book(order.ticker).side(order.side).add(order)
+            self._resting[order.id] = order
+            self._sequence = max(self._sequence, order.sequence)
+        self._version = version
+    
+    def _save(self, orders: Iterable[Order]):
+        self.db.save_orders(orders)
+        self._version = self.db.orders_version
+    
+    @contextmanager
+    def _transaction(self, *user_ids: str) -> Iterator[None]:
+        """The engine lock and an account transaction, with the books in step."""
+        with self._lock:
+            try:
+                with self.db.account_transaction(*user_ids):
+                    self._sync()
+                    yield
+            except OrderError:
+                raise  # Rejected before anything changed
+            except BaseException:
+                # The store rolled back what the books already applied
+                self._version = None
+                raise
+    
+    def _portfolio(self, user_id: str) -> Portfolio:
+        portfolio = self.db.get_portfolio(user_id)
+        if portfolio is None:
+            portfolio = Portfolio(user_id=user_id, balance=100_000)
+            self.db.update_portfolio(portfolio)
+        return portfolio
+    
+    # Reservations, read from the stored open orders; check them inside
+    # the account's transaction
+    
+    def reserved_cash(self, user_id: str) -> int:
+        return self.db.get_reservations(user_id)[0]
+    
+    def reserved_shares(self, user_id: str, ticker: str) -> int:
+        return self.db.get_reservations(user_id)[1].get(ticker, 0)
+    
+    def available_cash(self, portfolio: Portfolio) -> int:
+        """Balance not reserved by resting buy orders, in centavos."""
+        return portfolio.balance - self.reserved_cash(portfolio.user_id)
+    
+    def available_shares(self, portfolio: Portfolio, ticker: str) -> int:
+        """Shares held and not reserved by resting sell orders."""
+        holding = portfolio.get_holding(ticker)
+        held = holding.shares if holding else 0
+        return held - self.reserved_shares(portfolio.user_id, ticker)
+    
+    def _check_available(self, portfolio: Portfolio, order: Order, quantity: int, credit: int = 0):
+        """Raise unless `quantity` more of the order is covered; `credit` is already reserved."""
+        if order.side == "compra":
+            available = self.available_cash(portfolio) + credit
+            required = order.price * quantity
+            if required > available:
+                raise OrderError("balance", available, required)
+        else:
+            available = self.available_shares(portfolio, order.ticker) + credit
+            if quantity > available:
+                raise OrderError("shares", available, quantity)
+    
+    def _reservation(self, order: Order) -> int:
+        """What a resting order currently holds: centavos or shares."""
+        return order.price * order.remaining if order.side == "compra" else order.remaining
+    
+    # Order lifecycle
+    
+    def place(self, user_id: str, stock: Stock, side: str, price: int, quantity: int, bank: str) -> Order:
+        """Match a new limit order and rest whatever remains."""
+        with self._transaction(user_id):
+            portfolio = self._portfolio(user_id)
+            order = Order(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                ticker=stock.ticker,
+                side=side,
+                price=price,
+                quantity=quantity,
+                bank=bank,
+                date=now_epoch(),
+            )
+            self._check_available(portfolio, order, quantity)
+            self.orders_placed += 1
+            self._match(order, stock.company)
+            self._rest(order)
+            self._save([order])
+            return replace(order)
+    
+    def get(self, user_id: str, order_id: str) -> Order:
+        order = self.db.get_order(order_id)
+        if order is None or order.user_id != user_id:
+            raise OrderError("not_found")
+        return order
+    
+    def _active(self, user_id: str, order_id: str) -> Order:
+        """The instance of an open order held in the books. Call inside _transaction."""
+        order = self._resting.get(order_id)
+        if order is None or order.user_id != user_id:
+            self.get(user_id, order_id)
+            raise OrderError("inactive")
+        return order
+    
+    def snapshot(self, user_id: str, order_id: str) -> Order:
+        """Copy of one of a user's orders, safe to read while fills run."""
+        with self._lock:
+            return replace(self.get(user_id, order_id))
+    
+    def user_orders(self, user_id: str, active: Optional[bool] = None) -> List[Order]:
+        """Copies of a user's orders, newest first."""
+        with self._lock:
+            return [replace(o) for o in self.db.get_user_orders(user_id, active)]
+    
+    def depth(self, ticker: str, limit: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]]:
+        """Best `limit` bid and ask levels of a ticker's book."""
+        with self._lock:
+            self._sync()
+            book = self.books.get(ticker)
+            if book is None:
+                return [], []
+            return book.bids.depth(limit), book.asks.depth(limit)
+    
+    def cancel(self, user_id: str, order_id: str) -> Order:
+        with self._transaction(user_id):
+            order = self._active(user_id, order_id)
+            self._unrest(order)
+            order.status = "cancelada"
+            self._save([order])
+            return replace(order)
+    
+    def amend(
+        self,
+        user_id: str,
+        order_id: str,
+        company: str,
+        price: Optional[int] = None,
+        quantity: Optional[int] = None,
+    ) -> Order:
+        """
+        Change the limit price and/or total quantity of an active order.
+        A lower quantity keeps the order's place in its queue; a new price
+        or a higher quantity sends it to the back, and a new price may
+        also make it match at once.
+        """
+        with self._transaction(user_id):
+            order = self._active(user_id, order_id)
+            new_price = order.price if price is None else price
+            new_quantity = order.quantity if quantity is None else quantity
+            if new_quantity <= order.filled:
+                raise OrderError("quantity", order.filled, new_quantity)
+            
+            if new_price == order.price and new_quantity <= order.quantity:
+                # Shrinking in place keeps time priority
+                order.quantity = new_quantity
+                self._save([order])
+                return replace(order)
+            
+            # Check against what the order would release before touching the book
+            amended = Order(
+                id=order.id, user_id=user_id, ticker=order.ticker, side=order.side,
+                price=new_price, quantity=new_quantity, bank=order.bank, date=order.date,
+                filled=order.filled,
+            )
+            self._check_available(
+                self._portfolio(user_id), amended, amended.remaining, credit=self._reservation(order)
+            )
+            self._unrest(order)
+            order.price = new_price
+            order.quantity = new_quantity
+            order.date = now_epoch()
+            self._match(order, company)
+            self._rest(order)
+            self._save([order])
+            return replace(order)
+    
+    def _rest(self, order: Order):
+        """Queue what is left of an order at the back of its price level."""
+        if order.remaining:
+            self._sequence += 1
+            order.sequence = self._sequence
+            self.book(order.ticker).side(order.side).add(order)
+            self._resting[order.id] = order
+    
+    def _unrest(self, order: Order):
+        self.book(order.ticker).side(order.side).remove(order)
+        self._resting.pop(order.id, None)
+    
+    # Matching
+    
+    def _match(self, order: Order, company: str):
+        """Fill `order` against the opposite side while prices cross."""
+        opposite = self.book(order.ticker).opposite(order.side)
+        buying = order.side == "compra"
+        while order.remaining:
+            price = opposite.best_price()
+            if price is None or (price > order.price if buying else price < order.price):
+                break
+            resting = opposite.head(price)
+            if resting.user_id == order.user_id:
+                # Self-trade prevention: the older order is cancelled
+                opposite.pop_head(price)
+                del self._resting[resting.id]
+                resting.status = "cancelada"
+                self._save([resting])
+                continue
+            quantity = min(order.remaining, resting.remaining)
+            if buying:
+                self._settle(order, resting, company, price, quantity)
+            else:
+                self._settle(resting, order, company, price, quantity)
+            if not resting.remaining:
+                opposite.pop_head(price)
+                del self._resting[resting.id]
+    
+    def _fill(self, order: Order, price: int, quantity: int):
+        order.filled += quantity
+        order.filled_amount += price * quantity
+        order.status = "ejecutada" if not order.remaining else "parcial"
+    
+    def _settle(self, buy: Order, sell: Order, company: str, price: int, quantity: int):
+        """Move cash and shares for one fill and record both sides."""
+        total = price * quantity
+        date = now_epoch()
+        self._fill(buy, price, quantity)
+        self._fill(sell, price, quantity)
+        
+        # Only engine calls lock two accounts, and they are serialized by
+        # the engine lock, so taking the counterparty's stripe here is safe.
+        # Inside place/amend this joins their transaction, so a whole match
+        # commits at once.
+        with self.db.account_transaction(buy.user_id, sell.user_id):
+            buyer = self._portfolio(buy.user_id)
+            buyer.balance -= total
+            buyer.buy(ticker=buy.ticker, company=company, shares=quantity, price=price, purchase_date=date)
+            seller = self._portfolio(sell.user_id)
+            seller.balance += total
+            seller.sell(sell.ticker, quantity)
+            for portfolio, order, type in ((buyer, buy, "compra"), (seller, sell, "venta")):
+                self.db.record_trades(portfolio, [Transaction(
+                    id=str(uuid.uuid4()),
+                    user_id=order.user_id,
+                    type=type,
+                    ticker=order.ticker,
+                    company=company,
+                    shares=quantity,
+                    price=price,
+                    total=total,
+                    date=date,
+                    bank=order.bank
+                )])
+            self.db.record_prices([(buy.ticker, price, quantity)])
+            # Saved under both accounts' locks, which guard their reservations
+            self._save([buy, sell])
+        
+        portfolio_notifier.notify(buy.user_id)
+        portfolio_notifier.notify(sell.user_id)
+        self.fills += 1
+        metrics.trades.inc("compra", "order")
+        metrics.trades.inc("venta", "order")
+    
+    def metrics(self) -> dict:
+        return {
+            "orders_placed": self.orders_placed,
+            "fills": self.fills,
+            "resting_orders": len(self._resting),
+        }
+
+
+matching_engine = MatchingEngine(db)
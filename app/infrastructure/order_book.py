@@ -0,0 +1,97 @@
+"""
+Per-ticker limit order book.
+Each side keeps a heap of price levels and, per level, a FIFO queue of
+resting orders, which gives price-time priority: the best price matches
+first and, within a price, the oldest order. Emptied levels are dropped
+from the level map at once and from the heap lazily, when they surface;
+if stale entries pile up below the top, the heap is rebuilt from the live
+levels, so it never grows past about twice their number.
+"""
+import heapq
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from ..domain.models import Order
+
+
+class BookSide:
+    """One side of a book: price levels ordered best-first."""
+    
+    def __init__(self, descending: bool):
+        # Bids want the highest price first, so their heap holds -price
+        self._sign = -1 if descending else 1
+        self._heap: List[int] = []
+        self.levels: Dict[int, Deque[Order]] = {}
+    
+    def __bool__(self) -> bool:
+        return bool(self.levels)
+    
+    def add(self, order: Order):
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = deque()
+            if len(self._heap) > 2 * len(self.levels) + 8:
+                # Mostly stale entries; rebuilding is amortized over the pushes
+                self._heap = [self._sign * price for price in self.levels]
+                heapq.heapify(self._heap)
+            else:
+                heapq.heappush(self._heap, self._sign * order.price)
+        level.append(order)
+    
+    def remove(self, order: Order) -> bool:
+        level = self.levels.get(order.price)
+        if level is None:
+            return False
+        try:
+            level.remove(order)
+        except ValueError:
+            return False
+        if not level:
+            del self.levels[order.price]
+        return True
+    
+    def best_price(self) -> Optional[int]:
+        heap = self._heap
+        while heap:
+            price = self._sign * heap[0]
+            if price in self.levels:
+                return price
+            heapq.heappop(heap)  # Stale: the level was emptied
+        return None
+    
+    def head(self, price: int) -> Order:
+        return self.levels[price][0]
+    
+    def pop_head(self, price: int):
+        level = self.levels[price]
+        level.popleft()
+        if not level:
+            del self.levels[price]
+    
+    def depth(self, limit: int) -> List[Tuple[int, int, int]]:
+        """
+        Best `limit` levels as (price, total remaining, order count). Call
+        it under the engine lock; fills change the levels on other threads.
+        """
+        prices = sorted(self.levels, reverse=self._sign < 0)[:limit]
+        return [
+            (price, sum(o.remaining for o in self.levels[price]), len(self.levels[price]))
+            for price in prices
+        ]
+
+
+class OrderBook:
+    """Bids and asks for a single ticker."""
+    
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+    
+    def side(self, side: str) -> BookSide:
+        """The side where `side` orders rest."""
+        return self.bids if side == "compra" else self.asks
+    
+    def opposite(self, side: str) -> BookSide:
+        """The side `side` orders match against."""
+        return self.asks if side == "compra" else self.bids
@@ -0,0 +1,321 @@
+"""
+Crash safety for the in-memory store: a write-ahead log plus periodic snapshots.
+
+Every mutation is appended to the current WAL segment. A flusher thread
+writes and fsyncs pending records in batches (group commit), so durability
+lags a write by at most WAL_FLUSH_INTERVAL_MS. A snapshot thread rotates
+to a fresh segment, writes the whole store to `snapshot.bin` and deletes the
+segments it covers. Startup loads the snapshot through mmap and replays only
+the segments written after it. Day bars of the price history are saved in
+the snapshot, not the WAL.
+
+Snapshots are fuzzy: the store keeps changing while it is being written,
+so a snapshot can already contain changes that are also in the tail. WAL
+records are full-state puts (a user, a portfolio) or carry a sequence
+number (a transaction), which makes replaying them over the snapshot
+idempotent.
+"""
+import mmap
+import os
+import pickle
+import struct
+import threading
+import zlib
+from typing import List, Optional
+
+from ..domain.models import User, Stock, Holding, Transaction, Portfolio
+from .history import price_history
+
+
+# Version 2: money in integer centavos, dates in epoch seconds
+SNAPSHOT_MAGIC = b"BOLSNAP2"
+FORMAT_VERSION = "2"
+SNAPSHOT_HEADER = struct.Struct("<8sQ")  # magic, last WAL segment covered
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+
+# Record tags
+USER = "u"
+USER_DELETED = "ud"
+STOCKS = "s"
+PORTFOLIO = "p"
+TRANSACTION = "t"
+
+
+def _user_tuple(u: User) -> tuple:
+    return (u.id, u.name, u.email, u.username, u.password_hash, u.role)
+
+
+def _stock_tuple(s: Stock) -> tuple:
+    return (s.ticker, s.company, s.price, s.change)
+
+
+def _portfolio_tuple(p: Portfolio) -> tuple:
+    return (
+        p.user_id,
+        p.balance,
+        # list() copies atomically; the dict may change during a snapshot
+        [(h.ticker, h.company, h.shares, h.cost, h.current_price, h.purchase_date)
+         for h in list(p.holdings.values())],
+    )
+
+
+def _portfolio_from_tuple(row: tuple) -> Portfolio:
+    user_id, balance, holdings = row
+    return Portfolio(user_id=user_id, balance=balance, holdings={h[0]: Holding(*h) for h in holdings})
+
+
+def _transaction_tuple(t: Transaction) -> tuple:
+    return (t.id, t.user_id, t.type, t.ticker, t.company, t.shares, t.price, t.total, t.date, t.bank)
+
+
+class WriteAheadLog:
+    """Segmented append-only log with batched fsync."""
+    
+    def __init__(self, directory: str, segment: int, flush_interval: float):
+        self.directory = directory
+        self.segment = segment
+        self.flush_interval = flush_interval
+        self._pending: List[bytes] = []
+        self._lock = threading.Lock()  # Guards _pending
+        self._io_lock = threading.Lock()  # Guards the file and segment number
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._file = open(segment_path(directory, segment), "ab")
+        self._thread = threading.Thread(target=self._flush_loop, name="wal-flush", daemon=True)
+        self._thread.start()
+    
+    def append(self, record: tuple):
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._pending.append(frame)
+    
+    def _write_pending(self):
+        """Write and fsync pending records. Caller holds _io_lock."""
+        with self._lock:
+            frames, self._pending = self._pending, []
+        if frames:
+            self._file.write(b"".join(frames))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+    
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            with self._io_lock:
+                if not self._file.closed:
+                    self._write_pending()
+    
+    def flush(self):
+        with self._io_lock:
+            self._write_pending()
+    
+    def rotate(self) -> int:
+        """Start a new segment and return the number of the one just closed."""
+        with self._io_lock:
+            self._write_pending()
+            self._file.close()
+            closed = self.segment
+            self.segment += 1
+            self._file = open(segment_path(self.directory, self.segment), "ab")
+            return closed
+    
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        with self._io_lock:
+            self._write_pending()
+            self._file.close()
+
+
+def segment_path(directory: str, segment: int) -> str:
+    return os.path.join(directory, f"wal-{segment:08d}.log")
+
+
+def list_segments(directory: str) -> List[int]:
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith("wal-") and name.endswith(".log"):
+            segments.append(int(name[4:-4]))
+    return sorted(segments)
+
+
+def read_segment(path: str):
+    """Yield records from a segment, stopping at a torn or corrupt tail."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + RECORD_HEADER.size <= len(data):
+        length, crc = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        yield pickle.loads(payload)
+        offset = start + length
+
+
+class Journal:
+    """Persists an InMemoryDatabase through a WAL and periodic snapshots."""
+    
+    def __init__(self, directory: str, flush_interval_ms: int, snapshot_interval_seconds: int):
+        self.directory = directory
+        self.flush_interval = flush_interval_ms / 1000
+        self.snapshot_interval = snapshot_interval_seconds
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.format_path = os.path.join(directory, "FORMAT")
+        self.wal: Optional[WriteAheadLog] = None
+        self._stop = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._snapshot_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+    
+    # Recovery
+    def load(self, db) -> bool:
+        """
+        Restore `db` from the snapshot and WAL tail, then open a fresh
+        segment for new writes. Returns False when there was nothing to load.
+        """
+        self._check_format()
+        covered = 0
+        found = False
+        if os.path.exists(self.snapshot_path):
+            covered = self._load_snapshot(db)
+            found = True
+        
+        segments = list_segments(self.directory)
+        for segment in segments:
+            if segment <= covered:
+                continue
+            for record in read_segment(segment_path(self.directory, segment)):
+                self._apply(db, record)
+                found = True
+        
+        next_segment = max(segments + [covered]) + 1
+        self.wal = WriteAheadLog(self.directory, next_segment, self.flush_interval)
+        return found
+    
+    def _check_format(self):
+        """Refuse data written with a different record layout."""
+        try:
+            with open(self.format_path) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            has_data = os.path.exists(self.snapshot_path) or list_segments(self.directory)
+            version = "1" if has_data else None
+        if version is not None and version != FORMAT_VERSION:
+            raise ValueError(
+                f"{self.directory} holds format version {version}, expected {FORMAT_VERSION}"
+            )
+        with open(self.format_path, "w") as f:
+            f.write(FORMAT_VERSION + "\n")
+    
+    def _load_snapshot(self, db) -> int:
+        with open(self.snapshot_path, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                data = f.read()
+            try:
+                magic, covered = SNAPSHOT_HEADER.unpack_from(data, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError(f"{self.snapshot_path} is not a snapshot file")
+                state = pickle.loads(memoryview(data)[SNAPSHOT_HEADER.size:])
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+        
+        db.create_users(User(*row) for row in state["users"])
+        # Snapshots from before day bars were kept have none
+        for ticker, bars in state.get("price_days", {}).items():
+            price_history.restore_days(ticker, bars)
+        # Restored prices are not new ticks; the snapshot's day bars already hold them
+        db.upsert_stocks((Stock(*row) for row in state["stocks"]), record_history=False)
+        for row in state["portfolios"]:
+            db.update_portfolio(_portfolio_from_tuple(row))
+        db.add_transactions(Transaction(*row) for row in state["transactions"])
+        return covered
+    
+    def _apply(self, db, record: tuple):
+        tag = record[0]
+        if tag == USER:
+            user = User(*record[1])
+            if db.get_user_by_id(user.id):
+                db.update_user(user)
+            else:
+                db.create_user(user)
+        elif tag == USER_DELETED:
+            db.delete_user(record[1])
+        elif tag == STOCKS:
+            db.upsert_stocks((Stock(*row) for row in record[1]), record_history=False)
+        elif tag == PORTFOLIO:
+            db.update_portfolio(_portfolio_from_tuple(record[1]))
+        elif tag == TRANSACTION:
+            seq, row = record[1], record[2]
+            # Already part of the snapshot
+            if seq >= len(db.transactions):
+                db.add_transaction(Transaction(*row))
+    
+    # Logging
+    def log_user(self, user: User):
+        self.wal.append((USER, _user_tuple(user)))
+    
+    def log_user_deleted(self, user_id: str):
+        self.wal.append((USER_DELETED, user_id))
+    
+    def log_stocks(self, stocks: List[Stock]):
+        self.wal.append((STOCKS, [_stock_tuple(s) for s in stocks]))
+    
+    def log_portfolio(self, portfolio: Portfolio):
+        self.wal.append((PORTFOLIO, _portfolio_tuple(portfolio)))
+    
+    def log_transaction(self, seq: int, transaction: Transaction):
+        self.wal.append((TRANSACTION, seq, _transaction_tuple(transaction)))
+    
+    # Snapshots
+    def snapshot(self, db):
+        """Write a snapshot of `db` and drop the WAL segments it covers."""
+        with self._snapshot_lock:
+            covered = self.wal.rotate()
+            # Shallow copies are taken atomically under the GIL; the
+            # transaction count pins exactly which appends are included.
+            users = list(db.users.values())
+            stocks = list(db.stocks.values())
+            portfolios = list(db.portfolios.values())
+            transactions = db.transactions[:len(db.transactions)]
+            
+            state = {
+                "users": [_user_tuple(u) for u in users],
+                "stocks": [_stock_tuple(s) for s in stocks],
+                "portfolios": [_portfolio_tuple(p) for p in portfolios],
+                "transactions": [_transaction_tuple(t) for t in transactions],
+                "price_days": price_history.all_days(),
+            }
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, covered))
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            
+            for segment in list_segments(self.directory):
+                if segment <= covered:
+                    os.remove(segment_path(self.directory, segment))
+    
+    def start(self, db):
+        """Start taking snapshots every snapshot_interval seconds."""
+        def run():
+            while not self._stop.wait(self.snapshot_interval):
+                self.snapshot(db)
+        
+        self._snapshot_thread = threading.Thread(target=run, name="snapshot", daemon=True)
+        self._snapshot_thread.start()
+    
+    def close(self):
+        self._stop.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        if self.wal is not None:
+            self.wal.close()
@@ -0,0 +1,249 @@
+"""
+Storage interface shared by every database backend.
+Routers only talk to `db`, which is one of the implementations below
+chosen through `Settings.DATABASE_BACKEND`.
+"""
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..domain.models import User, Stock, Transaction, Portfolio, Order, VolumeStats
+from .history import Bar, price_history
+
+
+# Pre-computed bcrypt hashes for demo passwords to avoid slow initialization
+# admin123 hash
+ADMIN_HASH = "$2b$12$VsJ563J8DQjk/XDkCUapsefUepIP9Muw4wBJWNdDOtkcdd5Ns/KaC"
+# usuario123 hash
+USER_HASH = "$2b$12$SbOI0YsyXFbWJLLJN9TEyuflgnUDS84OooUT5K3VSNjM5QAh4cl12"
+
+
+class DuplicateUserError(ValueError):
+    """Raised when a username or email is already taken."""
+    
+    def __init__(self, field: str, value: str):
+        super().__init__(f"{field} already registered: {value}")
+        self.field = field
+        self.value = value
+
+
+def normalize_identity(value: str) -> str:
+    """Normalize a username or email for index lookups."""
+    return value.strip().casefold()
+
+
+class Repository(ABC):
+    """Abstract database interface."""
+    
+    # Bumped by every write to the stock table, so readers can cache
+    # anything derived from it per version. Backends shared between
+    # worker processes keep it in the database and read it per request.
+    stocks_version: int = 0
+    
+    # User methods
+    @abstractmethod
+    def get_user_by_id(self, user_id: str) -> Optional[User]: ...
+    
+    @abstractmethod
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        """Look up a user by username, falling back to email."""
+    
+    @abstractmethod
+    def get_user_by_email(self, email: str) -> Optional[User]: ...
+    
+    @abstractmethod
+    def create_user(self, user: User) -> User:
+        """Insert a user with an empty portfolio; raises DuplicateUserError."""
+    
+    def create_users(self, users: Iterable[User]):
+        """Bulk insert users. Backends override this with a batched path."""
+        for user in users:
+            self.create_user(user)
+    
+    @abstractmethod
+    def update_user(self, user: User) -> User: ...
+    
+    @abstractmethod
+    def delete_user(self, user_id: str) -> Optional[User]: ...
+    
+    # Stock methods
+    @abstractmethod
+    def get_all_stocks(self) -> List[Stock]: ...
+    
+    @abstractmethod
+    def get_stock(self, ticker: str) -> Optional[Stock]: ...
+    
+    @abstractmethod
+    def upsert_stocks(self, stocks: Iterable[Stock], record_history: bool = True):
+        """Insert or replace stocks; pass record_history=False to restore saved rows
+        without adding a price point stamped now."""
+    
+    @abstractmethod
+    def update_stock_prices(self, updates: Iterable[Tuple[str, int, float]]):
+        """
+        Apply (ticker, price in centavos, change %) updates and revalue
+        only the portfolios holding those tickers.
+        """
+    
+    # Portfolio methods
+    @abstractmethod
+    def get_portfolio(self, user_id: str) -> Optional[Portfolio]: ...
+    
+    def get_portfolio_snapshot(self, user_id: str) -> Optional[Portfolio]:
+        """
+        A consistent copy of a portfolio that is safe to read while trades
+        and price updates run on other threads. Backends whose
+        get_portfolio returns the shared live object override this.
+        """
+        return self.get_portfolio(user_id)
+    
+    @abstractmethod
+    def account_transaction(self, *user_ids: str) -> AbstractContextManager:
+        """
+        Context manager that makes a read-check-write of these accounts
+        atomic. Inside the block get_portfolio sees the latest committed
+        state and no other trade on the same accounts, from this process
+        or another worker, can interleave. Writes made in the block commit
+        together when it exits; backends with transactions discard them
+        if it raises. Blocks may nest.
+        """
+    
+    @abstractmethod
+    def update_portfolio(self, portfolio: Portfolio): ...
+    
+    def update_portfolios(self, portfolios: Iterable[Portfolio]):
+        """Bulk save portfolios. Backends override this with a batched path."""
+        for portfolio in portfolios:
+            self.update_portfolio(portfolio)
+    
+    # Transaction methods
+    @abstractmethod
+    def get_transactions(self, user_id: str) -> List[Transaction]:
+        """Get all transactions for a user, newest first."""
+    
+    @abstractmethod
+    def get_transactions_page(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> Tuple[List[Transaction], Optional[int]]:
+        """
+        Get one newest-first page of a user's transactions and the `before`
+        position of the next page (None when exhausted). Dates are epoch
+        seconds, `date_from` <= date < `date_to`.
+        """
+    
+    @abstractmethod
+    def iter_transactions(
+        self,
+        user_id: Optional[str] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        batch_size: int = 1_000,
+    ) -> Iterator[List[Transaction]]:
+        """
+        Yield transactions oldest first, up to `batch_size` at a time, for
+        one user or for everyone when `user_id` is None. Covers the log as
+        it stood when iteration began and reads it one batch at a time, so
+        exports run in constant memory.
+        """
+    
+    @abstractmethod
+    def add_transaction(self, transaction: Transaction): ...
+    
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        """Bulk append transactions. Backends override this with a batched path."""
+        for transaction in transactions:
+            self.add_transaction(transaction)
+    
+    def record_trades(self, portfolio: Portfolio, transactions: Iterable[Transaction]):
+        """
+        Save a portfolio together with the transactions that produced it.
+        Backends with transactions override this to commit both at once.
+        """
+        self.update_portfolio(portfolio)
+        self.add_transactions(transactions)
+    
+    # Order methods
+    
+    # Bumped by every save_orders, so a matching engine knows when orders
+    # written by another worker have made its in-memory books stale.
+    orders_version: int = 0
+    
+    @abstractmethod
+    def save_orders(self, orders: Iterable[Order]):
+        """
+        Insert or update limit orders. Called inside the account_transaction
+        that changed them, so fills, cancels and reservations commit with
+        the trades they belong to.
+        """
+    
+    @abstractmethod
+    def get_order(self, order_id: str) -> Optional[Order]: ...
+    
+    @abstractmethod
+    def get_user_orders(self, user_id: str, active: Optional[bool] = None) -> List[Order]:
+        """A user's orders, newest first; `active` filters open ones in or out."""
+    
+    @abstractmethod
+    def get_active_orders(self) -> List[Order]:
+        """Every open order, in book priority (`Order.sequence`) order."""
+    
+    @abstractmethod
+    def get_reservations(self, user_id: str) -> Tuple[int, Dict[str, int]]:
+        """
+        What a user's open orders hold back: centavos for buys and shares
+        per ticker for sells. Read it inside account_transaction to check a
+        trade against it.
+        """
+    
+    # Price history
+    def record_prices(self, prices: Iterable[Tuple[str, int, int]]):
+        """
+        Record (ticker, price, traded volume) points in the price history.
+        Called inside the write that moved the price, so backends that
+        persist day bars save them with it.
+        """
+        for ticker, price, volume in prices:
+            price_history.record(ticker, price, volume)
+    
+    def get_price_days(self, ticker: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Bar]:
+        """Day bars for `ticker` in [start, end) (epoch seconds), oldest first."""
+        return price_history.days(ticker, start, end)
+    
+    # Analytics
+    @abstractmethod
+    def get_volume_stats(
+        self,
+        group_by: str = "ticker",
+        ticker: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> List[VolumeStats]:
+        """
+        Trading volume across all users grouped by ticker, user, bank or
+        type, for `date_from` <= date < `date_to` (epoch seconds).
+        """
+    
+    # Coordination between worker processes
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew the lease `name` for `owner` for `ttl` seconds, so
+        one worker of a deployment runs a singleton job. False while
+        another owner holds it unexpired. A backend private to one process
+        always grants it.
+        """
+        return True
+    
+    def release_lease(self, name: str, owner: str):
+        """Give up a lease early so another worker can take it at once."""
+    
+    def close(self):
+        """Release backend resources."""
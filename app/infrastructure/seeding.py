@@ -0,0 +1,344 @@
+"""
+Initial data for an empty database.
+SEED_SOURCE picks where it comes from:
+
+- demo: the two demo users, five Nicaraguan stocks and a few trades
+- synthetic: SEED_USERS users with SEED_HOLDINGS holdings each and
+  SEED_TRANSACTIONS transactions over the last year, from a seeded generator
+- a directory of users/stocks/portfolios/holdings/transactions files,
+  each `.csv` (with a header row) or `.ndjson`; missing files are skipped
+- none: start empty
+
+Sources yield rows lazily and `seed_database` hands them to the
+repository's bulk insert paths SEED_BATCH_SIZE at a time, so a large
+history never has to sit in memory twice. Users arrive with their
+password hashes precomputed: synthetic users share SEED_PASSWORD_HASH
+(usuario123 by default) and nothing is hashed during seeding.
+
+Files hold stored units, as the model fields: centavos and epoch seconds.
+"""
+import csv
+import gc
+import json
+import os
+import random
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from ..core.config import settings
+from ..domain.models import User, Stock, Holding, Transaction, Portfolio
+from ..domain.units import now_epoch, to_epoch
+from .repository import Repository, ADMIN_HASH, USER_HASH
+
+SYNTHETIC_BANKS = ("BAC Nicaragua", "Banpro", "LAFISE", "Banco Ficohsa", "Avanz")
+SYNTHETIC_BALANCE = 10_000_000  # C$ 100,000.00
+YEAR = 365 * 24 * 3600
+
+DEMO_STOCKS = [
+    Stock(ticker="LAFISE", company="LAFISE Nicaragua", price=14820, change=5.1),
+    Stock(ticker="BANCEN", company="Banco Central", price=9680, change=-3.5),
+    Stock(ticker="AGRI", company="Agrícola Nicaragua", price=5480, change=5.2),
+    Stock(ticker="ENITEL", company="ENITEL Telecom", price=8050, change=2.0),
+    Stock(ticker="CEMEX", company="CEMEX Nicaragua", price=12230, change=-2.8),
+]
+
+
+@dataclass
+class SeedData:
+    """Rows to load; transactions oldest first, as the log is kept."""
+    users: Iterable[User] = ()
+    stocks: Iterable[Stock] = ()
+    portfolios: Iterable[Portfolio] = ()
+    transactions: Iterable[Transaction] = ()
+
+
+# Demo
+def demo_data() -> SeedData:
+    users = [
+        User(id="1", name="Administrador Demo", email="admin@bolsa.ni", username="admin",
+             password_hash=ADMIN_HASH, role="admin"),
+        User(id="2", name="Usuario Demo", email="usuario@bolsa.ni", username="usuario",
+             password_hash=USER_HASH, role="user"),
+    ]
+    portfolios = []
+    for user in users:
+        portfolio = Portfolio(user_id=user.id, balance=100_000)
+        portfolio.add_holding(Holding(ticker="LAFISE", company="LAFISE Nicaragua", shares=50,
+                                      cost=50 * 14050, current_price=14820,
+                                      purchase_date=to_epoch("2024-01-10")))
+        portfolio.add_holding(Holding(ticker="BANCEN", company="Banco Central", shares=35,
+                                      cost=35 * 10020, current_price=9680,
+                                      purchase_date=to_epoch("2023-12-15")))
+        portfolios.append(portfolio)
+    transactions = [
+        Transaction(id="3", user_id="1", type="compra", ticker="AGRI", company="Agrícola Nicaragua",
+                    shares=800, price=5200, total=4_160_000, date=to_epoch("2024-01-05 10:15"),
+                    bank="BAC Nicaragua"),
+        Transaction(id="2", user_id="1", type="compra", ticker="BANCEN", company="Banco Central",
+                    shares=350, price=10020, total=3_507_000, date=to_epoch("2023-12-15 14:20"),
+                    bank="Banpro"),
+        Transaction(id="1", user_id="1", type="compra", ticker="LAFISE", company="LAFISE Nicaragua",
+                    shares=500, price=14050, total=7_025_000, date=to_epoch("2024-01-10 09:30"),
+                    bank="BAC Nicaragua"),
+    ]
+    # Fresh copies: stocks are mutated in place by price updates
+    stocks = [Stock(s.ticker, s.company, s.price, s.change) for s in DEMO_STOCKS]
+    return SeedData(users=users, stocks=stocks, portfolios=portfolios, transactions=transactions)
+
+
+# Synthetic
+def synthetic_data(
+    users: int,
+    holdings: int,
+    transactions: int,
+    seed: int = 1,
+    password_hash: str = USER_HASH,
+) -> SeedData:
+    """
+    Users `user{i}` (ids `s{i}`) holding `holdings` tickers each, on the
+    demo stocks topped up with synthetic tickers, and `transactions`
+    trades at evenly spread, increasing dates ending now.
+    """
+    rng = random.Random(seed)
+    stocks = [Stock(s.ticker, s.company, s.price, s.change) for s in DEMO_STOCKS]
+    stocks += [
+        Stock(ticker=f"SYN{i:03d}", company=f"Sintética {i}", price=rng.randint(1_000, 20_000), change=0.0)
+        for i in range(max(0, holdings - len(stocks)))
+    ]
+    user_ids = [f"s{i}" for i in range(users)]
+    now = now_epoch()
+    
+    def user_rows() -> Iterator[User]:
+        for i, user_id in enumerate(user_ids):
+            yield User(id=user_id, name=f"Usuario {i}", email=f"user{i}@seed.ni",
+                       username=f"user{i}", password_hash=password_hash)
+    
+    def portfolio_rows() -> Iterator[Portfolio]:
+        # Own generator, so the picks do not depend on how far users were read
+        picks = random.Random(f"{seed}:portfolios")
+        for user_id in user_ids:
+            portfolio = Portfolio(user_id=user_id, balance=SYNTHETIC_BALANCE)
+            for stock in picks.sample(stocks, holdings):
+                portfolio.buy(stock.ticker, stock.company, picks.randint(10, 1_000),
+                              stock.price, now - picks.randrange(YEAR))
+            yield portfolio
+    
+    def transaction_rows() -> Iterator[Transaction]:
+        # Hot loop: plain random() indexing is several times faster than
+        # choice()/randint(), and ids are a counter rather than UUIDs
+        rand = random.Random(f"{seed}:transactions").random
+        banks = SYNTHETIC_BANKS
+        stock_count, bank_count = len(stocks), len(banks)
+        start = now - YEAR
+        step = YEAR / max(1, transactions)
+        for n in range(transactions):
+            stock = stocks[int(rand() * stock_count)]
+            shares = 1 + int(rand() * 200)
+            price = max(100, stock.price - 500 + int(rand() * 1001))
+            yield Transaction(
+                f"t{n}",
+                user_ids[int(rand() * users)],
+                "compra" if rand() < 0.5 else "venta",
+                stock.ticker,
+                stock.company,
+                shares,
+                price,
+                shares * price,
+                start + int(n * step),
+                banks[int(rand() * bank_count)],
+            )
+    
+    return SeedData(
+        users=user_rows() if users else (),
+        stocks=stocks,
+        portfolios=portfolio_rows() if users else (),
+        transactions=transaction_rows() if users else (),
+    )
+
+
+# Files
+def _role(value) -> str:
+    return value or "user"
+
+
+# Column -> converter, in model field order
+USER_COLUMNS: Dict[str, Callable] = {
+    "id": str, "name": str, "email": str, "username": str, "password_hash": str, "role": _role,
+}
+STOCK_COLUMNS: Dict[str, Callable] = {"ticker": str, "company": str, "price": int, "change": float}
+PORTFOLIO_COLUMNS: Dict[str, Callable] = {"user_id": str, "balance": int}
+HOLDING_COLUMNS: Dict[str, Callable] = {
+    "user_id": str, "ticker": str, "company": str, "shares": int, "cost": int,
+    "current_price": int, "purchase_date": int,
+}
+TRANSACTION_COLUMNS: Dict[str, Callable] = {
+    "id": str, "user_id": str, "type": str, "ticker": str, "company": str,
+    "shares": int, "price": int, "total": int, "date": int, "bank": str,
+}
+FORMATS = ("ndjson", "csv")
+
+
+def _find(directory: str, name: str) -> Optional[str]:
+    for fmt in FORMATS:
+        path = os.path.join(directory, f"{name}.{fmt}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_rows(path: str, columns: Dict[str, Callable]) -> Iterator[tuple]:
+    """
+    Yield one converted tuple per record, in `columns` order. Optional
+    columns (role) may be missing; any other missing column is an error.
+    """
+    names = list(columns)
+    converters = list(columns.values())
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            missing = [name for name in names if name not in header and columns[name] is not _role]
+            if missing:
+                raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+            # Absent optional columns read an empty cell appended to each row
+            width = len(header)
+            pairs = [(convert, header.index(name) if name in header else width) for name, convert in columns.items()]
+            pad = [""] if any(i == width for _, i in pairs) else []
+            for line, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                row += pad
+                try:
+                    yield tuple([convert(row[i]) for convert, i in pairs])
+                except (IndexError, ValueError) as e:
+                    raise ValueError(f"{path}:{line}: {e}") from None
+        else:
+            for line, text in enumerate(f, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                    yield tuple([convert(record.get(name, "")) for name, convert in zip(names, converters)])
+                except (AttributeError, TypeError, ValueError) as e:
+                    raise ValueError(f"{path}:{line}: {e}") from None
+
+
+def file_data(directory: str) -> SeedData:
+    if not os.path.isdir(directory):
+        raise ValueError(f"SEED_SOURCE {directory} is not demo, synthetic, none or a directory")
+    data = SeedData()
+    path = _find(directory, "users")
+    if path:
+        data.users = (User(*row) for row in read_rows(path, USER_COLUMNS))
+    path = _find(directory, "stocks")
+    if path:
+        data.stocks = [Stock(*row) for row in read_rows(path, STOCK_COLUMNS)]
+    
+    # Holdings are grouped per user first; a portfolio is saved whole
+    balances: Dict[str, int] = {}
+    path = _find(directory, "portfolios")
+    if path:
+        balances = dict(read_rows(path, PORTFOLIO_COLUMNS))
+    held: Dict[str, List[Holding]] = {}
+    path = _find(directory, "holdings")
+    if path:
+        for row in read_rows(path, HOLDING_COLUMNS):
+            held.setdefault(row[0], []).append(Holding(*row[1:]))
+    
+    def portfolio_rows() -> Iterator[Portfolio]:
+        for user_id in dict.fromkeys([*balances, *held]):
+            portfolio = Portfolio(user_id=user_id)
+            if user_id in balances:
+                portfolio.balance = balances[user_id]
+            for holding in held.get(user_id, ()):
+                portfolio.add_holding(holding)
+            yield portfolio
+    
+    data.portfolios = portfolio_rows()
+    path = _find(directory, "transactions")
+    if path:
+        data.transactions = (Transaction(*row) for row in read_rows(path, TRANSACTION_COLUMNS))
+    return data
+
+
+def write_files(data: SeedData, directory: str, fmt: str = "ndjson"):
+    """Write `data` in the layout `file_data` reads, e.g. to edit or share a dataset."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    portfolios = list(data.portfolios)
+    tables = [
+        ("users", USER_COLUMNS, ((u.id, u.name, u.email, u.username, u.password_hash, u.role) for u in data.users)),
+        ("stocks", STOCK_COLUMNS, ((s.ticker, s.company, s.price, s.change) for s in data.stocks)),
+        ("portfolios", PORTFOLIO_COLUMNS, ((p.user_id, p.balance) for p in portfolios)),
+        ("holdings", HOLDING_COLUMNS, (
+            (p.user_id, h.ticker, h.company, h.shares, h.cost, h.current_price, h.purchase_date)
+            for p in portfolios for h in p.holdings.values()
+        )),
+        ("transactions", TRANSACTION_COLUMNS, (
+            (t.id, t.user_id, t.type, t.ticker, t.company, t.shares, t.price, t.total, t.date, t.bank)
+            for t in data.transactions
+        )),
+    ]
+    for name, columns, rows in tables:
+        with open(os.path.join(directory, f"{name}.{fmt}"), "w", newline="", encoding="utf-8") as f:
+            if fmt == "csv":
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(rows)
+            else:
+                names = list(columns)
+                for row in rows:
+                    f.write(json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n")
+
+
+# Loading
+def _batches(rows: Iterable, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed_database(db: Repository, data: SeedData, batch_size: int = 10_000):
+    """Bulk-load `data`; stocks go first so portfolios are priced on arrival."""
+    # Every row survives, so the collector's passes over millions of new
+    # objects would find nothing to free
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        db.upsert_stocks(data.stocks)
+        for batch in _batches(data.users, batch_size):
+            db.create_users(batch)
+        for batch in _batches(data.portfolios, batch_size):
+            db.update_portfolios(batch)
+        for batch in _batches(data.transactions, batch_size):
+            db.add_transactions(batch)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def configured_data() -> SeedData:
+    source = settings.SEED_SOURCE
+    if source == "demo":
+        return demo_data()
+    if source == "none":
+        return SeedData()
+    if source == "synthetic":
+        return synthetic_data(
+            settings.SEED_USERS,
+            settings.SEED_HOLDINGS,
+            settings.SEED_TRANSACTIONS,
+            seed=settings.SEED_RANDOM_SEED,
+            password_hash=settings.SEED_PASSWORD_HASH or USER_HASH,
+        )
+    return file_data(source)
+
+
+def seed_initial_data(db: Repository):
+    """Load SEED_SOURCE into a freshly created database."""
+    seed_database(db, configured_data(), settings.SEED_BATCH_SIZE)
@@ -0,0 +1,720 @@
+"""
+Durable SQLite backend.
+Runs in WAL mode so readers never block the writer, which lets several
+uvicorn workers share one database file. Each thread gets its own
+connection; statements are constant strings so sqlite3's statement cache
+reuses the prepared form.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..domain.models import User, Stock, Holding, Transaction, Portfolio, Order, VolumeStats
+from .accounts import account_locks
+from .columnar import GROUP_BY
+from .history import Bar, day_start, price_history
+from .repository import Repository, DuplicateUserError, normalize_identity
+from .seeding import seed_initial_data
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    username TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL,
+    username_key TEXT NOT NULL UNIQUE,
+    email_key TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS stocks (
+    ticker TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    change REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS portfolios (
+    user_id TEXT PRIMARY KEY,
+    balance INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holdings (
+    user_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    company TEXT NOT NULL,
+    shares INTEGER NOT NULL,
+    cost INTEGER NOT NULL,
+    current_price INTEGER NOT NULL,
+    purchase_date INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, ticker)
+);
+CREATE INDEX IF NOT EXISTS holdings_ticker ON holdings (ticker);
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    company TEXT NOT NULL,
+    shares INTEGER NOT NULL,
+    price INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    bank TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_user ON transactions (user_id, seq);
+CREATE INDEX IF NOT EXISTS transactions_user_ticker ON transactions (user_id, ticker, seq);
+CREATE INDEX IF NOT EXISTS transactions_user_date ON transactions (user_id, date);
+CREATE INDEX IF NOT EXISTS transactions_ticker_date ON transactions (ticker, date);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('stocks_version', 0);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    side TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    bank TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    filled INTEGER NOT NULL,
+    filled_amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    sequence INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_user ON orders (user_id, seq);
+CREATE INDEX IF NOT EXISTS orders_open ON orders (sequence) WHERE status IN ('abierta', 'parcial');
+CREATE INDEX IF NOT EXISTS orders_user_open ON orders (user_id) WHERE status IN ('abierta', 'parcial');
+INSERT OR IGNORE INTO counters (name, value) VALUES ('orders_version', 0);
+CREATE TABLE IF NOT EXISTS price_days (
+    ticker TEXT NOT NULL,
+    day REAL NOT NULL,
+    open INTEGER NOT NULL,
+    high INTEGER NOT NULL,
+    low INTEGER NOT NULL,
+    close INTEGER NOT NULL,
+    volume INTEGER NOT NULL,
+    PRIMARY KEY (ticker, day)
+) WITHOUT ROWID;
+"""
+
+# Bumped when column meanings change; money is INTEGER centavos and
+# dates INTEGER epoch seconds since version 2
+SCHEMA_VERSION = 2
+
+USER_COLUMNS = "id, name, email, username, password_hash, role"
+HOLDING_COLUMNS = "ticker, company, shares, cost, current_price, purchase_date"
+TRANSACTION_COLUMNS = "seq, id, user_id, type, ticker, company, shares, price, total, date, bank"
+
+INSERT_USER = (
+    f"INSERT INTO users ({USER_COLUMNS}, username_key, email_key) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_PORTFOLIO = "INSERT OR REPLACE INTO portfolios (user_id, balance) VALUES (?, ?)"
+INSERT_HOLDING = (
+    f"INSERT INTO holdings (user_id, {HOLDING_COLUMNS}, position) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+REPRICE_HOLDINGS = "UPDATE holdings SET current_price = ? WHERE ticker = ?"
+BUMP_STOCKS_VERSION = "UPDATE counters SET value = value + 1 WHERE name = 'stocks_version'"
+ORDER_COLUMNS = "id, user_id, ticker, side, price, quantity, bank, date, filled, filled_amount, status, sequence"
+OPEN_ORDER = "status IN ('abierta', 'parcial')"
+SAVE_ORDER = (
+    f"INSERT INTO orders ({ORDER_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET price = excluded.price, quantity = excluded.quantity, "
+    "date = excluded.date, filled = excluded.filled, filled_amount = excluded.filled_amount, "
+    "status = excluded.status, sequence = excluded.sequence"
+)
+
+# Folds a price into the day bar shared by every worker
+UPSERT_PRICE_DAY = (
+    "INSERT INTO price_days (ticker, day, open, high, low, close, volume) "
+    "VALUES (?1, ?2, ?3, ?3, ?3, ?3, ?4) "
+    "ON CONFLICT (ticker, day) DO UPDATE SET high = max(high, excluded.high), "
+    "low = min(low, excluded.low), close = excluded.close, volume = volume + excluded.volume"
+)
+INSERT_TRANSACTION = (
+    "INSERT INTO transactions (id, user_id, type, ticker, company, shares, price, total, date, bank) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _user_row(user: User) -> tuple:
+    return (
+        user.id, user.name, user.email, user.username, user.password_hash, user.role,
+        normalize_identity(user.username), normalize_identity(user.email),
+    )
+
+
+def _transaction_row(t: Transaction) -> tuple:
+    return (t.id, t.user_id, t.type, t.ticker, t.company, t.shares, t.price, t.total, t.date, t.bank)
+
+
+def _order_row(o: Order) -> tuple:
+    return (
+        o.id, o.user_id, o.ticker, o.side, o.price, o.quantity, o.bank,
+        o.date, o.filled, o.filled_amount, o.status, o.sequence,
+    )
+
+
+def _price_day_rows(prices: List[Tuple[str, int, int]]) -> List[tuple]:
+    day = day_start(time.time())
+    return [(ticker, day, price, volume) for ticker, price, volume in prices]
+
+
+def _check_cross_identity(conn: sqlite3.Connection, users: List[User]):
+    """
+    Raise DuplicateUserError if a username matches another user's email or
+    an email another user's username. Login accepts either, so they share
+    one namespace; the UNIQUE constraints only cover each column alone.
+    """
+    for user in users:
+        if conn.execute(
+            "SELECT 1 FROM users WHERE email_key = ? AND id != ?",
+            (normalize_identity(user.username), user.id),
+        ).fetchone():
+            raise DuplicateUserError("username", user.username)
+        if conn.execute(
+            "SELECT 1 FROM users WHERE username_key = ? AND id != ?",
+            (normalize_identity(user.email), user.id),
+        ).fetchone():
+            raise DuplicateUserError("email", user.email)
+
+
+def _duplicate_user_error(error: sqlite3.IntegrityError, users: List[User]) -> Exception:
+    # SQLite names the violated column but not the row; a batch reports the
+    # field only.
+    message = str(error)
+    for field in ("username", "email"):
+        if f"{field}_key" in message:
+            value = getattr(users[0], field) if len(users) == 1 else ""
+            return DuplicateUserError(field, value)
+    return error
+
+
+class SQLiteDatabase(Repository):
+    """SQLite-backed database with one connection per thread."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._seeding = False
+        
+        conn = self._conn()
+        self._check_schema_version(conn)
+        conn.executescript(SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # Seed only a fresh database. BEGIN IMMEDIATE keeps
+        # two workers starting at once from both seeding.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            empty = conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is None
+            if empty:
+                self._seeding = True
+                seed_initial_data(self)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._seeding = False
+    
+    def _check_schema_version(self, conn: sqlite3.Connection):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        has_tables = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone() is not None
+        if has_tables and version != SCHEMA_VERSION:
+            raise RuntimeError(
+                f"{self.path} uses schema version {version}, expected {SCHEMA_VERSION}; "
+                "recreate the database"
+            )
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,  # Explicit BEGIN/COMMIT below
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _in_transaction(self) -> bool:
+        return self._seeding or getattr(self._local, "in_transaction", False)
+    
+    def _write(self, fn, *args):
+        """Run fn(conn, *args) inside a write transaction."""
+        conn = self._conn()
+        if self._in_transaction():
+            # Already inside the seeding or an account transaction
+            return fn(conn, *args)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+    
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    # User methods
+    def get_user_by_id(self, user_id: str) -> Optional[User]:
+        row = self._conn().execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)
+        ).fetchone()
+        return User(*row) if row else None
+    
+    def get_user_by_username(self, username: str) -> Optional[User]:
+        key = normalize_identity(username)
+        conn = self._conn()
+        row = conn.execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE username_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            row = conn.execute(
+                f"SELECT {USER_COLUMNS} FROM users WHERE email_key = ?", (key,)
+            ).fetchone()
+        return User(*row) if row else None
+    
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        row = self._conn().execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE email_key = ?", (normalize_identity(email),)
+        ).fetchone()
+        return User(*row) if row else None
+    
+    def create_user(self, user: User) -> User:
+        self.create_users([user])
+        return user
+    
+    def create_users(self, users: Iterable[User]):
+        users = list(users)
+        
+        def insert(conn: sqlite3.Connection):
+            try:
+                conn.executemany(INSERT_USER, [_user_row(u) for u in users])
+            except sqlite3.IntegrityError as e:
+                raise _duplicate_user_error(e, users)
+            # Runs after the insert so collisions within the batch count too
+            _check_cross_identity(conn, users)
+            conn.executemany(INSERT_PORTFOLIO, [(u.id, Portfolio(user_id=u.id).balance) for u in users])
+        
+        self._write(insert)
+    
+    def update_user(self, user: User) -> User:
+        def update(conn: sqlite3.Connection):
+            try:
+                cursor = conn.execute(
+                    "UPDATE users SET name = ?, email = ?, username = ?, password_hash = ?, role = ?, "
+                    "username_key = ?, email_key = ? WHERE id = ?",
+                    _user_row(user)[1:] + (user.id,),
+                )
+            except sqlite3.IntegrityError as e:
+                raise _duplicate_user_error(e, [user])
+            if cursor.rowcount == 0:
+                raise KeyError(user.id)
+            _check_cross_identity(conn, [user])
+        
+        self._write(update)
+        return user
+    
+    def delete_user(self, user_id: str) -> Optional[User]:
+        user = self.get_user_by_id(user_id)
+        if user is None:
+            return None
+        
+        def delete(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            conn.execute("DELETE FROM portfolios WHERE user_id = ?", (user_id,))
+            conn.execute("DELETE FROM holdings WHERE user_id = ?", (user_id,))
+        
+        self._write(delete)
+        return user
+    
+    # Stock methods
+    @property
+    def stocks_version(self) -> int:
+        # Stored in the database and bumped in the same transaction as the
+        # write, so every worker sees prices written by the others
+        return self._conn().execute(
+            "SELECT value FROM counters WHERE name = 'stocks_version'"
+        ).fetchone()[0]
+    
+    def get_all_stocks(self) -> List[Stock]:
+        rows = self._conn().execute(
+            "SELECT ticker, company, price, change FROM stocks ORDER BY rowid"
+        ).fetchall()
+        return [Stock(*row) for row in rows]
+    
+    def get_stock(self, ticker: str) -> Optional[Stock]:
+        row = self._conn().execute(
+            "SELECT ticker, company, price, change FROM stocks WHERE ticker = ?", (ticker,)
+        ).fetchone()
+        return Stock(*row) if row else None
+    
+    def upsert_stocks(self, stocks: Iterable[Stock], record_history: bool = True):
+        rows = [(s.ticker, s.company, s.price, s.change) for s in stocks]
+        
+        def upsert(conn: sqlite3.Connection):
+            conn.executemany(
+                "INSERT INTO stocks (ticker, company, price, change) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (ticker) DO UPDATE SET company = excluded.company, "
+                "price = excluded.price, change = excluded.change",
+                rows,
+            )
+            conn.executemany(REPRICE_HOLDINGS, [(price, ticker) for ticker, _, price, _ in rows])
+            conn.executemany(UPSERT_PRICE_DAY, days)
+            conn.execute(BUMP_STOCKS_VERSION)
+        
+        prices = [(ticker, price, 0) for ticker, _, price, _ in rows] if record_history else []
+        days = _price_day_rows(prices)
+        self._write(upsert)
+        for ticker, price, _ in prices:
+            price_history.record(ticker, price)
+    
+    def update_stock_prices(self, updates: Iterable[Tuple[str, int, float]]):
+        rows = list(updates)
+        
+        def update(conn: sqlite3.Connection):
+            conn.executemany(
+                "UPDATE stocks SET price = ?, change = ? WHERE ticker = ?",
+                [(price, change, ticker) for ticker, price, change in rows],
+            )
+            # holdings_ticker index makes this touch only the holders
+            conn.executemany(REPRICE_HOLDINGS, [(price, ticker) for ticker, price, _ in rows])
+            conn.executemany(UPSERT_PRICE_DAY, days)
+            conn.execute(BUMP_STOCKS_VERSION)
+        
+        days = _price_day_rows([(ticker, price, 0) for ticker, price, _ in rows])
+        self._write(update)
+        for ticker, price, _ in rows:
+            price_history.record(ticker, price)
+    
+    # Portfolio methods
+    def get_portfolio(self, user_id: str) -> Optional[Portfolio]:
+        conn = self._conn()
+        # Both reads in one transaction, so balance and holdings come from
+        # the same commit
+        nested = conn.in_transaction
+        if not nested:
+            conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT balance FROM portfolios WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return None
+            holdings = conn.execute(
+                f"SELECT {HOLDING_COLUMNS} FROM holdings WHERE user_id = ? ORDER BY position",
+                (user_id,),
+            ).fetchall()
+        finally:
+            if not nested:
+                conn.execute("COMMIT")
+        return Portfolio(user_id=user_id, balance=row[0], holdings={h[0]: Holding(*h) for h in holdings})
+    
+    @contextmanager
+    def account_transaction(self, *user_ids: str) -> Iterator[None]:
+        if self._in_transaction():
+            # The outer transaction already excludes every other writer
+            yield
+            return
+        # Stripes queue this process's threads here instead of in SQLite's
+        # busy handler; BEGIN IMMEDIATE takes the write lock before the
+        # first read, which shuts out other workers until COMMIT
+        with account_locks.hold(*user_ids):
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.in_transaction = True
+            try:
+                yield
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._local.in_transaction = False
+    
+    def _portfolio_writer(self, portfolio: Portfolio):
+        """Build fn(conn) that replaces the stored portfolio and its holdings."""
+        holdings = [
+            (portfolio.user_id, h.ticker, h.company, h.shares, h.cost,
+             h.current_price, h.purchase_date, position)
+            for position, h in enumerate(portfolio.holdings.values())
+        ]
+        
+        def update(conn: sqlite3.Connection):
+            conn.execute(INSERT_PORTFOLIO, (portfolio.user_id, portfolio.balance))
+            conn.execute("DELETE FROM holdings WHERE user_id = ?", (portfolio.user_id,))
+            conn.executemany(INSERT_HOLDING, holdings)
+        
+        return update
+    
+    def update_portfolio(self, portfolio: Portfolio):
+        self._write(self._portfolio_writer(portfolio))
+    
+    def update_portfolios(self, portfolios: Iterable[Portfolio]):
+        portfolios = list(portfolios)
+        balances = [(p.user_id, p.balance) for p in portfolios]
+        holdings = [
+            (p.user_id, h.ticker, h.company, h.shares, h.cost, h.current_price, h.purchase_date, position)
+            for p in portfolios
+            for position, h in enumerate(p.holdings.values())
+        ]
+        
+        def update(conn: sqlite3.Connection):
+            conn.executemany(INSERT_PORTFOLIO, balances)
+            conn.executemany("DELETE FROM holdings WHERE user_id = ?", [(p.user_id,) for p in portfolios])
+            conn.executemany(INSERT_HOLDING, holdings)
+        
+        self._write(update)
+    
+    # Transaction methods
+    def get_transactions(self, user_id: str) -> List[Transaction]:
+        return self.get_transactions_page(user_id)[0]
+    
+    def get_transactions_page(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> Tuple[List[Transaction], Optional[int]]:
+        sql = f"SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE user_id = ?"
+        params: list = [user_id]
+        if before is not None:
+            sql += " AND seq < ?"
+            params.append(before)
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            params.append(ticker)
+        if type is not None:
+            sql += " AND type = ?"
+            params.append(type)
+        if date_from is not None:
+            sql += " AND date >= ?"
+            params.append(date_from)
+        if date_to is not None:
+            sql += " AND date < ?"
+            params.append(date_to)
+        sql += " ORDER BY seq DESC"
+        if limit is not None:
+            # Fetch one extra row to learn whether another page exists
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        
+        rows = self._conn().execute(sql, params).fetchall()
+        next_before = None
+        if limit is not None and len(rows) > limit:
+            next_before = rows[limit][0] + 1
+            rows = rows[:limit]
+        return [Transaction(*row[1:]) for row in rows], next_before
+    
+    def iter_transactions(
+        self,
+        user_id: Optional[str] = None,
+        ticker: Optional[str] = None,
+        type: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        batch_size: int = 1_000,
+    ) -> Iterator[List[Transaction]]:
+        # Keyset pagination on seq up to the last row that existed at the
+        # start; no cursor stays open between batches, and each batch uses
+        # the calling thread's connection because the consumer may resume
+        # the generator on a different thread
+        end = self._conn().execute("SELECT COALESCE(MAX(seq), 0) FROM transactions").fetchone()[0]
+        sql = f"SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE seq > ? AND seq <= ?"
+        filters: list = []
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            filters.append(user_id)
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            filters.append(ticker)
+        if type is not None:
+            sql += " AND type = ?"
+            filters.append(type)
+        if date_from is not None:
+            sql += " AND date >= ?"
+            filters.append(date_from)
+        if date_to is not None:
+            sql += " AND date < ?"
+            filters.append(date_to)
+        sql += " ORDER BY seq LIMIT ?"
+        
+        after = 0
+        while True:
+            rows = self._conn().execute(sql, [after, end, *filters, batch_size]).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield [Transaction(*row[1:]) for row in rows]
+    
+    def add_transaction(self, transaction: Transaction):
+        self.add_transactions([transaction])
+    
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        rows = [_transaction_row(t) for t in transactions]
+        self._write(lambda conn: conn.executemany(INSERT_TRANSACTION, rows))
+    
+    def record_trades(self, portfolio: Portfolio, transactions: Iterable[Transaction]):
+        update = self._portfolio_writer(portfolio)
+        rows = [_transaction_row(t) for t in transactions]
+        
+        def record(conn: sqlite3.Connection):
+            update(conn)
+            conn.executemany(INSERT_TRANSACTION, rows)
+        
+        self._write(record)
+    
+    # Order methods
+    @property
+    def orders_version(self) -> int:
+        # Like stocks_version, shared by every worker through the database
+        return self._conn().execute(
+            "SELECT value FROM counters WHERE name = 'orders_version'"
+        ).fetchone()[0]
+    
+    def save_orders(self, orders: Iterable[Order]):
+        rows = [_order_row(o) for o in orders]
+        
+        def save(conn: sqlite3.Connection):
+            conn.executemany(SAVE_ORDER, rows)
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'orders_version'")
+        
+        self._write(save)
+    
+    def get_order(self, order_id: str) -> Optional[Order]:
+        row = self._conn().execute(
+            f"SELECT {ORDER_COLUMNS} FROM orders WHERE id = ?", (order_id,)
+        ).fetchone()
+        return Order(*row) if row else None
+    
+    def get_user_orders(self, user_id: str, active: Optional[bool] = None) -> List[Order]:
+        sql = f"SELECT {ORDER_COLUMNS} FROM orders WHERE user_id = ?"
+        if active is not None:
+            sql += f" AND {OPEN_ORDER}" if active else f" AND NOT {OPEN_ORDER}"
+        return [Order(*row) for row in self._conn().execute(sql + " ORDER BY seq DESC", (user_id,))]
+    
+    def get_active_orders(self) -> List[Order]:
+        rows = self._conn().execute(
+            f"SELECT {ORDER_COLUMNS} FROM orders WHERE {OPEN_ORDER} ORDER BY sequence"
+        )
+        return [Order(*row) for row in rows]
+    
+    def get_reservations(self, user_id: str) -> Tuple[int, Dict[str, int]]:
+        cash = 0
+        shares: Dict[str, int] = {}
+        rows = self._conn().execute(
+            "SELECT side, ticker, SUM(price * (quantity - filled)), SUM(quantity - filled) "
+            f"FROM orders WHERE user_id = ? AND {OPEN_ORDER} GROUP BY side, ticker",
+            (user_id,),
+        )
+        for side, ticker, amount, quantity in rows:
+            if side == "compra":
+                cash += amount
+            else:
+                shares[ticker] = quantity
+        return cash, shares
+    
+    # Price history
+    def record_prices(self, prices: Iterable[Tuple[str, int, int]]):
+        prices = list(prices)
+        days = _price_day_rows(prices)
+        self._write(lambda conn: conn.executemany(UPSERT_PRICE_DAY, days))
+        for ticker, price, volume in prices:
+            price_history.record(ticker, price, volume)
+    
+    def get_price_days(self, ticker: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Bar]:
+        sql = "SELECT day, open, high, low, close, volume FROM price_days WHERE ticker = ?"
+        params: list = [ticker]
+        if start is not None:
+            sql += " AND day >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND day < ?"
+            params.append(end)
+        return self._conn().execute(sql + " ORDER BY day", params).fetchall()
+    
+    # Coordination between worker processes
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        
+        def take(conn: sqlite3.Connection) -> bool:
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+            return row[0] == owner
+        
+        return self._write(take)
+    
+    def release_lease(self, name: str, owner: str):
+        self._write(lambda conn: conn.execute(
+            "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+        ))
+    
+    # Analytics
+    def get_volume_stats(
+        self,
+        group_by: str = "ticker",
+        ticker: Optional[str] = None,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ) -> List[VolumeStats]:
+        if group_by not in GROUP_BY:
+            raise ValueError(f"unknown group_by: {group_by}")
+        column = {"ticker": "ticker", "user": "user_id", "bank": "bank", "type": "type"}[group_by]
+        sql = (
+            f"SELECT {column}, COUNT(*), SUM(shares), SUM(total), "
+            "SUM(CASE WHEN type = 'compra' THEN shares ELSE 0 END), "
+            "SUM(CASE WHEN type = 'venta' THEN shares ELSE 0 END), "
+            "SUM(CASE WHEN type = 'compra' THEN total ELSE 0 END), "
+            "SUM(CASE WHEN type = 'venta' THEN total ELSE 0 END) "
+            "FROM transactions WHERE 1 = 1"
+        )
+        params: list = []
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            params.append(ticker)
+        if date_from is not None:
+            sql += " AND date >= ?"
+            params.append(date_from)
+        if date_to is not None:
+            sql += " AND date < ?"
+            params.append(date_to)
+        sql += f" GROUP BY {column} ORDER BY MIN(seq)"
+        return [VolumeStats(*row) for row in self._conn().execute(sql, params)]
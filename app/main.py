@@ -1,8 +1,54 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from .core.config import settings
-from .api import auth_router, stocks_router, portfolio_router, transactions_router
+from .core.idempotency import idempotency_cache
+from .core.metrics import MetricsMiddleware, registry
+from .core.profiling import ProfilingMiddleware
+from .core.response_cache import response_cache
+from .core.security import token_cache, verify_token
+from .core.password_pool import password_pool
+from .infrastructure.database import db
+from .infrastructure.market_data import create_market_data_engine
+from .infrastructure.broadcast import portfolio_notifier, quote_broadcaster
+from .infrastructure.matching import matching_engine
+from .api import (
+    auth_router,
+    stocks_router,
+    portfolio_router,
+    transactions_router,
+    orders_router,
+    market_router,
+    ws_router,
+    admin_router,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    engine = create_market_data_engine(db)
+    app.state.market_engine = engine
+    if engine:
+        engine.listeners.append(quote_broadcaster.publish)
+        engine.listeners.append(portfolio_notifier.publish)
+    engine_task = asyncio.create_task(engine.run()) if engine else None
+    
+    yield
+    
+    if engine_task:
+        engine_task.cancel()
+        try:
+            await engine_task
+        except asyncio.CancelledError:
+            pass
+    app.state.market_engine = None
+    password_pool.shutdown()
+    db.close()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -10,6 +56,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -21,11 +68,63 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def identify(authorization: str):
+    """(user id, is admin) for a Bearer token, or None."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_id = verify_token(token).get("sub")
+    except HTTPException:
+        return None
+    user = db.get_user_by_id(user_id) if user_id else None
+    if user is None:
+        return None
+    return user_id, user.role == "admin"
+
+
+# Profiles admin-requested, sampled and slow requests
+app.add_middleware(ProfilingMiddleware, identify=identify)
+# Outermost, so latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
+# Component counters, read at scrape time
+registry.callback("token_cache_hits_total", "Verified-token cache hits.", "counter", lambda: token_cache.hits)
+registry.callback("token_cache_misses_total", "Verified-token cache misses.", "counter", lambda: token_cache.misses)
+registry.callback("response_cache_hits_total", "Serialized response cache hits.", "counter", lambda: response_cache.hits)
+registry.callback("response_cache_misses_total", "Serialized response cache misses.", "counter", lambda: response_cache.misses)
+registry.callback("idempotent_replays_total", "Trade retries answered from the idempotency cache.", "counter", lambda: idempotency_cache.replays)
+registry.callback("order_fills_total", "Limit order fills.", "counter", lambda: matching_engine.fills)
+registry.callback("ws_quote_subscribers", "Open /ws/stocks subscriptions.", "gauge", lambda: quote_broadcaster.subscriber_count)
+
+
+def _market(read):
+    """Read the market-data engine at scrape time; 0 while none runs."""
+    def value():
+        engine = getattr(app.state, "market_engine", None)
+        return read(engine) if engine else 0
+    return value
+
+
+registry.callback("market_data_leader", "1 if this worker runs the market-data source.", "gauge", _market(lambda e: int(e.leader)))
+registry.callback("market_ticks_received_total", "Ticks polled from the market-data source.", "counter", _market(lambda e: e.ticks_received))
+registry.callback("market_ticks_applied_total", "Latest-per-ticker prices written to the store.", "counter", _market(lambda e: e.ticks_applied))
+registry.callback("market_batches_total", "Market-data batches applied.", "counter", _market(lambda e: e.batches))
+registry.callback("market_tick_rate", "Ticks per second received over the last interval.", "gauge", _market(lambda e: e.tick_rate))
+registry.callback("market_apply_latency_seconds", "Time to apply the last market-data batch.", "gauge", _market(lambda e: e.apply_latency_ms / 1000))
+registry.callback("market_apply_latency_max_seconds", "Slowest market-data batch apply.", "gauge", _market(lambda e: e.apply_latency_max_ms / 1000))
+registry.callback("market_apply_seconds_total", "Total time spent applying market-data batches.", "counter", _market(lambda e: e.apply_seconds_total))
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(stocks_router)
 app.include_router(portfolio_router)
 app.include_router(transactions_router)
+app.include_router(orders_router)
+app.include_router(market_router)
+app.include_router(ws_router)
+app.include_router(admin_router)
 
 
 @app.get("/", tags=["Health"])
@@ -41,4 +140,12 @@ def root():
 @app.get("/health", tags=["Health"])
 def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    """Prometheus metrics for this worker process."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
@@ -2,4 +2,17 @@
 from .user import UserCreate, UserLogin, UserResponse, LoginResponse
 from .stock import StockResponse, StockHistoryPoint, StockHistoryResponse
 from .portfolio import HoldingResponse, BalanceResponse, PortfolioSummary
-from .transaction import TransactionCreate, TransactionResponse
+from .transaction import TransactionCreate, TransactionLeg, TransactionBatch, TransactionResponse, TransactionExportRow
+from .order import OrderCreate, OrderAmend, OrderResponse, OrderBookLevel, OrderBookResponse
+from .market import MarketStatusResponse
+from .admin import VolumeStatsResponse, ProfileSummaryResponse
+from .serializers import (
+    ResponseSerializer,
+    stock_serializer,
+    holding_serializer,
+    transaction_serializer,
+    transaction_export_serializer,
+    order_serializer,
+    volume_stats_serializer,
+    profile_serializer,
+)
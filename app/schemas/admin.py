@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class VolumeStatsResponse(BaseModel):
+    """Schema for one group of aggregated trading volume."""
+    key: str  # Ticker, user id, bank or transaction type
+    trades: int
+    shares: int
+    amount: float
+    buyShares: int
+    sellShares: int
+    buyAmount: float
+    sellAmount: float
+
+
+class ProfileSummaryResponse(BaseModel):
+    """Schema for one captured request profile."""
+    id: str
+    reason: str  # header, sample or slow
+    method: str
+    route: str
+    path: str
+    userId: Optional[str] = None
+    status: int
+    durationMs: float
+    date: str
+    samples: int
+    topFrames: List[str]
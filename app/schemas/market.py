@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+
+class MarketStatusResponse(BaseModel):
+    """Schema for market-data engine status and metrics."""
+    running: bool
+    source: str
+    leader: bool = False  # This worker runs the source; others follow its prices
+    ticksReceived: int = 0
+    ticksApplied: int = 0
+    batches: int = 0
+    tickRate: float = 0.0  # Ticks per second over the last interval
+    applyLatencyMs: float = 0.0
+    applyLatencyAvgMs: float = 0.0
+    applyLatencyMaxMs: float = 0.0
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+
+class OrderCreate(BaseModel):
+    """Schema for placing a limit order."""
+    ticker: str
+    side: Literal["compra", "venta"]
+    price: float = Field(ge=0.01)  # Limit price, córdobas
+    quantity: int = Field(gt=0)
+    bank: str
+
+
+class OrderAmend(BaseModel):
+    """Schema for amending an open order; omitted fields stay unchanged."""
+    price: Optional[float] = Field(None, ge=0.01)
+    quantity: Optional[int] = Field(None, gt=0)  # New total, including filled shares
+
+
+class OrderResponse(BaseModel):
+    """Schema for order response."""
+    id: str
+    ticker: str
+    side: Literal["compra", "venta"]
+    price: float
+    quantity: int
+    filled: int
+    remaining: int
+    avgPrice: float
+    status: Literal["abierta", "parcial", "ejecutada", "cancelada"]
+    date: str
+    bank: str
+
+
+class OrderBookLevel(BaseModel):
+    """Schema for one price level of an order book."""
+    price: float
+    quantity: int
+    orders: int
+
+
+class OrderBookResponse(BaseModel):
+    """Schema for order book depth."""
+    ticker: str
+    bids: List[OrderBookLevel]
+    asks: List[OrderBookLevel]
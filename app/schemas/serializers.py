@@ -0,0 +1,200 @@
+"""
+Direct JSON serializers for list endpoints.
+Building a response model per domain object and letting FastAPI
+validate and serialize it again through `response_model` costs two full
+conversions per row. These serializers read the domain attributes
+straight into plain rows and encode them with pydantic-core in one
+pass. Routers keep `response_model` for the OpenAPI schema and return
+the bytes in a Response, which FastAPI sends as-is.
+
+This is also the API edge for units: centavos become córdobas and epoch
+seconds become date strings here.
+"""
+import csv
+import io
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from ..domain.units import format_date, format_datetime, from_centavos
+from .stock import StockResponse
+from .portfolio import HoldingResponse
+from .transaction import TransactionResponse, TransactionExportRow
+from .order import OrderResponse
+from .admin import VolumeStatsResponse, ProfileSummaryResponse
+
+
+class ResponseSerializer:
+    """Serialize domain objects to JSON in the shape of a response model."""
+    
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        fields: Dict[str, str],
+        formats: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ):
+        """
+        `fields` maps each response field to the domain attribute it reads;
+        `formats` converts stored values (centavos, epoch seconds) for output.
+        """
+        if list(fields) != list(model.model_fields):
+            raise ValueError(f"{model.__name__} fields do not match the serializer mapping")
+        self.model = model
+        self._keys = tuple(fields)
+        self._get = attrgetter(*fields.values())
+        self._formats = tuple(
+            (self._keys.index(name), fn) for name, fn in (formats or {}).items()
+        )
+    
+    def _values(self, obj: Any) -> list:
+        values = list(self._get(obj))
+        for i, fn in self._formats:
+            values[i] = fn(values[i])
+        return values
+    
+    def row(self, obj: Any) -> Dict[str, Any]:
+        return dict(zip(self._keys, self._values(obj)))
+    
+    def rows(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        keys, values = self._keys, self._values
+        return [dict(zip(keys, values(obj))) for obj in objs]
+    
+    def dump_json(self, obj: Any) -> bytes:
+        return to_json(self.row(obj))
+    
+    def dump_json_many(self, objs: Iterable[Any]) -> bytes:
+        return to_json(self.rows(objs))
+    
+    def dump_ndjson(self, objs: Iterable[Any]) -> bytes:
+        """One JSON object per line."""
+        return b"".join([self.dump_json(obj) + b"\n" for obj in objs])
+    
+    def csv_header(self) -> bytes:
+        return (",".join(self._keys) + "\r\n").encode()
+    
+    def dump_csv(self, objs: Iterable[Any]) -> bytes:
+        """CSV rows in field order, without the header."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self._values(obj) for obj in objs)
+        return buffer.getvalue().encode()
+    
+    def response(
+        self,
+        objs: Iterable[Any],
+        headers: Optional[Dict[str, str]] = None,
+        status_code: int = 200,
+    ) -> Response:
+        """JSON list response for `objs`."""
+        return Response(
+            content=self.dump_json_many(objs),
+            status_code=status_code,
+            media_type="application/json",
+            headers=headers,
+        )
+
+
+stock_serializer = ResponseSerializer(StockResponse, {
+    "ticker": "ticker",
+    "company": "company",
+    "price": "price",
+    "change": "change",
+}, formats={"price": from_centavos})
+
+holding_serializer = ResponseSerializer(HoldingResponse, {
+    "ticker": "ticker",
+    "company": "company",
+    "shares": "shares",
+    "avgPrice": "avg_price",
+    "currentPrice": "current_price",
+    "purchaseDate": "purchase_date",
+}, formats={
+    "avgPrice": from_centavos,
+    "currentPrice": from_centavos,
+    "purchaseDate": format_date,
+})
+
+transaction_serializer = ResponseSerializer(TransactionResponse, {
+    "id": "id",
+    "type": "type",
+    "ticker": "ticker",
+    "company": "company",
+    "shares": "shares",
+    "price": "price",
+    "total": "total",
+    "date": "date",
+    "bank": "bank",
+}, formats={
+    "price": from_centavos,
+    "total": from_centavos,
+    "date": format_datetime,
+})
+
+transaction_export_serializer = ResponseSerializer(TransactionExportRow, {
+    "id": "id",
+    "type": "type",
+    "ticker": "ticker",
+    "company": "company",
+    "shares": "shares",
+    "price": "price",
+    "total": "total",
+    "date": "date",
+    "bank": "bank",
+    "userId": "user_id",
+}, formats={
+    "price": from_centavos,
+    "total": from_centavos,
+    "date": format_datetime,
+})
+
+order_serializer = ResponseSerializer(OrderResponse, {
+    "id": "id",
+    "ticker": "ticker",
+    "side": "side",
+    "price": "price",
+    "quantity": "quantity",
+    "filled": "filled",
+    "remaining": "remaining",
+    "avgPrice": "avg_price",
+    "status": "status",
+    "date": "date",
+    "bank": "bank",
+}, formats={
+    "price": from_centavos,
+    "avgPrice": from_centavos,
+    "date": format_datetime,
+})
+
+volume_stats_serializer = ResponseSerializer(VolumeStatsResponse, {
+    "key": "key",
+    "trades": "trades",
+    "shares": "shares",
+    "amount": "amount",
+    "buyShares": "buy_shares",
+    "sellShares": "sell_shares",
+    "buyAmount": "buy_amount",
+    "sellAmount": "sell_amount",
+}, formats={
+    "amount": from_centavos,
+    "buyAmount": from_centavos,
+    "sellAmount": from_centavos,
+})
+
+profile_serializer = ResponseSerializer(ProfileSummaryResponse, {
+    "id": "id",
+    "reason": "reason",
+    "method": "method",
+    "route": "route",
+    "path": "path",
+    "userId": "user_id",
+    "status": "status",
+    "durationMs": "duration_ms",
+    "date": "date",
+    "samples": "samples",
+    "topFrames": "top_frames",
+}, formats={
+    "durationMs": lambda ms: round(ms, 2),
+    "date": format_datetime,
+})
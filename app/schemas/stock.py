@@ -14,7 +14,11 @@ class StockResponse(BaseModel):
 class StockHistoryPoint(BaseModel):
     """Single point in stock history."""
     date: str
-    value: float
+    value: float  # Closing price of the bucket
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    volume: Optional[int] = None
 
 
 class StockHistoryResponse(BaseModel):
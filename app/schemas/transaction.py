@@ -1,14 +1,24 @@
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, Field
+from typing import List, Literal
 
 
 class TransactionCreate(BaseModel):
     """Schema for creating a transaction (buy/sell)."""
     ticker: str
-    shares: int
+    shares: int = Field(gt=0)
     bank: str
 
 
+class TransactionLeg(TransactionCreate):
+    """One buy or sell of a batch."""
+    type: Literal["compra", "venta"]
+
+
+class TransactionBatch(BaseModel):
+    """Schema for an all-or-nothing batch of buys and sells."""
+    legs: List[TransactionLeg] = Field(min_length=1, max_length=100)
+
+
 class TransactionResponse(BaseModel):
     """Schema for transaction response."""
     id: str
@@ -20,3 +30,8 @@ class TransactionResponse(BaseModel):
     total: float
     date: str
     bank: str
+
+
+class TransactionExportRow(TransactionResponse):
+    """One row of a transaction export."""
+    userId: str
@@ -0,0 +1,98 @@
+"""
+Benchmark volume aggregates: object scan vs columnar ledger.
+
+Compares GET /admin/stats/volume's backends on the same rows: a loop over
+Transaction objects (COLUMNAR_LEDGER=false), the columnar ledger with
+NumPy, and the columnar ledger's pure-Python fallback. Object rows are
+capped at 1M to keep memory reasonable; the columnar ledger also runs at
+10M rows.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_analytics
+"""
+import random
+import time
+from array import array
+
+import app.infrastructure.columnar as columnar
+from app.domain.models import Transaction
+from app.infrastructure.columnar import ColumnarLedger
+from app.infrastructure.database import InMemoryDatabase
+
+OBJECT_ROWS = 1_000_000
+COLUMNAR_ROWS = [1_000_000, 10_000_000]
+TICKERS = ["LAFISE", "BANCEN", "AGRI", "ENITEL", "CEMEX"]
+BANKS = ["BAC Nicaragua", "Banpro", "LAFISE Bancentro", "Banco Ficohsa"]
+START = 1_704_067_200  # 2024-01-01
+# One month in the middle of the year
+QUERY = {"group_by": "ticker", "ticker": None, "date_from": START + 180 * 86400, "date_to": START + 210 * 86400}
+
+
+def make_objects(n: int, rng: random.Random):
+    for i in range(n):
+        shares = rng.randint(1, 500)
+        price = rng.randint(5_000, 15_000)
+        yield Transaction(
+            f"tx-{i}", str(i % 10_000), "compra" if rng.random() < 0.6 else "venta",
+            rng.choice(TICKERS), "Empresa", shares, price, shares * price,
+            START + i * 31_536_000 // n, rng.choice(BANKS),
+        )
+
+
+def fill_columns(ledger: ColumnarLedger, n: int, rng: random.Random):
+    """Bulk-load random rows straight into the columns."""
+    for t in TICKERS:
+        ledger.tickers.encode(t)
+    for b in BANKS:
+        ledger.banks.encode(b)
+    for u in range(10_000):
+        ledger.users.encode(str(u))
+    shares = [rng.randint(1, 500) for _ in range(n)]
+    price = [rng.randint(5_000, 15_000) for _ in range(n)]
+    ledger.shares = array("q", shares)
+    ledger.price = array("q", price)
+    ledger.total = array("q", map(int.__mul__, shares, price))
+    ledger.timestamp = array("q", (START + i * 31_536_000 // n for i in range(n)))
+    ledger.type = array("b", (rng.random() >= 0.6 for _ in range(n)))
+    ledger.ticker = array("i", (rng.randrange(len(TICKERS)) for _ in range(n)))
+    ledger.user = array("i", (i % 10_000 for i in range(n)))
+    ledger.bank = array("i", (rng.randrange(len(BANKS)) for _ in range(n)))
+
+
+def best_ms(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'backend':<22}{'rows':>12}{'full scan ms':>14}{'month ms':>10}")
+    
+    db = InMemoryDatabase(columnar=False)
+    db.transactions.extend(make_objects(OBJECT_ROWS, rng))
+    full = best_ms(lambda: db.get_volume_stats(), 3)
+    month = best_ms(lambda: db.get_volume_stats(**QUERY), 3)
+    print(f"{'objects':<22}{OBJECT_ROWS:>12}{full:>14.1f}{month:>10.1f}")
+    del db
+    
+    for rows in COLUMNAR_ROWS:
+        ledger = ColumnarLedger()
+        fill_columns(ledger, rows, rng)
+        if columnar.np is not None:
+            full = best_ms(lambda: ledger.volume())
+            month = best_ms(lambda: ledger.volume(**QUERY))
+            print(f"{'columnar (numpy)':<22}{rows:>12}{full:>14.1f}{month:>10.1f}")
+        if rows <= OBJECT_ROWS:
+            np, columnar.np = columnar.np, None
+            full = best_ms(lambda: ledger.volume(), 3)
+            month = best_ms(lambda: ledger.volume(**QUERY), 3)
+            columnar.np = np
+            print(f"{'columnar (python)':<22}{rows:>12}{full:>14.1f}{month:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Load test for the API routes, with JSON results comparable across commits.
+
+Seeds a synthetic dataset (benchmarks/dataset.py), then runs scripted
+workloads against app.main:app, either in-process through httpx's ASGI
+transport or over HTTP against a uvicorn server in a child process:
+
+- login_storm: concurrent POST /auth/login (bcrypt on the password pool)
+- quote_polling: stock list, quotes, order books and market status
+- trade_bursts: buys, sells, batches and limit orders in bursts
+- history_reads: transaction pages, portfolios, price history, admin stats
+
+Requests are generated up front from the seed, so every run sends the
+same requests in the same order. For each workload the JSON report has
+throughput and, per route template, the request count, non-2xx count
+and p50/p95/p99/max latency in milliseconds. Streaming routes
+(/portfolio/stream, /ws/stocks) have their own benchmarks.
+
+Usage:
+    SECRET_KEY=bench MARKET_DATA_SOURCE=off python -m benchmarks.bench_api [options] > run.json
+    SECRET_KEY=bench python -m benchmarks.bench_api --compare base.json run.json
+
+Options:
+    --target asgi|uvicorn   transport (default asgi)
+    --users N --holdings M --transactions K   dataset size
+    --workloads a,b         subset to run, in the order given
+    --requests N            requests per workload instead of the defaults
+    --concurrency N         requests in flight (default 32)
+    --seed N                dataset and request seed (default 1)
+    --output FILE           write the JSON there instead of stdout
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.infrastructure.database import db
+from app.main import app
+from benchmarks.dataset import PASSWORD, Dataset, build_dataset
+
+ADMIN_ID = "1"  # Demo admin
+
+
+@dataclass
+class Call:
+    """One scripted request; `route` is the template it is reported under."""
+    route: str
+    method: str
+    url: str
+    json: Optional[object] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@lru_cache(maxsize=None)
+def _auth(user_id: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': user_id})}"}
+
+
+def login_storm(rng: random.Random, data: Dataset, count: int) -> List[Call]:
+    return [
+        Call("POST /auth/login", "POST", "/auth/login",
+             json={"username": rng.choice(data.usernames), "password": PASSWORD})
+        for _ in range(count)
+    ]
+
+
+def quote_polling(rng: random.Random, data: Dataset, count: int) -> List[Call]:
+    calls = []
+    for _ in range(count):
+        ticker = rng.choice(data.tickers)
+        roll = rng.random()
+        if roll < 0.4:
+            calls.append(Call("GET /stocks", "GET", "/stocks"))
+        elif roll < 0.8:
+            calls.append(Call("GET /stocks/{ticker}", "GET", f"/stocks/{ticker}"))
+        elif roll < 0.9:
+            headers = _auth(rng.choice(data.user_ids))
+            calls.append(Call("GET /orders/book/{ticker}", "GET", f"/orders/book/{ticker}", headers=headers))
+        else:
+            calls.append(Call("GET /market/status", "GET", "/market/status"))
+    return calls
+
+
+def trade_bursts(rng: random.Random, data: Dataset, count: int) -> List[Call]:
+    calls = []
+    while len(calls) < count:
+        # A burst: one user fires several trades back to back
+        user_id = rng.choice(data.user_ids)
+        headers = _auth(user_id)
+        held = data.holdings[user_id]
+        for _ in range(rng.randint(2, 8)):
+            roll = rng.random()
+            if roll < 0.35:
+                body = {"ticker": rng.choice(data.tickers), "shares": rng.randint(1, 10), "bank": "BAC Nicaragua"}
+                calls.append(Call("POST /transactions/buy", "POST", "/transactions/buy", json=body, headers=headers))
+            elif roll < 0.7 and held:
+                body = {"ticker": rng.choice(held), "shares": 1, "bank": "BAC Nicaragua"}
+                calls.append(Call("POST /transactions/sell", "POST", "/transactions/sell", json=body, headers=headers))
+            elif roll < 0.85:
+                legs = [
+                    {"ticker": rng.choice(data.tickers), "shares": rng.randint(1, 5), "type": "compra", "bank": "Banpro"}
+                    for _ in range(rng.randint(2, 5))
+                ]
+                calls.append(Call("POST /transactions/batch", "POST", "/transactions/batch", json={"legs": legs}, headers=headers))
+            else:
+                body = {
+                    "ticker": rng.choice(data.tickers),
+                    "side": "compra",
+                    "price": round(rng.uniform(10, 200), 2),
+                    "quantity": rng.randint(1, 20),
+                    "bank": "LAFISE",
+                }
+                calls.append(Call("POST /orders", "POST", "/orders", json=body, headers=headers))
+    return calls[:count]
+
+
+def history_reads(rng: random.Random, data: Dataset, count: int) -> List[Call]:
+    admin = _auth(ADMIN_ID)
+    calls = []
+    for _ in range(count):
+        headers = _auth(rng.choice(data.user_ids))
+        roll = rng.random()
+        if roll < 0.3:
+            calls.append(Call("GET /transactions", "GET", "/transactions?limit=50", headers=headers))
+        elif roll < 0.4:
+            calls.append(Call("GET /transactions", "GET", "/transactions", headers=headers))
+        elif roll < 0.55:
+            calls.append(Call("GET /portfolio", "GET", "/portfolio", headers=headers))
+        elif roll < 0.65:
+            calls.append(Call("GET /portfolio/holdings", "GET", "/portfolio/holdings", headers=headers))
+        elif roll < 0.7:
+            calls.append(Call("GET /portfolio/balance", "GET", "/portfolio/balance", headers=headers))
+        elif roll < 0.75:
+            calls.append(Call("GET /auth/me", "GET", "/auth/me", headers=headers))
+        elif roll < 0.8:
+            calls.append(Call("GET /orders", "GET", "/orders", headers=headers))
+        elif roll < 0.95:
+            ticker = rng.choice(data.tickers)
+            interval = rng.choice(("daily", "weekly", "monthly"))
+            calls.append(Call("GET /stocks/{ticker}/history", "GET", f"/stocks/{ticker}/history?interval={interval}"))
+        else:
+            group_by = rng.choice(("ticker", "user", "bank", "type"))
+            calls.append(Call("GET /admin/stats/volume", "GET", f"/admin/stats/volume?groupBy={group_by}", headers=admin))
+    return calls
+
+
+# Name -> (request builder, default request count)
+WORKLOADS: Dict[str, tuple] = {
+    "login_storm": (login_storm, 100),
+    "quote_polling": (quote_polling, 5_000),
+    "trade_bursts": (trade_bursts, 2_000),
+    "history_reads": (history_reads, 2_000),
+}
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+async def run_workload(client: httpx.AsyncClient, calls: List[Call], concurrency: int) -> dict:
+    latencies: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    pending = iter(calls)
+    
+    async def worker():
+        for call in pending:
+            start = time.perf_counter()
+            response = await client.request(call.method, call.url, json=call.json, headers=call.headers)
+            latencies.setdefault(call.route, []).append((time.perf_counter() - start) * 1000)
+            if not 200 <= response.status_code < 300:
+                failures[call.route] = failures.get(call.route, 0) + 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    
+    all_latencies = [ms for samples in latencies.values() for ms in samples]
+    return {
+        "requests": len(calls),
+        "non_2xx": sum(failures.values()),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(calls) / elapsed, 1),
+        **summarize(all_latencies),
+        "routes": {
+            route: {"requests": len(samples), "non_2xx": failures.get(route, 0), **summarize(samples)}
+            for route, samples in sorted(latencies.items())
+        },
+    }
+
+
+class UvicornServer:
+    """
+    uvicorn serving app.main:app in a child process, so the server does
+    not share a GIL with the load generator. The child seeds the same
+    dataset and reports it back on stdout.
+    """
+    
+    def __init__(self, args):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.command = [
+            sys.executable, "-m", "benchmarks.bench_api", "--serve", str(self.port),
+            "--users", str(args.users), "--holdings", str(args.holdings),
+            "--transactions", str(args.transactions), "--seed", str(args.seed),
+        ]
+    
+    def __enter__(self) -> Dataset:
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("uvicorn server exited before loading the dataset")
+        data = Dataset(**json.loads(line))
+        for _ in range(500):
+            try:
+                httpx.get(f"{self.base_url}/health")
+                return data
+            except httpx.TransportError:
+                time.sleep(0.02)
+        raise RuntimeError("uvicorn server did not start")
+    
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+def serve(args):
+    """Child side of UvicornServer."""
+    import uvicorn
+    
+    data = build_dataset(db, args.users, args.holdings, args.transactions, args.seed)
+    print(json.dumps(asdict(data)), flush=True)
+    uvicorn.run(app, host="127.0.0.1", port=args.serve, log_level="warning", access_log=False)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args, data: Dataset, base_url: str, transport: Optional[httpx.AsyncBaseTransport]) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+        for name in args.workloads:
+            build, default_count = WORKLOADS[name]
+            # One stream per workload, so a subset run sends the same requests
+            rng = random.Random(f"{args.seed}:{name}")
+            calls = build(rng, data, args.requests or default_count)
+            results[name] = await run_workload(client, calls, args.concurrency)
+            print(f"{name:<14} {results[name]['throughput_rps']:>9,.1f} req/s  "
+                  f"p50={results[name]['p50_ms']:.2f}ms p99={results[name]['p99_ms']:.2f}ms  "
+                  f"non-2xx={results[name]['non_2xx']}", file=sys.stderr)
+    return results
+
+
+def run(args) -> dict:
+    start = time.perf_counter()
+    if args.target == "uvicorn":
+        server = UvicornServer(args)
+        with server as data:
+            print(f"server ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            workloads = asyncio.run(run_suite(args, data, server.base_url, None))
+    else:
+        data = build_dataset(db, args.users, args.holdings, args.transactions, args.seed)
+        print(f"dataset loaded in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        workloads = asyncio.run(run_suite(args, data, "http://bench", httpx.ASGITransport(app=app)))
+    
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.target,
+            "database": settings.DATABASE_BACKEND,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dataset": {"users": args.users, "holdings": args.holdings, "transactions": args.transactions},
+        },
+        "workloads": workloads,
+    }
+
+
+def _change(old: float, new: float) -> str:
+    return f"{(new - old) / old * 100:+6.1f}%" if old else "    n/a"
+
+
+def compare(base_path: str, run_path: str):
+    """Print per-route p50/p99 and throughput changes between two reports."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(run_path) as f:
+        new = json.load(f)
+    print(f"{base['meta']['commit']} -> {new['meta']['commit']}")
+    for name, workload in new["workloads"].items():
+        old = base["workloads"].get(name)
+        if old is None:
+            continue
+        print(f"\n{name}: {old['throughput_rps']:,.1f} -> {workload['throughput_rps']:,.1f} req/s "
+              f"({_change(old['throughput_rps'], workload['throughput_rps']).strip()})")
+        for route, stats in workload["routes"].items():
+            before = old["routes"].get(route)
+            if before is None:
+                continue
+            print(f"  {route:<32} p50 {before['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f}ms {_change(before['p50_ms'], stats['p50_ms'])}"
+                  f"   p99 {before['p99_ms']:8.2f} -> {stats['p99_ms']:8.2f}ms {_change(before['p99_ms'], stats['p99_ms'])}")
+
+
+def main(argv: List[str]):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_api")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "RUN"))
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--holdings", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--workloads", type=lambda s: s.split(","), default=list(WORKLOADS))
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    if args.serve:
+        serve(args)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+    
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,154 @@
+"""
+Concurrent stress test for per-account trade execution.
+
+Worker threads fire random buys, sells, batches and limit orders at the
+trade endpoints (called directly, as FastAPI's threadpool would) for a
+pool of users, while another thread keeps applying price ticks. Afterwards
+every account is checked against its transaction log:
+
+- balance = starting balance - buys + sells
+- shares per ticker = bought - sold
+- running cost/market totals match a recompute from the holdings
+
+Reports trades/sec and exits non-zero on any violated invariant. Runs on
+the configured backend (DATABASE_BACKEND=sqlite works too).
+
+Usage:
+    SECRET_KEY=bench MARKET_DATA_SOURCE=off python -m benchmarks.bench_concurrent_trades [threads] [trades]
+"""
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Response
+
+from app.api.orders import place_order
+from app.api.transactions import batch_transactions, buy_stock, sell_stock
+from app.domain.models import Portfolio
+from app.infrastructure.accounts import account_locks
+from app.infrastructure.database import db
+from app.infrastructure.matching import matching_engine
+from app.schemas.order import OrderCreate
+from app.schemas.transaction import TransactionBatch, TransactionCreate, TransactionLeg
+
+USERS = 8
+START_BALANCE = 10_000_000  # Centavos
+START_SHARES = 1_000
+
+
+def seed(users, tickers):
+    for user_id in users:
+        portfolio = Portfolio(user_id=user_id, balance=START_BALANCE)
+        for stock in tickers:
+            portfolio.buy(stock.ticker, stock.company, START_SHARES, stock.price, 0)
+        with account_locks.hold(user_id):
+            db.update_portfolio(portfolio)
+
+
+def trade(rng: random.Random, user_id: str, tickers) -> int:
+    """One random trade; returns 1 if it went through."""
+    ticker = rng.choice(tickers).ticker
+    roll = rng.random()
+    call = {"response": Response(), "idempotency_key": None, "user_id": user_id}
+    try:
+        if roll < 0.35:
+            buy_stock(TransactionCreate(ticker=ticker, shares=rng.randint(1, 20), bank="BAC"), **call)
+        elif roll < 0.7:
+            sell_stock(TransactionCreate(ticker=ticker, shares=rng.randint(1, 20), bank="BAC"), **call)
+        elif roll < 0.85:
+            legs = [
+                TransactionLeg(
+                    ticker=rng.choice(tickers).ticker, shares=rng.randint(1, 10),
+                    type=rng.choice(("compra", "venta")), bank="Banpro",
+                )
+                for _ in range(rng.randint(2, 5))
+            ]
+            batch_transactions(TransactionBatch(legs=legs), **call)
+        else:
+            stock = db.get_stock(ticker)
+            place_order(OrderCreate(
+                ticker=ticker, side=rng.choice(("compra", "venta")),
+                price=stock.price / 100 * rng.uniform(0.98, 1.02),
+                quantity=rng.randint(1, 20), bank="LAFISE",
+            ), **call)
+    except HTTPException:
+        return 0  # Insufficient balance or shares is an expected outcome
+    return 1
+
+
+def ticker_feed(stop: threading.Event, tickers):
+    rng = random.Random(99)
+    while not stop.is_set():
+        db.update_stock_prices([
+            (s.ticker, max(100, s.price + rng.randint(-50, 50)), 0.0) for s in tickers
+        ])
+        time.sleep(0.001)
+
+
+def check(users, tickers) -> list:
+    errors = []
+    for user_id in users:
+        portfolio = db.get_portfolio(user_id)
+        balance = START_BALANCE
+        shares = Counter({s.ticker: START_SHARES for s in tickers})
+        for t in db.get_transactions(user_id):
+            if t.type == "compra":
+                balance -= t.total
+                shares[t.ticker] += t.shares
+            else:
+                balance += t.total
+                shares[t.ticker] -= t.shares
+        if portfolio.balance != balance:
+            errors.append(f"user {user_id}: balance {portfolio.balance} != ledger {balance}")
+        held = {h.ticker: h.shares for h in portfolio.holdings.values()}
+        expected = {ticker: n for ticker, n in shares.items() if n}
+        if held != expected:
+            errors.append(f"user {user_id}: holdings {held} != ledger {expected}")
+        cost_basis, market_value = portfolio.cost_basis, portfolio.market_value
+        portfolio.recompute()
+        if (cost_basis, market_value) != (portfolio.cost_basis, portfolio.market_value):
+            errors.append(f"user {user_id}: running totals drifted")
+        if matching_engine.reserved_cash(user_id) > portfolio.balance:
+            errors.append(f"user {user_id}: reserved cash exceeds balance")
+    return errors
+
+
+def main(threads: int, trades: int):
+    # Switch threads often to shake out interleavings
+    sys.setswitchinterval(1e-5)
+    tickers = db.get_all_stocks()
+    users = [f"stress-{i}" for i in range(USERS)]
+    seed(users, tickers)
+    
+    stop = threading.Event()
+    feed = threading.Thread(target=ticker_feed, args=(stop, tickers), daemon=True)
+    feed.start()
+    
+    def worker(seed_value: int) -> int:
+        rng = random.Random(seed_value)
+        return sum(trade(rng, rng.choice(users), tickers) for _ in range(trades // threads))
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        done = sum(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    feed.join()
+    
+    print(f"{threads} threads, {trades} attempts, {done} executed in {elapsed:.2f}s ({trades / elapsed:,.0f}/s)")
+    print(f"order fills: {matching_engine.fills}")
+    errors = check(users, tickers)
+    for error in errors[:20]:
+        print("FAIL", error)
+    print("invariants:", "FAILED" if errors else "ok")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20_000,
+    )
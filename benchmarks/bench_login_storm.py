@@ -0,0 +1,65 @@
+"""
+Measure GET /stocks latency while a storm of logins runs concurrently.
+
+Drives app.main:app in-process through httpx's ASGI transport. With bcrypt
+on the password pool, /stocks p99 should stay close to the idle baseline.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_login_storm [logins] [polls]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from app.main import app
+
+USER = {"name": "Bench", "email": "bench@bolsa.ni", "username": "bench", "password": "bench-password"}
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def poll_stocks(client: httpx.AsyncClient, count: int) -> list:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.get("/stocks")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def login_storm(client: httpx.AsyncClient, count: int) -> list:
+    credentials = {"username": USER["username"], "password": USER["password"]}
+    responses = await asyncio.gather(*(client.post("/auth/login", json=credentials) for _ in range(count)))
+    return [r.status_code for r in responses]
+
+
+def report(label: str, latencies: list):
+    print(
+        f"{label:<14} p50={statistics.median(latencies):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms max={max(latencies):7.2f}ms"
+    )
+
+
+async def main(logins: int, polls: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/auth/register", json=USER)
+        
+        report("idle", await poll_stocks(client, polls))
+        
+        storm = asyncio.create_task(login_storm(client, logins))
+        report("during logins", await poll_stocks(client, polls))
+        codes = await storm
+        print(f"logins: {codes.count(200)} ok, {codes.count(503)} rejected (503)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [50, 200][len(args):])))
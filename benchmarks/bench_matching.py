@@ -0,0 +1,106 @@
+"""
+Throughput and latency of the limit order matching engine.
+
+Places random limit orders from many users around a drifting mid price
+on a few tickers, with a share of cancels and amends mixed in, against
+an in-memory database. Reports orders/sec and a latency histogram for
+the calls that produced at least one fill (those settle portfolios and
+write transactions), next to the calls that only rested.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_matching [orders]
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.domain.models import Portfolio, Stock
+from app.infrastructure.database import InMemoryDatabase
+from app.infrastructure.matching import MatchingEngine, OrderError
+
+USERS = 1_000
+STOCKS = [Stock("LAFISE", "LAFISE Nicaragua", 14_000, 0.0), Stock("AGRI", "Agrícola Nicaragua", 5_500, 0.0)]
+# Upper bounds of the latency buckets, in microseconds
+BUCKETS_US = [10, 20, 50, 100, 200, 500, 1_000, 5_000]
+
+
+def histogram(samples_us):
+    counts = [0] * (len(BUCKETS_US) + 1)
+    for sample in samples_us:
+        for i, bound in enumerate(BUCKETS_US):
+            if sample <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<= {b} us" for b in BUCKETS_US] + [f"> {BUCKETS_US[-1]} us"]
+    total = len(samples_us) or 1
+    for label, count in zip(labels, counts):
+        print(f"  {label:<12}{count:>9}  {'#' * round(40 * count / total)}")
+
+
+def main(count: int):
+    rng = random.Random(3)
+    db = InMemoryDatabase()
+    for stock in STOCKS:
+        db.stocks[stock.ticker] = stock
+    users = [str(i) for i in range(USERS)]
+    for user_id in users:
+        portfolio = Portfolio(user_id=user_id, balance=10**12)
+        for stock in STOCKS:
+            portfolio.buy(stock.ticker, stock.company, 10**6, stock.price, 0)
+        db.update_portfolio(portfolio)
+    engine = MatchingEngine(db)
+    mids = {stock.ticker: stock.price for stock in STOCKS}
+    
+    fill_us, rest_us = [], []
+    live = []
+    start = time.perf_counter()
+    for _ in range(count):
+        user_id = rng.choice(users)
+        roll = rng.random()
+        if roll < 0.1 and live:
+            # Cancel a random earlier order, possibly already done
+            order = live.pop(rng.randrange(len(live)))
+            try:
+                engine.cancel(order.user_id, order.id)
+            except OrderError:
+                pass
+            continue
+        if roll < 0.15 and live:
+            order = live[rng.randrange(len(live))]
+            try:
+                engine.amend(order.user_id, order.id, "Empresa", quantity=order.filled + 1)
+            except OrderError:
+                pass
+            continue
+        
+        stock = rng.choice(STOCKS)
+        mid = mids[stock.ticker] = max(100, mids[stock.ticker] + rng.randint(-5, 5))
+        side = rng.choice(("compra", "venta"))
+        # Mostly passive prices, some aggressive ones that cross the spread
+        offset = rng.randint(-20, 60)
+        price = mid - offset if side == "compra" else mid + offset
+        fills = engine.fills
+        t0 = time.perf_counter()
+        order = engine.place(user_id, stock, side, price, rng.randint(1, 200), "Banpro")
+        elapsed_us = (time.perf_counter() - t0) * 1e6
+        (fill_us if engine.fills > fills else rest_us).append(elapsed_us)
+        if order.active:
+            live.append(order)
+    elapsed = time.perf_counter() - start
+    
+    print(f"{count} operations in {elapsed:.2f}s: {count / elapsed:,.0f} ops/sec")
+    print(f"fills: {engine.fills}, transactions: {len(db.transactions)}, resting: {engine.metrics()['resting_orders']}")
+    for name, samples in (("matched", fill_us), ("rested", rest_us)):
+        if not samples:
+            continue
+        samples.sort()
+        p99 = samples[int(len(samples) * 0.99)]
+        print(f"\n{name}: {len(samples)} orders, median {statistics.median(samples):.1f} us, p99 {p99:.1f} us")
+        histogram(samples)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
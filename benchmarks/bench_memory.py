@@ -0,0 +1,97 @@
+"""
+Benchmark memory per transaction row.
+
+"before" is the previous Transaction layout: a plain dataclass with a
+per-instance __dict__, float money, a "YYYY-MM-DD HH:MM" date string and
+fresh strings per row (as rows come back from storage). "after" is the
+current slotted model with integer centavos, epoch dates and interned
+strings.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_memory
+"""
+import gc
+import tracemalloc
+from dataclasses import dataclass
+
+from app.domain.models import Transaction
+
+ROWS = 200_000
+TICKERS = 50
+BANKS = ["BAC Nicaragua", "Banpro", "LAFISE Bancentro", "Banco Ficohsa"]
+
+
+@dataclass
+class LegacyTransaction:
+    id: str
+    user_id: str
+    type: str
+    ticker: str
+    company: str
+    shares: int
+    price: float
+    total: float
+    date: str
+    bank: str
+
+
+def fresh(s: str) -> str:
+    """A new string object with the same value, as read from disk."""
+    return "".join(list(s))
+
+
+def legacy_row(i: int) -> LegacyTransaction:
+    price = 100.0 + (i % 997) / 100
+    return LegacyTransaction(
+        id=f"{i:08x}-0000-4000-8000-{i:012x}",
+        user_id=fresh(str(i % 1000)),
+        type=fresh("compra" if i % 2 else "venta"),
+        ticker=fresh(f"T{i % TICKERS}"),
+        company=fresh(f"Empresa {i % TICKERS} Nicaragua"),
+        shares=10,
+        price=price,
+        total=price * 10,
+        date=f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}",
+        bank=fresh(BANKS[i % len(BANKS)]),
+    )
+
+
+def compact_row(i: int) -> Transaction:
+    price = 10_000 + i % 997
+    return Transaction(
+        id=f"{i:08x}-0000-4000-8000-{i:012x}",
+        user_id=fresh(str(i % 1000)),
+        type=fresh("compra" if i % 2 else "venta"),
+        ticker=fresh(f"T{i % TICKERS}"),
+        company=fresh(f"Empresa {i % TICKERS} Nicaragua"),
+        shares=10,
+        price=price,
+        total=price * 10,
+        date=1_704_067_200 + i * 60,
+        bank=fresh(BANKS[i % len(BANKS)]),
+    )
+
+
+def bytes_per_row(make) -> float:
+    gc.collect()
+    tracemalloc.start()
+    rows = [make(i) for i in range(ROWS)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(rows) == ROWS
+    return current / ROWS
+
+
+def main():
+    before = bytes_per_row(legacy_row)
+    after = bytes_per_row(compact_row)
+    print(f"rows:                  {ROWS}")
+    print(f"before (bytes/row):    {before:.0f}")
+    print(f"after (bytes/row):     {after:.0f}")
+    print(f"saved:                 {(1 - after / before) * 100:.0f}%")
+    print(f"projected at 10M rows: {before * 1e7 / 2**30:.2f} GiB -> {after * 1e7 / 2**30:.2f} GiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-request overhead of the metrics middleware.
+
+Drives a minimal ASGI app directly, with and without MetricsMiddleware,
+and reports the added time per request. The budget is 20us.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_metrics [requests]
+"""
+import asyncio
+import sys
+import time
+
+from app.core.metrics import MetricsMiddleware, registry
+
+
+class _Route:
+    path = "/stocks/{ticker}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = _Route  # What the router sets on a match
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b'{"ticker":"AGRI","price":54.8}'})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await app({"type": "http", "method": "GET", "path": "/stocks/AGRI"}, receive, send)
+    return time.perf_counter() - start
+
+
+async def main(count: int):
+    wrapped = MetricsMiddleware(endpoint)
+    await run(endpoint, 1000)
+    await run(wrapped, 1000)
+    bare = min([await run(endpoint, count) for _ in range(5)])
+    instrumented = min([await run(wrapped, count) for _ in range(5)])
+    overhead_us = (instrumented - bare) / count * 1e6
+    print(f"bare:         {bare / count * 1e6:.2f} us/request")
+    print(f"instrumented: {instrumented / count * 1e6:.2f} us/request")
+    print(f"overhead:     {overhead_us:.2f} us/request (budget 20 us)")
+    
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"scrape:       {(time.perf_counter() - start) * 1000:.2f} ms, {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
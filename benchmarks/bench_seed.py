@@ -0,0 +1,68 @@
+"""
+Time bulk seeding of a synthetic dataset.
+
+Loads the generator's output straight into an empty InMemoryDatabase,
+then writes the same dataset as NDJSON and CSV and loads each file set,
+and finally loads the generator into a fresh SQLite file. Reports rows
+per second for each path. SEED_SOURCE=none keeps the databases empty
+until the benchmark loads them.
+
+Usage:
+    SECRET_KEY=bench SEED_SOURCE=none python -m benchmarks.bench_seed [transactions] [users]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from app.infrastructure.database import InMemoryDatabase
+from app.infrastructure.seeding import file_data, seed_database, synthetic_data, write_files
+from app.infrastructure.sqlite_database import SQLiteDatabase
+
+HOLDINGS = 5
+
+
+def timed(label: str, load, transactions: int):
+    start = time.perf_counter()
+    db = load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:6.2f}s  {transactions / elapsed:>12,.0f} transactions/s")
+    return db
+
+
+def main(transactions: int, users: int):
+    def dataset():
+        return synthetic_data(users, HOLDINGS, transactions)
+    
+    def into_memory(data):
+        db = InMemoryDatabase()
+        seed_database(db, data)
+        return db
+    
+    db = timed("generator -> memory", lambda: into_memory(dataset()), transactions)
+    assert len(db.transactions) == transactions
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("ndjson", "csv"):
+            directory = os.path.join(tmp, fmt)
+            write_files(dataset(), directory, fmt)
+            size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+            db = timed(f"{fmt} -> memory", lambda: into_memory(file_data(directory)), transactions)
+            assert len(db.transactions) == transactions
+            print(f"{'':<22} {size / 1e6:6.1f} MB on disk")
+        
+        path = os.path.join(tmp, "seed.db")
+        
+        def into_sqlite():
+            db = SQLiteDatabase(path)
+            seed_database(db, dataset())
+            return db
+        
+        timed("generator -> sqlite", into_sqlite, transactions).close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10_000,
+    )
@@ -0,0 +1,121 @@
+"""
+Benchmark the response serialization of the list endpoints.
+
+"old" reproduces what the routers used to do: build a response model per
+domain object, then let FastAPI validate it against `response_model` and
+render it with JSONResponse. "new" is the direct serializer path.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_serialization
+"""
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.domain.models import Holding, Stock, Transaction
+from app.domain.units import format_date, format_datetime, from_centavos
+from app.schemas import (
+    HoldingResponse,
+    StockResponse,
+    TransactionResponse,
+    holding_serializer,
+    stock_serializer,
+    transaction_serializer,
+)
+
+SIZES = [10, 1_000, 10_000]
+REPEATS = 20
+
+
+def make_stocks(n: int) -> List[Stock]:
+    return [Stock(f"T{i}", f"Empresa {i}", 10_000 + i, 1.25) for i in range(n)]
+
+
+def make_holdings(n: int) -> List[Holding]:
+    return [
+        Holding(f"T{i}", f"Empresa {i}", 10 + i, (10 + i) * 9950, 10_000 + i, 1_704_844_800)
+        for i in range(n)
+    ]
+
+
+def make_transactions(n: int) -> List[Transaction]:
+    return [
+        Transaction(
+            f"tx-{i}", "1", "compra" if i % 2 else "venta", f"T{i % 50}", f"Empresa {i % 50}",
+            10, 14820, 148_200, 1_704_900_600, "BAC Nicaragua",
+        )
+        for i in range(n)
+    ]
+
+
+ADAPTERS = {}
+
+
+def old_path(model, to_model, objs) -> bytes:
+    # FastAPI builds the response field once per route
+    adapter = ADAPTERS.get(model) or ADAPTERS.setdefault(model, TypeAdapter(List[model]))
+    content = [to_model(o) for o in objs]
+    value = adapter.validate_python(content)
+    return JSONResponse(jsonable_encoder(adapter.dump_python(value, mode="json"))).body
+
+
+ENDPOINTS = [
+    (
+        "GET /stocks",
+        make_stocks,
+        StockResponse,
+        lambda s: StockResponse(ticker=s.ticker, company=s.company, price=from_centavos(s.price), change=s.change),
+        stock_serializer,
+    ),
+    (
+        "GET /portfolio/holdings",
+        make_holdings,
+        HoldingResponse,
+        lambda h: HoldingResponse(
+            ticker=h.ticker, company=h.company, shares=h.shares, avgPrice=from_centavos(h.avg_price),
+            currentPrice=from_centavos(h.current_price), purchaseDate=format_date(h.purchase_date),
+        ),
+        holding_serializer,
+    ),
+    (
+        "GET /transactions",
+        make_transactions,
+        TransactionResponse,
+        lambda t: TransactionResponse(
+            id=t.id, type=t.type, ticker=t.ticker, company=t.company, shares=t.shares,
+            price=from_centavos(t.price), total=from_centavos(t.total),
+            date=format_datetime(t.date), bank=t.bank,
+        ),
+        transaction_serializer,
+    ),
+]
+
+
+def best_of(fn) -> float:
+    """Best wall time of REPEATS runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'endpoint':<24}{'rows':>8}{'old ms':>10}{'new ms':>10}{'speedup':>9}")
+    for name, make, model, to_model, serializer in ENDPOINTS:
+        for size in SIZES:
+            objs = make(size)
+            # Both paths must produce the same JSON
+            assert TypeAdapter(object).validate_json(old_path(model, to_model, objs)) == \
+                TypeAdapter(object).validate_json(serializer.dump_json_many(objs))
+            old = best_of(lambda: old_path(model, to_model, objs))
+            new = best_of(lambda: serializer.dump_json_many(objs))
+            print(f"{name:<24}{size:>8}{old:>10.3f}{new:>10.3f}{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
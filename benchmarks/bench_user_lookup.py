@@ -0,0 +1,49 @@
+"""
+Benchmark user lookups in InMemoryDatabase as the user table grows.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_user_lookup
+"""
+import time
+
+from app.domain.models import User
+from app.infrastructure.database import InMemoryDatabase
+from app.infrastructure.repository import ADMIN_HASH
+
+SIZES = [10, 1_000, 100_000, 1_000_000]
+LOOKUPS = 100_000
+
+
+def populate(db: InMemoryDatabase, count: int):
+    for i in range(count):
+        db.create_user(User(
+            id=f"bench-{i}",
+            name=f"Usuario {i}",
+            email=f"user{i}@bench.ni",
+            username=f"user{i}",
+            password_hash=ADMIN_HASH,
+        ))
+
+
+def time_lookups(db: InMemoryDatabase, count: int) -> float:
+    """Return mean nanoseconds per lookup, alternating username and email."""
+    keys = [
+        f"user{i % count}" if i % 2 else f"USER{i % count}@bench.ni"
+        for i in range(LOOKUPS)
+    ]
+    start = time.perf_counter_ns()
+    for key in keys:
+        db.get_user_by_username(key)
+    return (time.perf_counter_ns() - start) / LOOKUPS
+
+
+def main():
+    print(f"{'users':>10}  {'ns/lookup':>10}")
+    for size in SIZES:
+        db = InMemoryDatabase()
+        populate(db, size)
+        print(f"{size:>10}  {time_lookups(db, size):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Measure warm-start time of the persisted in-memory store.
+
+Builds a store with N transactions, writes a snapshot plus a WAL tail,
+then times how long a fresh InMemoryDatabase takes to restore it.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_warm_start [transactions]
+"""
+import sys
+import tempfile
+import time
+
+from app.domain.models import Transaction
+from app.infrastructure.database import InMemoryDatabase
+
+TAIL = 10_000
+
+
+def make_transactions(start: int, count: int):
+    tickers = ["LAFISE", "BANCEN", "AGRI", "ENITEL", "CEMEX"]
+    for i in range(start, start + count):
+        yield Transaction(
+            id=f"bench-{i}", user_id=str(1 + i % 2), type="compra" if i % 3 else "venta",
+            ticker=tickers[i % 5], company=tickers[i % 5], shares=1 + i % 100,
+            price=10_000, total=10_000 * (1 + i % 100), date=1_704_900_600, bank="BAC Nicaragua",
+        )
+
+
+def main(count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        db = InMemoryDatabase(directory)
+        db.add_transactions(make_transactions(0, count))
+        start = time.perf_counter()
+        db.journal.snapshot(db)
+        print(f"snapshot of {count} transactions: {time.perf_counter() - start:.2f}s")
+        db.add_transactions(make_transactions(count, TAIL))
+        db.close()
+        
+        start = time.perf_counter()
+        restored = InMemoryDatabase(directory)
+        elapsed = time.perf_counter() - start
+        print(f"warm start ({len(restored.transactions)} transactions, {TAIL} from WAL): {elapsed:.2f}s")
+        restored.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,70 @@
+"""
+Load test for the quote broadcaster with simulated subscribers.
+
+Starts N subscribers (every tenth is a slow consumer), publishes price
+batches at a fixed rate and reports fan-out cost, delivered batches and
+the largest mailbox seen. Mailboxes must never exceed the ticker count.
+
+Usage:
+    SECRET_KEY=bench python -m benchmarks.bench_ws_fanout [subscribers] [batches]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from app.infrastructure.broadcast import QuoteBroadcaster, QuoteSubscriber
+
+TICKERS = [f"T{i:03d}" for i in range(50)]
+
+
+async def consume(subscriber: QuoteSubscriber, delay: float, stats: dict):
+    while True:
+        batch = await subscriber.next_batch()
+        stats["batches"] += 1
+        stats["quotes"] += len(batch)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+async def main(count: int, batches: int):
+    broadcaster = QuoteBroadcaster()
+    rng = random.Random(1)
+    stats = {"batches": 0, "quotes": 0}
+    subscribers, tasks = [], []
+    for i in range(count):
+        subscriber = QuoteSubscriber()
+        broadcaster.subscribe(subscriber, None if i % 5 == 0 else rng.sample(TICKERS, 5))
+        delay = 0.5 if i % 10 == 0 else 0.0
+        subscribers.append(subscriber)
+        tasks.append(asyncio.create_task(consume(subscriber, delay, stats)))
+    
+    publish_ms = []
+    max_pending = 0
+    prices = {t: 10_000 for t in TICKERS}  # Centavos
+    for _ in range(batches):
+        updates = []
+        for ticker in rng.sample(TICKERS, 20):
+            prices[ticker] = max(1, round(prices[ticker] * (1 + rng.gauss(0, 0.01))))
+            updates.append((ticker, prices[ticker], 0.0))
+        start = time.perf_counter()
+        broadcaster.publish(updates)
+        publish_ms.append((time.perf_counter() - start) * 1000)
+        max_pending = max(max_pending, max(len(s.pending) for s in subscribers))
+        await asyncio.sleep(0.05)
+    
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    
+    print(f"subscribers:           {count}")
+    print(f"publish p50 / max:     {statistics.median(publish_ms):.2f}ms / {max(publish_ms):.2f}ms")
+    print(f"batches delivered:     {stats['batches']} ({stats['quotes']} quotes)")
+    print(f"updates coalesced:     {sum(s.coalesced for s in subscribers)}")
+    print(f"largest mailbox:       {max_pending} (ticker universe {len(TICKERS)})")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(main(*(args + [10_000, 40][len(args):])))
@@ -0,0 +1,39 @@
+"""
+Synthetic dataset for benchmarks.
+
+Loads N users with M holdings each and K transactions spread over the
+last year into a repository, through the seeding generator and its bulk
+insert paths. Everything derives from the seed, so two runs (or two
+commits) see the same data. All users share one password, hashed once.
+"""
+from dataclasses import dataclass
+from typing import List
+
+from app.core.security import get_password_hash
+from app.infrastructure.repository import Repository
+from app.infrastructure.seeding import seed_database, synthetic_data
+
+PASSWORD = "bench-password"
+
+
+@dataclass
+class Dataset:
+    """Ids and tickers the workloads pick from."""
+    user_ids: List[str]
+    usernames: List[str]
+    tickers: List[str]
+    holdings: dict  # User id -> tickers held
+
+
+def build_dataset(db: Repository, users: int, holdings: int, transactions: int, seed: int = 1) -> Dataset:
+    data = synthetic_data(users, holdings, transactions, seed=seed, password_hash=get_password_hash(PASSWORD))
+    tickers = [stock.ticker for stock in data.stocks]
+    seed_database(db, data)
+    
+    user_ids = [f"s{i}" for i in range(users)]
+    return Dataset(
+        user_ids=user_ids,
+        usernames=[f"user{i}" for i in range(users)],
+        tickers=tickers,
+        holdings={user_id: list(db.get_portfolio(user_id).holdings) for user_id in user_ids},
+    )
@@ -0,0 +1,29 @@
+"""
+Test settings. Environment defaults must be in place before the app is
+imported, since settings and the `db` singleton are built at import.
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_BACKEND", "memory")
+os.environ.setdefault("SEED_SOURCE", "demo")
+os.environ.setdefault("MARKET_DATA_SOURCE", "off")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def user_headers():
+    """Bearer header for the demo user `usuario` (id 2)."""
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': '2'})}"}
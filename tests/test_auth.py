@@ -0,0 +1,99 @@
+import uuid
+from dataclasses import replace
+
+import pytest
+
+from app.domain.models import User
+from app.infrastructure.database import InMemoryDatabase
+from app.infrastructure.repository import DuplicateUserError
+from app.infrastructure.sqlite_database import SQLiteDatabase
+
+
+def _registration(**fields):
+    suffix = uuid.uuid4().hex[:8]
+    data = {
+        "name": "Nuevo",
+        "email": f"nuevo{suffix}@bolsa.ni",
+        "username": f"nuevo{suffix}",
+        "password": "secreto123",
+    }
+    data.update(fields)
+    return data
+
+
+def test_register_rejects_username_equal_to_existing_email(client):
+    response = client.post("/auth/register", json=_registration(username="USUARIO@bolsa.ni"))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "El nombre de usuario ya está registrado"
+    
+    # The real owner of the email still logs in with it
+    login = client.post("/auth/login", json={"username": "usuario@bolsa.ni", "password": "usuario123"})
+    assert login.status_code == 200
+    assert login.json()["user"]["id"] == "2"
+
+
+def test_register_rejects_email_equal_to_existing_username(client):
+    # Demo users are admin/admin@bolsa.ni and usuario/usuario@bolsa.ni;
+    # take a username that is a valid email, then try to reuse it as one
+    first = _registration()
+    first["username"] = f"alias{uuid.uuid4().hex[:8]}@correo.ni"
+    assert client.post("/auth/register", json=first).status_code == 201
+    
+    response = client.post("/auth/register", json=_registration(email=first["username"]))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "El correo electrónico ya está registrado"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        db = InMemoryDatabase()
+    else:
+        db = SQLiteDatabase(str(tmp_path / "test.db"))
+    yield db
+    db.close()
+
+
+def _user(user_id: str, username: str, email: str) -> User:
+    return User(id=user_id, name=username, email=email, username=username, password_hash="x", role="user")
+
+
+def test_store_keeps_usernames_and_emails_disjoint(store):
+    with pytest.raises(DuplicateUserError) as error:
+        store.create_user(_user("u1", "usuario@bolsa.ni", "otro@bolsa.ni"))
+    assert error.value.field == "username"
+    
+    with pytest.raises(DuplicateUserError) as error:
+        store.create_user(_user("u2", "otro", "Usuario"))
+    assert error.value.field == "email"
+    
+    # A failed insert leaves nothing behind, and lookups still find the owner
+    assert store.get_user_by_id("u1") is None
+    assert store.get_user_by_username("usuario@bolsa.ni").id == "2"
+    
+    # Renaming onto another user's email is rejected too
+    renamed = replace(store.get_user_by_id("1"), username="usuario@bolsa.ni")
+    with pytest.raises(DuplicateUserError):
+        store.update_user(renamed)
+    assert store.get_user_by_username("admin").id == "1"
+
+
+def test_store_allows_own_email_as_username(store):
+    store.create_user(_user("u3", "mismo@bolsa.ni", "mismo@bolsa.ni"))
+    assert store.get_user_by_username("mismo@bolsa.ni").id == "u3"
+
+
+def test_store_reindexes_a_user_edited_in_place(store):
+    user = store.get_user_by_id("2")
+    user.username = "renombrado"
+    store.update_user(user)
+    assert store.get_user_by_username("renombrado").id == "2"
+    assert store.get_user_by_username("usuario") is None
+    
+    # A rejected rename keeps the stored keys: the old name still resolves
+    user = store.get_user_by_id("2")
+    user.username = "admin"
+    with pytest.raises(DuplicateUserError):
+        store.update_user(user)
+    assert store.get_user_by_username("renombrado").id == "2"
+    assert store.get_user_by_username("admin").id == "1"
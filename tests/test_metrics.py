@@ -0,0 +1,15 @@
+from types import SimpleNamespace
+
+from app.main import app
+
+
+def test_market_data_metrics_are_exported(client, monkeypatch):
+    engine = SimpleNamespace(
+        leader=True, ticks_received=12, ticks_applied=10, batches=3, tick_rate=4.0,
+        apply_latency_ms=2.0, apply_latency_max_ms=5.0, apply_seconds_total=0.009,
+    )
+    monkeypatch.setattr(app.state, "market_engine", engine, raising=False)
+    lines = client.get("/metrics").text.splitlines()
+    assert "market_data_leader 1" in lines
+    assert "market_tick_rate 4.0" in lines
+    assert "market_apply_latency_seconds 0.002" in lines
@@ -0,0 +1,44 @@
+from app.domain.models import Order
+from app.infrastructure.matching import MatchingEngine
+from app.infrastructure.order_book import BookSide
+from app.infrastructure.sqlite_database import SQLiteDatabase
+
+
+def test_sqlite_orders_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first_db, second_db = SQLiteDatabase(path), SQLiteDatabase(path)
+    first, second = MatchingEngine(first_db), MatchingEngine(second_db)
+    try:
+        stock = first_db.get_stock("AGRI")
+        seller = second_db.get_portfolio("1")
+        seller.buy(ticker="AGRI", company=stock.company, shares=10, price=1000, purchase_date=0)
+        second_db.update_portfolio(seller)
+        
+        bid = first.place("2", stock, side="compra", price=1000, quantity=5, bank="BAC")
+        assert second.snapshot("2", bid.id).status == "abierta"
+        assert second.depth("AGRI", 5)[0] == [(1000, 5, 1)]
+        assert second_db.get_reservations("2") == (5000, {})
+        
+        # Matches the order resting on the other worker
+        ask = second.place("1", stock, side="venta", price=1000, quantity=2, bank="BAC")
+        assert ask.status == "ejecutada"
+        assert first.snapshot("2", bid.id).filled == 2
+        assert first_db.get_reservations("2") == (3000, {})
+        
+        assert second.cancel("2", bid.id).status == "cancelada"
+        assert first.depth("AGRI", 5) == ([], [])
+        assert first_db.get_reservations("2") == (0, {})
+    finally:
+        first_db.close()
+        second_db.close()
+
+
+def test_book_heap_stays_bounded_under_churn():
+    asks = BookSide(descending=False)
+    asks.add(Order(id="best", user_id="1", ticker="AGRI", side="venta", price=100, quantity=1, bank="BAC", date=0))
+    for i in range(10_000):
+        order = Order(id=str(i), user_id="1", ticker="AGRI", side="venta", price=200 + i % 7, quantity=1, bank="BAC", date=0)
+        asks.add(order)
+        asks.remove(order)
+    assert len(asks._heap) <= 2 * len(asks.levels) + 9
+    assert asks.best_price() == 100
@@ -0,0 +1,17 @@
+import asyncio
+
+from app.api.portfolio import _portfolio_events
+from app.core.config import settings
+
+
+def test_stream_without_throttling(monkeypatch):
+    monkeypatch.setattr(settings, "PORTFOLIO_STREAM_MAX_RATE", 0)
+    
+    async def first_event():
+        events = _portfolio_events("2")
+        try:
+            return await events.__anext__()
+        finally:
+            await events.aclose()
+    
+    assert asyncio.run(first_event()).startswith("event: snapshot")
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, profile_store
+
+
+def _run(app, path):
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    
+    async def send(message):
+        pass
+    
+    asyncio.run(ProfilingMiddleware(app, identify=lambda _: None)(scope, receive, send))
+
+
+async def _slow_start(scope, receive, send):
+    await asyncio.sleep(0.2)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"done"})
+
+
+async def _long_stream(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"first", "more_body": True})
+    await asyncio.sleep(0.2)
+    await send({"type": "http.response.body", "body": b"last"})
+
+
+def test_slow_capture_times_the_first_body_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_MS", 50)
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0)
+    profile_store.clear()
+    _run(_long_stream, "/stream")
+    _run(_slow_start, "/slow")
+    assert [(p.path, p.reason) for p in profile_store.list()] == [("/slow", "slow")]
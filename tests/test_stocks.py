@@ -0,0 +1,68 @@
+import time
+
+from app.infrastructure.database import InMemoryDatabase
+from app.infrastructure.history import PriceHistory, day_start, price_history
+from app.infrastructure.sqlite_database import SQLiteDatabase
+
+
+def test_sqlite_stocks_version_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer, reader = SQLiteDatabase(path), SQLiteDatabase(path)
+    try:
+        version = reader.stocks_version
+        writer.update_stock_prices([("AGRI", 6000, 1.5)])
+        assert reader.stocks_version == version + 1
+        assert reader.get_stock("AGRI").price == 6000
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_sqlite_price_days_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer, reader = SQLiteDatabase(path), SQLiteDatabase(path)
+    try:
+        writer.record_prices([("AGRI", 7000, 3)])
+        writer.record_prices([("AGRI", 5000, 2)])
+        day = reader.get_price_days("AGRI")[-1]
+        assert day[2] >= 7000 and day[3] <= 5000
+        assert day[4] == 5000
+        assert day[5] == 5
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_day_bars_outlive_the_fine_bars():
+    history = PriceHistory(bar_seconds=300, capacity=10, day_capacity=400)
+    now = time.time()
+    for days_ago in range(300, 0, -1):
+        history.record("AGRI", 1000 + days_ago, ts=now - days_ago * 24 * 3600)
+    assert len(history.bars("AGRI")) == 10
+    days = history.days("AGRI")
+    assert len(days) == 300
+    assert days[0][4] == 1300
+
+
+def test_history_serves_long_ranges_from_day_bars(client):
+    old_day = day_start(time.time() - 300 * 24 * 3600)
+    price_history.restore_days("AGRI", [(old_day, 1234, 1234, 1234, 1234, 0)])
+    response = client.get("/stocks/AGRI/history", params={"months": 12, "interval": "daily"})
+    assert response.status_code == 200
+    history = response.json()["history"]
+    assert history[0]["date"] == time.strftime("%Y-%m-%d", time.localtime(old_day))
+    assert history[0]["value"] == 12.34
+
+
+def test_restart_does_not_record_restored_prices(tmp_path, monkeypatch):
+    first = InMemoryDatabase(persistence_dir=str(tmp_path))
+    first.journal.snapshot(first)
+    first.update_stock_prices([("AGRI", 6100, 1.0)])
+    first.journal.close()
+    
+    recorded = []
+    monkeypatch.setattr(price_history, "record", lambda *args, **kwargs: recorded.append(args))
+    second = InMemoryDatabase(persistence_dir=str(tmp_path))
+    second.journal.close()
+    assert second.get_stock("AGRI").price == 6100
+    assert recorded == []
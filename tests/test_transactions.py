@@ -0,0 +1,38 @@
+import pytest
+
+from app.infrastructure.database import db
+
+
+@pytest.mark.parametrize("shares", [-5, 0])
+def test_batch_rejects_non_positive_legs(client, user_headers, shares):
+    before = db.get_portfolio("2")
+    balance, holdings = before.balance, {t: h.shares for t, h in before.holdings.items()}
+    
+    response = client.post("/transactions/batch", headers=user_headers, json={"legs": [
+        {"type": "compra", "ticker": "AGRI", "shares": 1, "bank": "BAC"},
+        {"type": "venta", "ticker": "AGRI", "shares": shares, "bank": "BAC"},
+    ]})
+    assert response.status_code == 422
+    
+    after = db.get_portfolio("2")
+    assert after.balance == balance
+    assert {t: h.shares for t, h in after.holdings.items()} == holdings
+
+
+@pytest.mark.parametrize("path", ["/transactions/buy", "/transactions/sell"])
+def test_instant_trades_reject_negative_shares(client, user_headers, path):
+    response = client.post(path, headers=user_headers, json={"ticker": "AGRI", "shares": -1, "bank": "BAC"})
+    assert response.status_code == 422
+
+
+def test_instant_buy_cannot_spend_reserved_cash(client, user_headers):
+    balance = db.get_portfolio("2").balance
+    order = client.post("/orders", headers=user_headers, json={
+        "ticker": "AGRI", "side": "compra", "price": 1.0, "quantity": balance // 100, "bank": "BAC",
+    }).json()
+    try:
+        response = client.post("/transactions/buy", headers=user_headers, json={"ticker": "AGRI", "shares": 1, "bank": "BAC"})
+        assert response.status_code == 400
+        assert "Saldo insuficiente" in response.json()["detail"]
+    finally:
+        client.delete(f"/orders/{order['id']}", headers=user_headers)
@@ -0,0 +1,27 @@
+import asyncio
+
+from app.infrastructure.broadcast import QuoteBroadcaster, QuoteSubscriber
+
+
+def test_snapshot_quotes_match_updates(client):
+    with client.websocket_connect("/ws/stocks?tickers=AGRI") as websocket:
+        message = websocket.receive_json()
+    assert message["type"] == "quotes"
+    [snapshot] = message["data"]
+    
+    async def published():
+        broadcaster, subscriber = QuoteBroadcaster(), QuoteSubscriber()
+        broadcaster.subscribe(subscriber, ["AGRI"])
+        broadcaster.publish([("AGRI", 6000, 1.5)])
+        return await subscriber.next_batch()
+    
+    [update] = asyncio.run(published())
+    assert update == {"ticker": "AGRI", "price": 60.0, "change": 1.5}
+    assert snapshot.keys() == update.keys()
+
+
+def test_partial_unsubscribe_from_all_is_an_error(client):
+    with client.websocket_connect("/ws/stocks?tickers=*") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"action": "unsubscribe", "tickers": ["AGRI"]})
+        assert websocket.receive_json()["type"] == "error"